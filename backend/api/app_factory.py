@@ -1,17 +1,27 @@
 # pyright: reportMissingImports=false
 """Build FastAPI app: middleware, routers, root and webhook endpoints."""
+import asyncio
 import logging
 
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from telegram import Update
 
 from config import config
+from infrastructure.redis.redis_client import redis_forward_update
+from bot.webhook_ingress import (
+    SECRET_TOKEN_HEADER,
+    enqueue_update,
+    is_ingress_running,
+    verify_secret_token,
+)
 from api.routes.games_routes import router as games_router
 from api.routes.sse_game_routes import router as sse_game_router
 from api.routes.pages_routes import router as pages_router
 from api.routes.health_routes import router as health_router
 from api.routes.media_routes import router as media_router
+from api.routes.metrics_routes import router as metrics_router
+from api.routes.admin_routes import router as admin_router
+from api.tracing_middleware import TracingMiddleware
 
 logger = logging.getLogger(__name__)
 
@@ -25,11 +35,14 @@ def create_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    app.add_middleware(TracingMiddleware)
     app.include_router(games_router, prefix="/api")
     app.include_router(sse_game_router, prefix="/sse")
     app.include_router(pages_router)
     app.include_router(health_router)
     app.include_router(media_router)
+    app.include_router(metrics_router)
+    app.include_router(admin_router)
 
     @app.get("/")
     async def root():
@@ -41,16 +54,18 @@ def create_app() -> FastAPI:
 
     @app.post("/webhook")
     async def telegram_webhook(request: Request):
-        if not hasattr(app.state, "tg_app"):
+        if not verify_secret_token(request.headers.get(SECRET_TOKEN_HEADER)):
+            raise HTTPException(status_code=403, detail="Invalid webhook secret token")
+        body = await request.body()
+        if not is_ingress_running():
+            # Not the control process (multi-worker): hand the update to it through Redis.
+            if await asyncio.to_thread(redis_forward_update, body.decode("utf-8", "replace")):
+                return {"ok": True}
             logger.error("Webhook called before telegram app initialization")
             raise HTTPException(status_code=503, detail="Telegram app is not initialized")
-        try:
-            data = await request.json()
-            update = Update.de_json(data=data, bot=app.state.tg_app.bot)
-            await app.state.tg_app.update_queue.put(update)
-        except Exception as e:
-            logger.exception("Webhook processing failed: %s", e)
-            raise HTTPException(status_code=500, detail="Webhook processing failed") from e
+        if not enqueue_update(body):
+            # Non-2xx makes Telegram redeliver later instead of losing the update.
+            raise HTTPException(status_code=503, detail="Webhook ingress is busy")
         return {"ok": True}
 
     return app
@@ -0,0 +1,43 @@
+# pyright: reportMissingImports=false
+"""Admin controller: diagnostics for the running worker (sampling profiler, loop stalls).
+Requires X-Admin-Token matching ADMIN_TOKEN; without ADMIN_TOKEN the endpoints do not exist (404)."""
+import hmac
+
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+
+from config import config
+from utils.loop_watchdog import get_stall_report
+from utils.profiler import ProfilerBusyError, run_profile
+
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+ADMIN_FORBIDDEN_DETAIL = "Invalid admin token."
+PROFILER_BUSY_DETAIL = "A profile is already running."
+ADMIN_HEADERS = {"Cache-Control": "no-store"}
+
+
+def require_admin(request: Request) -> None:
+    expected = config.ADMIN_TOKEN
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not Found")
+    provided = request.headers.get(ADMIN_TOKEN_HEADER) or ""
+    if not hmac.compare_digest(provided.encode(), expected.encode()):
+        raise HTTPException(status_code=403, detail=ADMIN_FORBIDDEN_DETAIL)
+
+
+async def profile(request: Request, seconds: float, interval_ms: float, output: str) -> Response:
+    """Profile this worker for `seconds`. output=collapsed returns flamegraph input as text."""
+    require_admin(request)
+    try:
+        result = await run_profile(seconds, interval_ms / 1000)
+    except ProfilerBusyError:
+        raise HTTPException(status_code=409, detail=PROFILER_BUSY_DETAIL)
+    if output == "collapsed":
+        return PlainTextResponse(result.collapsed(), headers=ADMIN_HEADERS)
+    return JSONResponse(result.to_dict(), headers=ADMIN_HEADERS)
+
+
+async def loop_stalls(request: Request, top: int) -> JSONResponse:
+    """Event-loop stalls aggregated by blocking call site (worst total first)."""
+    require_admin(request)
+    return JSONResponse({"callsites": get_stall_report(top)}, headers=ADMIN_HEADERS)
@@ -2,60 +2,70 @@
 """Game API controller: request parsing, call services, return response. No business logic."""
 import logging
 
-from fastapi import HTTPException, Request
-from fastapi.responses import FileResponse
+from fastapi import HTTPException, Request, Response
 
 from domain.game import GameStateResponse
 from api.schemas.game_schema import GameActionRequest, GameActionResponse
-from services.game_api_service import (
-    apply_demo_room,
-    build_game_state_response,
-    needs_demo_room,
-)
+from services.game_api_service import build_game_state_response, ensure_demo_room
 from services.game_action_service import submit_puzzle_action
-from services.game_auth_service import get_game_for_request
+from services.game_auth_service import (
+    authorize_game_asset_request,
+    get_game_for_request,
+    validate_request_init_data,
+)
 from services.game_lifecycle_service import (
+    end_game_on_time_up,
+    get_time_up_result,
     handle_door_opened as lifecycle_handle_door_opened,
-    handle_time_up as lifecycle_handle_time_up,
     record_game_start,
 )
-from config import LORE_WAV_PATH
-from services.game_session import save_game
+from api.controllers.media_controller import LORE_AUDIO_NOT_FOUND_DETAIL, serve_asset
 from services.sse_registry import broadcast_game_started
 
 logger = logging.getLogger(__name__)
 
+# URL may carry the player's initData, so keep it out of shared caches.
+LORE_AUDIO_CACHE_CONTROL = "private, max-age=86400"
+
 
 async def game_start(game_id: str, request: Request) -> dict:
     game = get_game_for_request(game_id, request)
-    had_started = bool(game.get("started_at"))
+    had_started = bool(game.started_at)
     record_game_start(game_id, game)
-    if not had_started and game.get("started_at"):
-        await broadcast_game_started(game_id, game["started_at"])
-    return {"started_at": game["started_at"]}
+    if not had_started and game.started_at:
+        await broadcast_game_started(game_id, game.started_at)
+    return {"started_at": game.started_at}
 
 
 async def game_time_up(game_id: str, request: Request) -> dict:
-    game = get_game_for_request(game_id, request)
-    bot = getattr(request.app.state.tg_app, "bot", None)
-    await lifecycle_handle_time_up(game_id, game, bot)
-    return {"ok": True, "message": "game_over"}
+    # Every player's timer fires this; only the first call ends the game, the rest get its result.
+    cached = await get_time_up_result(game_id)
+    if cached is not None:
+        validate_request_init_data(request)
+        return cached
+    try:
+        game = get_game_for_request(game_id, request)
+    except HTTPException as exc:
+        # Ended (and deleted) between the check above and the load.
+        cached = await get_time_up_result(game_id) if exc.status_code == 404 else None
+        if cached is None:
+            raise
+        return cached
+    bot = getattr(request.app.state, "bot", None)
+    return await end_game_on_time_up(game_id, game, bot)
 
 
 async def get_game_state(game_id: str, request: Request) -> GameStateResponse:
     game = get_game_for_request(game_id, request)
-    if needs_demo_room(game):
-        apply_demo_room(game)
-        save_game(game_id, game)
-        logger.info("Room applied for game_id=%s (items + positions, no image)", game_id)
+    ensure_demo_room(game_id, game)
     return build_game_state_response(game_id, game)
 
 
-async def get_lore_audio(game_id: str, request: Request) -> FileResponse:
-    get_game_for_request(game_id, request)
-    if not LORE_WAV_PATH.exists():
-        raise HTTPException(status_code=404, detail="Lore audio not found. Add backend/audio/lore.wav")
-    return FileResponse(LORE_WAV_PATH, media_type="audio/wav")
+async def get_lore_audio(game_id: str, request: Request) -> Response:
+    # <audio src> cannot send headers, so initData may also come as ?init_data= (as for SSE).
+    init_data = request.headers.get("X-Telegram-Init-Data") or request.query_params.get("init_data") or ""
+    authorize_game_asset_request(game_id, init_data)
+    return await serve_asset(request, "lore.wav", LORE_AUDIO_NOT_FOUND_DETAIL, cache_control=LORE_AUDIO_CACHE_CONTROL)
 
 
 async def game_action(game_id: str, request: Request, body: GameActionRequest) -> GameActionResponse:
@@ -1,14 +1,32 @@
 # pyright: reportMissingImports=false
-"""Health controller: return status and mode."""
+"""Health controller: return status, mode and per-component startup state."""
+import asyncio
+
 from fastapi.responses import JSONResponse
 
 from config import config
+from infrastructure.redis.redis_client import is_redis_available, redis_breaker_state
+from utils.component_health import DISABLED, FAILED, READY, component_snapshot
 
 HEALTH_HEADERS = {"Cache-Control": "no-store, no-cache, must-revalidate"}
 
 
 async def health_check() -> JSONResponse:
+    """Always 200 once the app serves (liveness); `components` shows what is still starting."""
+    components = component_snapshot()
+    if config.REDIS_URL:
+        if await asyncio.to_thread(is_redis_available):
+            components["redis"] = {"state": READY}
+        else:
+            components["redis"] = {"state": FAILED, "detail": f"circuit {redis_breaker_state()}"}
+    else:
+        components["redis"] = {"state": DISABLED}
     return JSONResponse(
-        content={"status": "awake", "mode": config.MODE},
+        content={
+            "status": "awake",
+            "mode": config.MODE,
+            "role": config.PROCESS_ROLE,
+            "components": components,
+        },
         headers=HEALTH_HEADERS,
     )
@@ -1,62 +1,180 @@
-"""Media controller: serve static files. Paths from config."""
-from fastapi import HTTPException
-from fastapi.responses import FileResponse
-
-from config import IMAGES_DIR, LORE_WAV_PATH, ROOM_ASSETS_DIR
-
-
-async def serve_room_image():
-    path = IMAGES_DIR / "escape_room.png"
-    if not path.exists():
-        candidates = sorted(
-            IMAGES_DIR.glob("escape_room_*.png"),
-            key=lambda p: p.stat().st_mtime,
-            reverse=True,
-        )
-        path = candidates[0] if candidates else None
-    if not path or not path.exists():
-        raise HTTPException(
-            status_code=404,
-            detail="Room image not found. Add images/escape_room.png",
-        )
-    return FileResponse(path, media_type="image/png")
-
-
-async def serve_door_video():
-    for base in (ROOM_ASSETS_DIR, IMAGES_DIR):
-        for name in ("door_open.mp4", "door-opening.mp4"):
-            path = base / name
-            if path.exists():
-                return FileResponse(path, media_type="video/mp4")
-    raise HTTPException(
-        status_code=404,
-        detail="Door video not found. Add backend/room_assets/door_open.mp4",
-    )
+"""Media controller: serve static files from the asset index (ETag, conditional and Range requests).
+Picks a transcoded variant (AVIF/WebP, Opus/AAC) from the Accept header when the pipeline built one.
+Until the startup index build finishes, files are served as they are (no ETag, variants or caching)."""
+import asyncio
+
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import FileResponse, RedirectResponse
+
+from infrastructure.assets.asset_index import (
+    ASSET_RULES,
+    Asset,
+    AssetVariant,
+    asset_index_ready,
+    get_asset,
+    resolve_asset_path,
+)
+from utils.urls import versioned_asset_path
+
+# Logical names can point at a newer file after a redeploy; clients revalidate cheaply via ETag.
+ASSET_CACHE_CONTROL = "public, max-age=86400, stale-while-revalidate=604800"
+# Content-addressed URLs (/assets/{digest}/{name}) never change content.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+ASSET_NOT_FOUND_DETAIL = "Asset not found."
+UNINDEXED_CACHE_CONTROL = "no-cache"
+
+ROOM_IMAGE_NOT_FOUND_DETAIL = "Room image not found. Add images/escape_room.png"
+DOOR_VIDEO_NOT_FOUND_DETAIL = "Door video not found. Add backend/room_assets/door_open.mp4"
+SCIENCE_LAB_NOT_FOUND_DETAIL = "Science lab image not found. Add backend/room_assets/science_lab_room.png"
+LORE_AUDIO_NOT_FOUND_DETAIL = "Lore audio not found. Add backend/audio/lore.wav"
+
+
+# Best first. Audio: AAC decodes everywhere, so it is the default for */*; Opus only when asked for.
+_IMAGE_VARIANT_PREFERENCE = ("image/avif", "image/webp")
+_AUDIO_VARIANT_PREFERENCE = (
+    ("audio/ogg", ("audio/ogg",)),
+    ("audio/mp4", ("audio/mp4", "audio/aac", "audio/*", "*/*")),
+)
+
+
+def _accepted_media_types(accept: str) -> set[str]:
+    accepted: set[str] = set()
+    for part in accept.split(","):
+        media_type, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if media_type and q > 0:
+            accepted.add(media_type.strip().lower())
+    return accepted
+
+
+def _pick_width(variants: list[AssetVariant], width: int | None) -> AssetVariant:
+    by_width = sorted(variants, key=lambda v: v.width or 0)
+    if width:
+        for v in by_width:
+            if (v.width or 0) >= width:
+                return v
+    return by_width[-1]
+
+
+def select_variant(asset: Asset, accept: str, width: int | None = None) -> Asset | AssetVariant:
+    """Best delivery variant the client accepts; the original asset when none fits."""
+    if not asset.variants:
+        return asset
+    accepted = _accepted_media_types(accept or "*/*")
+    if asset.media_type.startswith("image/"):
+        for media_type in _IMAGE_VARIANT_PREFERENCE:
+            if media_type in accepted:
+                candidates = [v for v in asset.variants if v.media_type == media_type]
+                if candidates:
+                    return _pick_width(candidates, width)
+    elif asset.media_type.startswith("audio/"):
+        for media_type, triggers in _AUDIO_VARIANT_PREFERENCE:
+            if accepted.intersection(triggers):
+                for v in asset.variants:
+                    if v.media_type == media_type:
+                        return v
+    return asset
+
+
+def _width_param(request: Request) -> int | None:
+    try:
+        width = int(request.query_params.get("w") or 0)
+    except ValueError:
+        return None
+    return width if width > 0 else None
 
 
-async def serve_science_lab_room():
-    for base in (ROOM_ASSETS_DIR, IMAGES_DIR):
-        for name in ("science_lab_room.png", "science_lab.png"):
-            path = base / name
-            if path.exists():
-                return FileResponse(path, media_type="image/png")
-        candidates = sorted(
-            base.glob("science_lab_room_*.png"),
-            key=lambda p: p.stat().st_mtime,
-            reverse=True,
-        )
-        if candidates:
-            return FileResponse(candidates[0], media_type="image/png")
-    raise HTTPException(
-        status_code=404,
-        detail="Science lab image not found. Add backend/room_assets/science_lab_room.png",
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def asset_file_response(
+    request: Request,
+    asset: Asset,
+    cache_control: str = ASSET_CACHE_CONTROL,
+) -> Response:
+    """Select variant, then 304 on matching If-None-Match; otherwise FileResponse
+    (which handles Range / If-Range) with the precomputed stat."""
+    chosen = select_variant(asset, request.headers.get("accept") or "", _width_param(request))
+    headers = {"ETag": chosen.etag, "Cache-Control": cache_control}
+    if asset.variants:
+        headers["Vary"] = "Accept"
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, chosen.etag):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(
+        chosen.path,
+        media_type=chosen.media_type,
+        headers=headers,
+        stat_result=chosen.stat,
     )
 
 
-async def serve_lore_audio():
-    if not LORE_WAV_PATH.exists():
-        raise HTTPException(
-            status_code=404,
-            detail="Lore audio not found. Add backend/audio/lore.wav",
-        )
-    return FileResponse(LORE_WAV_PATH, media_type="audio/wav")
+async def _unindexed_asset_response(name: str) -> Response | None:
+    """The file as it is, resolved in a worker thread, while the index is still being built.
+    None once the index is ready or when there is no file."""
+    if asset_index_ready():
+        return None
+    rule = ASSET_RULES[name]
+    path = await asyncio.to_thread(resolve_asset_path, rule)
+    if path is None:
+        return None
+    return FileResponse(path, media_type=rule.media_type, headers={"Cache-Control": UNINDEXED_CACHE_CONTROL})
+
+
+async def serve_asset(
+    request: Request,
+    name: str,
+    not_found_detail: str,
+    cache_control: str = ASSET_CACHE_CONTROL,
+) -> Response:
+    asset = get_asset(name)
+    if asset is None:
+        response = await _unindexed_asset_response(name)
+        if response is None:
+            raise HTTPException(status_code=404, detail=not_found_detail)
+        return response
+    return asset_file_response(request, asset, cache_control=cache_control)
+
+
+async def serve_room_image(request: Request) -> Response:
+    return await serve_asset(request, "escape_room.png", ROOM_IMAGE_NOT_FOUND_DETAIL)
+
+
+async def serve_door_video(request: Request) -> Response:
+    return await serve_asset(request, "door_open.mp4", DOOR_VIDEO_NOT_FOUND_DETAIL)
+
+
+async def serve_science_lab_room(request: Request) -> Response:
+    return await serve_asset(request, "science_lab_room.png", SCIENCE_LAB_NOT_FOUND_DETAIL)
+
+
+async def serve_lore_audio(request: Request) -> Response:
+    return await serve_asset(request, "lore.wav", LORE_AUDIO_NOT_FOUND_DETAIL)
+
+
+async def serve_versioned_asset(request: Request, digest: str, name: str) -> Response:
+    """Serve a content-addressed asset with immutable caching.
+    A stale digest (file replaced since the URL was issued) redirects to the current one."""
+    if name not in ASSET_RULES:
+        raise HTTPException(status_code=404, detail=ASSET_NOT_FOUND_DETAIL)
+    asset = get_asset(name)
+    if asset is None:
+        response = await _unindexed_asset_response(name)  # digest not known yet: not immutable
+        if response is None:
+            raise HTTPException(status_code=404, detail=ASSET_NOT_FOUND_DETAIL)
+        return response
+    if digest != asset.digest:
+        url = versioned_asset_path(name, asset.digest)
+        if request.url.query:
+            url += f"?{request.url.query}"
+        return RedirectResponse(url=url, status_code=307, headers={"Cache-Control": "no-cache"})
+    return asset_file_response(request, asset, cache_control=IMMUTABLE_CACHE_CONTROL)
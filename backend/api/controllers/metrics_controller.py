@@ -0,0 +1,11 @@
+# pyright: reportMissingImports=false
+"""Metrics controller: Prometheus text exposition of in-process metrics."""
+from fastapi.responses import PlainTextResponse
+
+from utils.metrics import CONTENT_TYPE, render_metrics
+
+METRICS_HEADERS = {"Cache-Control": "no-store"}
+
+
+async def metrics_scrape() -> PlainTextResponse:
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE, headers=METRICS_HEADERS)
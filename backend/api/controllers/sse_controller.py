@@ -3,13 +3,15 @@
 import asyncio
 import json
 import logging
+import time
 from urllib.parse import parse_qs
 
 from fastapi import HTTPException, Request
 from fastapi.responses import StreamingResponse
 
-from services.game_auth_service import get_game_and_user_for_realtime
-from services.sse_registry import register, unregister
+from services.game_auth_service import authorize_realtime_user
+from services.sse_registry import DRAIN_EVENT_TYPE, is_draining, reconnect_delay_ms, register, unregister
+from utils.logging_config import log_sampled
 
 logger = logging.getLogger(__name__)
 
@@ -25,24 +27,32 @@ def _sse_format(data: dict) -> str:
 
 
 async def sse_games_handler(request: Request, game_id: str) -> StreamingResponse:
+    if is_draining():
+        # Shutting down: refuse before auth so reconnect storms cost nothing here.
+        retry_after = max(1, round(reconnect_delay_ms() / 1000))
+        raise HTTPException(status_code=503, detail="Server is restarting", headers={"Retry-After": str(retry_after)})
     init_data = get_init_data_from_request(request)
-    logger.info("SSE init_data present=%s game_id=%s", bool(init_data), game_id)
+    started = time.perf_counter()
     try:
-        game, user_id = get_game_and_user_for_realtime(game_id, init_data)
-        players = game.get("players") or {}
-        logger.info(
-            "SSE auth ok game_id=%s user_id=%s players_count=%s",
-            game_id,
-            user_id,
-            len(players),
+        user_id = authorize_realtime_user(game_id, init_data)
+        log_sampled(
+            logger,
+            logging.INFO,
+            "SSE auth ok",
+            game_id=game_id,
+            user_id=user_id,
+            latency_ms=round((time.perf_counter() - started) * 1000, 3),
         )
     except HTTPException as exc:
-        logger.info(
-            "SSE auth rejected game_id=%s status=%s init_data_present=%s detail=%s",
-            game_id,
-            exc.status_code,
-            bool(init_data),
-            getattr(exc, "detail", ""),
+        log_sampled(
+            logger,
+            logging.INFO,
+            "SSE auth rejected",
+            game_id=game_id,
+            status=exc.status_code,
+            init_data_present=bool(init_data),
+            detail=getattr(exc, "detail", ""),
+            latency_ms=round((time.perf_counter() - started) * 1000, 3),
         )
         raise
 
@@ -57,12 +67,16 @@ async def sse_games_handler(request: Request, game_id: str) -> StreamingResponse
                     break
                 try:
                     payload = await asyncio.wait_for(queue.get(), timeout=20.0)
+                    if payload.get("type") == DRAIN_EVENT_TYPE:
+                        # Sets the EventSource reconnect delay, then the stream ends.
+                        yield f"retry: {payload['retry_ms']}\n" + _sse_format(payload)
+                        break
                     yield _sse_format(payload)
                 except asyncio.TimeoutError:
                     # Keep connection active through idle periods.
                     yield ": keepalive\n\n"
         finally:
-            logger.info("SSE disconnect game_id=%s user_id=%s", game_id, user_id)
+            log_sampled(logger, logging.INFO, "SSE disconnect", game_id=game_id, user_id=user_id)
             unregister(game_id, queue)
 
     headers = {
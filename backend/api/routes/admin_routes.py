@@ -0,0 +1,23 @@
+"""Admin routes: endpoint definitions only (token-protected diagnostics)."""
+from typing import Literal
+
+from fastapi import APIRouter, Query, Request
+
+from api.controllers.admin_controller import loop_stalls as _loop_stalls, profile as _profile
+
+router = APIRouter(prefix="/admin", tags=["admin"], include_in_schema=False)
+
+
+@router.post("/profile")
+async def profile(
+    request: Request,
+    seconds: float = Query(default=10.0, gt=0, le=60),
+    interval_ms: float = Query(default=5.0, ge=1, le=1000),
+    output: Literal["json", "collapsed"] = Query(default="json", alias="format"),
+):
+    return await _profile(request, seconds, interval_ms, output)
+
+
+@router.get("/loop-stalls")
+async def loop_stalls(request: Request, top: int = Query(default=20, ge=1, le=100)):
+    return await _loop_stalls(request, top)
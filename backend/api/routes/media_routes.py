@@ -1,32 +1,38 @@
 # pyright: reportMissingImports=false
 """Media routes: endpoint definitions only."""
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 
 from api.controllers.media_controller import (
     serve_room_image,
     serve_door_video,
     serve_science_lab_room,
     serve_lore_audio,
+    serve_versioned_asset,
 )
 
 router = APIRouter(tags=["media"])
 
 
 @router.get("/room/escape_room.png")
-async def room_image():
-    return await serve_room_image()
+async def room_image(request: Request):
+    return await serve_room_image(request)
 
 
 @router.get("/room/door_open.mp4")
-async def door_video():
-    return await serve_door_video()
+async def door_video(request: Request):
+    return await serve_door_video(request)
 
 
 @router.get("/room/science_lab_room.png")
-async def science_lab_room():
-    return await serve_science_lab_room()
+async def science_lab_room(request: Request):
+    return await serve_science_lab_room(request)
 
 
 @router.get("/audio/lore.wav")
-async def lore_audio():
-    return await serve_lore_audio()
+async def lore_audio(request: Request):
+    return await serve_lore_audio(request)
+
+
+@router.get("/assets/{digest}/{name}")
+async def versioned_asset(request: Request, digest: str, name: str):
+    return await serve_versioned_asset(request, digest, name)
@@ -0,0 +1,11 @@
+"""Metrics routes: endpoint definitions only."""
+from fastapi import APIRouter
+
+from api.controllers.metrics_controller import metrics_scrape
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    return await metrics_scrape()
@@ -0,0 +1,44 @@
+# pyright: reportMissingImports=false
+"""ASGI middleware: one server span per HTTP request, continuing an incoming traceparent header."""
+from typing import Any
+
+from utils.tracing import SPAN_KIND_SERVER, parse_traceparent, start_span, tracing_enabled
+
+
+def _path_template(path: str, path_params: dict[str, Any]) -> str:
+    """Low-cardinality span name once routing filled path_params: /api/games/{game_id}."""
+    for name, value in path_params.items():
+        path = path.replace(f"/{value}", f"/{{{name}}}", 1)
+    return path
+
+
+class TracingMiddleware:
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or not tracing_enabled():
+            await self.app(scope, receive, send)
+            return
+        parent = None
+        for key, value in scope.get("headers") or ():
+            if key == b"traceparent":
+                parent = parse_traceparent(value.decode("latin-1"))
+                break
+        method = scope.get("method", "")
+        with start_span(
+            f"{method} {scope.get('path', '')}",
+            kind=SPAN_KIND_SERVER,
+            parent=parent,
+            **{"http.request.method": method, "url.path": scope.get("path", "")},
+        ) as span:
+
+            async def send_wrapper(message: dict[str, Any]) -> None:
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.response.status_code", message["status"])
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+            path_params = scope.get("path_params")
+            if path_params:
+                span.name = f"{method} {_path_template(scope.get('path', ''), path_params)}"
@@ -0,0 +1 @@
+# Load harness and micro-benchmarks (dev only; not imported by the app).
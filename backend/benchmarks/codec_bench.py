@@ -0,0 +1,93 @@
+# pyright: reportMissingImports=false
+"""Encode/decode time and stored bytes per game document, per Redis codec.
+
+Builds the stored document of a running demo room (apply_demo_room, half the puzzles solved,
+started; players live in the roster hash, not the document) and reports the median per call for:
+- json          legacy documents (GAME_CODEC=json)
+- msgpack       without compression
+- msgpack+zstd  compression forced, whatever the payload size
+Whether a real write compresses depends on GAME_CODEC_COMPRESS_MIN_BYTES; "selected" is the
+format encode_game picks for this game with the current settings.
+
+    uv run python -m benchmarks.codec_bench
+    uv run python -m benchmarks.codec_bench --iterations 20000 --items 60
+"""
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from benchmarks.load_harness import _prepare_environment
+
+
+def _build_game(extra_items: int) -> dict[str, Any]:
+    """Stored document (GameState.to_document without players) of a half-solved demo room."""
+    from domain.game_state import GameState
+    from services.game_api_service import apply_demo_room
+
+    game = GameState(chat_id=-1001234567890, version=42)
+    apply_demo_room(game)
+    template = game.room_items[0]
+    extra = [{**template, "id": f"extra_item_{i}", "label": f"{template.get('label', '')} {i}"} for i in range(extra_items)]
+    game.set_room(game.room_items + extra, game.room_puzzles)
+    puzzle_ids = list(game.room_puzzles)
+    for item_id in puzzle_ids[: len(puzzle_ids) // 2]:
+        game.mark_solved(item_id)
+    game.started_at = "2026-01-01T12:00:00+00:00"
+    return game.to_document(include_players=False)
+
+
+def _median_us(fn: Any, arg: Any, iterations: int) -> float:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(arg)
+        samples.append(time.perf_counter() - start)
+    return round(statistics.median(samples) * 1e6, 2)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--items", type=int, default=0, help="extra room items (bigger rooms)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _prepare_environment("fake", Path(tmp))
+        from config import config
+        from infrastructure.redis.game_codec import FORMAT_MSGPACK_ZSTD, decode_game, encode_game
+
+        game = _build_game(args.items)
+        selected_threshold = config.GAME_CODEC_COMPRESS_MIN_BYTES
+        selected = "json" if config.GAME_CODEC == "json" else (
+            "msgpack+zstd" if encode_game(game)[0] == FORMAT_MSGPACK_ZSTD else "msgpack"
+        )
+        variants = {
+            "json": ("json", selected_threshold),
+            "msgpack": ("msgpack", 1 << 62),
+            "msgpack+zstd": ("msgpack", 0),
+        }
+        results: dict[str, dict[str, float]] = {}
+        for name, (codec, threshold) in variants.items():
+            config.GAME_CODEC, config.GAME_CODEC_COMPRESS_MIN_BYTES = codec, threshold
+            encoded = encode_game(game)
+            assert decode_game(encoded) == game, f"{name} does not round-trip"
+            results[name] = {
+                "bytes": len(encoded),
+                "encode_us": _median_us(encode_game, game, args.iterations),
+                "decode_us": _median_us(decode_game, encoded, args.iterations),
+            }
+        json_bytes = results["json"]["bytes"]
+        for row in results.values():
+            row["size_vs_json"] = round(row["bytes"] / json_bytes, 3)
+
+    print(json.dumps({"iterations": args.iterations, "selected": selected, "codecs": results}, indent=2))
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,111 @@
+# pyright: reportMissingImports=false
+"""Time-to-first-request for a fresh server process.
+
+Starts `uvicorn main:app` (same env as the load harness, SQLite database) and polls until the
+first successful response. It reports:
+- spawn -> first GET /health 200 (imports + startup hook)
+- the first GET / after that
+- the SIGTERM -> exit time
+Telegram is unreachable here, so it keeps retrying in the background, as on a cold Render
+start before the network settles. Fails when the median exceeds --max-ms.
+
+    uv run python -m benchmarks.cold_start
+    uv run python -m benchmarks.cold_start --runs 5 --role edge --max-ms 3000
+"""
+import argparse
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from benchmarks.load_harness import _free_port, _prepare_environment
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+_POLL_SECONDS = 0.005
+
+
+def _get(url: str) -> int | None:
+    try:
+        with urllib.request.urlopen(url, timeout=1) as resp:
+            return resp.status
+    except (urllib.error.URLError, ConnectionError, TimeoutError):
+        return None
+
+
+def measure_once(role: str, timeout: float) -> dict[str, float]:
+    port = _free_port()
+    env = {**os.environ, "PYTHONPATH": str(BACKEND_DIR), "PROCESS_ROLE": role, "LOG_LEVEL": "WARNING"}
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        base = f"http://127.0.0.1:{port}"
+        while _get(f"{base}/health") != 200:
+            if proc.poll() is not None:
+                raise RuntimeError(f"server exited with code {proc.returncode}")
+            if time.perf_counter() - started > timeout:
+                raise RuntimeError(f"no response within {timeout}s")
+            time.sleep(_POLL_SECONDS)
+        first_health = time.perf_counter() - started
+        root_started = time.perf_counter()
+        _get(f"{base}/")
+        first_root = time.perf_counter() - root_started
+        stop_started = time.perf_counter()
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=timeout)
+        shutdown = time.perf_counter() - stop_started
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+    return {
+        "time_to_first_request_ms": round(first_health * 1000, 1),
+        "first_root_request_ms": round(first_root * 1000, 1),
+        "shutdown_ms": round(shutdown * 1000, 1),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--role", choices=("all", "control", "edge"), default="all")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--max-ms", type=float, default=None, help="fail when median time-to-first-request exceeds this")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="escape-coldstart-") as tmp:
+        _prepare_environment("fake", Path(tmp))
+        os.environ["REDIS_URL"] = ""  # no Redis: single-process control path
+        runs = [measure_once(args.role, args.timeout) for _ in range(max(1, args.runs))]
+
+    summary = {
+        key: {
+            "median": round(statistics.median(r[key] for r in runs), 1),
+            "min": min(r[key] for r in runs),
+            "max": max(r[key] for r in runs),
+        }
+        for key in runs[0]
+    }
+    print(json.dumps({"role": args.role, "runs": len(runs), "summary": summary}, indent=2))
+    median = summary["time_to_first_request_ms"]["median"]
+    if args.max_ms is not None and median > args.max_ms:
+        print(f"FAIL: median time-to-first-request {median} ms > {args.max_ms} ms")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
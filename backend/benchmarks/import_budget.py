@@ -0,0 +1,118 @@
+# pyright: reportMissingImports=false
+"""Import-time budget for `import main`, measured from `python -X importtime` output.
+
+Each run imports main in a fresh interpreter (same env as the load harness). The check fails
+when the fastest run exceeds the budget, or when a module listed as lazy is imported eagerly.
+The second check is deterministic, so it catches an accidental top-level
+`import telegram` even on a noisy machine.
+
+    uv run python -m benchmarks.import_budget
+    uv run python -m benchmarks.import_budget --runs 5 --top 25
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+
+from benchmarks.load_harness import _prepare_environment
+
+BUDGET_PATH = Path(__file__).resolve().parent / "import_budget.json"
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+@dataclass
+class ImportRecord:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(stderr: str) -> list[ImportRecord]:
+    records: list[ImportRecord] = []
+    for line in stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            records.append(ImportRecord(module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return records
+
+
+def measure(target: str) -> list[ImportRecord]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "PYTHONPATH": str(BACKEND_DIR)},
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if proc.returncode != 0:
+        sys.exit(f"import {target} failed:\n{proc.stderr[-2000:]}")
+    return parse_importtime(proc.stderr)
+
+
+def top_packages(records: list[ImportRecord], top: int) -> dict[str, float]:
+    """Self time summed per top-level package, largest first (ms)."""
+    totals: dict[str, int] = {}
+    for r in records:
+        package = r.module.split(".", 1)[0]
+        totals[package] = totals.get(package, 0) + r.self_us
+    ranked = sorted(totals.items(), key=lambda kv: kv[1], reverse=True)[:top]
+    return {name: round(us / 1000, 1) for name, us in ranked}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=Path, default=BUDGET_PATH)
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters; the fastest run is gated")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args(argv)
+    budget = json.loads(args.budget.read_text(encoding="utf-8"))
+    target = budget.get("target", "main")
+
+    with tempfile.TemporaryDirectory(prefix="escape-import-") as tmp:
+        _prepare_environment("fake", Path(tmp))
+        runs = [measure(target) for _ in range(max(1, args.runs))]
+
+    def total_ms(records: list[ImportRecord]) -> float:
+        own = [r for r in records if r.module == target]
+        return own[-1].cumulative_us / 1000 if own else 0.0
+
+    best = min(runs, key=total_ms)
+    best_ms = round(total_ms(best), 1)
+    imported = {r.module for r in best}
+    eager = sorted(m for m in budget.get("lazy_modules", []) if m in imported)
+    print(
+        json.dumps(
+            {
+                "target": target,
+                "total_ms": best_ms,
+                "runs_ms": [round(total_ms(r), 1) for r in runs],
+                "budget_ms": budget["total_ms"],
+                "top_packages_self_ms": top_packages(best, args.top),
+                "eager_lazy_modules": eager,
+            },
+            indent=2,
+        )
+    )
+    failures = []
+    if best_ms > budget["total_ms"]:
+        failures.append(f"import {target} took {best_ms} ms > budget {budget['total_ms']} ms")
+    if eager:
+        failures.append(f"modules meant to load lazily were imported by {target}: {', '.join(eager)}")
+    if failures:
+        print("FAIL: " + "\n  ".join(failures))
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
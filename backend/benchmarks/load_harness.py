@@ -0,0 +1,373 @@
+# pyright: reportMissingImports=false
+"""Load harness for the realtime game path, driven through the real create_app().
+
+Simulates N groups x M players: lobby join, start, state polling, puzzle submissions,
+SSE subscriptions and time_up. Redis is fakeredis (default) or a spawned redis-server;
+the database is SQLite, so no docker is needed.
+
+Reports p50/p99 latency per endpoint, SSE fan-out latency, events/s and memory per SSE
+connection, and exits 1 when a metric regresses past the stored baseline.
+
+    uv run python -m benchmarks.load_harness --groups 10 --players 5
+    uv run python -m benchmarks.load_harness --update-baseline
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlencode
+
+BENCH_BOT_TOKEN = "123456:bench-token"
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+# Metrics compared against the baseline (lower is better for all of them).
+GATED_SUFFIXES = ("_p50_ms", "_p99_ms", "_phase_ms", "_bytes_per_conn")
+
+
+@dataclass
+class Results:
+    latencies_ms: dict[str, list[float]] = field(default_factory=dict)
+    errors: dict[str, int] = field(default_factory=dict)
+    fanout_ms: list[float] = field(default_factory=list)
+    sse_events: int = 0
+    sse_bytes_per_conn: float = 0.0
+    duration_s: float = 0.0
+    player_phase_s: float = 0.0
+
+    def record(self, endpoint: str, started: float, status: int, ok_statuses: tuple[int, ...]) -> None:
+        self.latencies_ms.setdefault(endpoint, []).append((time.perf_counter() - started) * 1000)
+        if status not in ok_statuses:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def sign_init_data(user_id: int, first_name: str, bot_token: str = BENCH_BOT_TOKEN) -> str:
+    """Build Telegram WebApp initData signed the way utils.telegram_webapp validates it."""
+    fields = {
+        "auth_date": str(int(time.time())),
+        "query_id": f"bench{user_id}",
+        "user": json.dumps({"id": user_id, "first_name": first_name}, separators=(",", ":")),
+    }
+    data_check_string = "\n".join(f"{k}={v}" for k, v in sorted(fields.items()))
+    secret_key = hmac.new(b"WebAppData", bot_token.encode(), hashlib.sha256).digest()
+    fields["hash"] = hmac.new(secret_key, data_check_string.encode(), hashlib.sha256).hexdigest()
+    return urlencode(fields)
+
+
+class SSEClient:
+    """Minimal ASGI client for one SSE stream (httpx's ASGI transport buffers whole bodies)."""
+
+    def __init__(self, app: Any, path: str, query: str) -> None:
+        self.events: asyncio.Queue[tuple[float, dict[str, Any]]] = asyncio.Queue()
+        self.connected = asyncio.Event()
+        self.status = 0
+        self.opened_at = time.perf_counter()
+        self.connected_at = 0.0
+        self._disconnect = asyncio.Event()
+        self._buffer = b""
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": [(b"host", b"bench"), (b"accept", b"text/event-stream")],
+            "client": ("127.0.0.1", 0),
+            "server": ("bench", 80),
+        }
+        self._task = asyncio.create_task(self._run(app, scope))
+
+    async def _run(self, app: Any, scope: dict[str, Any]) -> None:
+        async def receive() -> dict[str, Any]:
+            await self._disconnect.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                self.status = message["status"]
+                if self.status != 200:
+                    self.connected.set()
+                return
+            if message["type"] != "http.response.body":
+                return
+            self._buffer += message.get("body", b"")
+            while b"\n\n" in self._buffer:
+                frame, self._buffer = self._buffer.split(b"\n\n", 1)
+                if frame.startswith(b": connected"):
+                    self.connected_at = time.perf_counter()
+                    self.connected.set()
+                elif frame.startswith(b"data: "):
+                    self.events.put_nowait((time.perf_counter(), json.loads(frame[6:])))
+
+        try:
+            await app(scope, receive, send)
+        finally:
+            self.connected.set()
+
+    async def close(self) -> None:
+        self._disconnect.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=5)
+        except (asyncio.TimeoutError, Exception):
+            self._task.cancel()
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _prepare_environment(redis_mode: str, workdir: Path) -> subprocess.Popen | None:
+    """Set env before any app module is imported (config reads env at import time)."""
+    os.environ["TELEGRAM_TOKEN"] = BENCH_BOT_TOKEN
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir / 'bench.db'}"
+    os.environ["API_BASE_URL"] = "http://bench"
+    os.environ.setdefault("ENV", "benchmark")
+    proc = None
+    if redis_mode == "spawn":
+        server = shutil.which("redis-server")
+        if not server:
+            sys.exit("redis-server not found; use --redis fake")
+        port = _free_port()
+        proc = subprocess.Popen(
+            [server, "--port", str(port), "--save", "", "--appendonly", "no"],
+            stdout=subprocess.DEVNULL,
+        )
+        time.sleep(0.3)
+        os.environ["REDIS_URL"] = f"redis://127.0.0.1:{port}/0"
+    else:
+        os.environ["REDIS_URL"] = "redis://fakeredis.invalid:6379/0"
+    return proc
+
+
+def _install_fake_redis() -> None:
+    import fakeredis
+
+    from infrastructure.redis import redis_client
+
+    redis_client._redis_client = fakeredis.FakeRedis(decode_responses=True)
+
+
+async def _player_flow(
+    client: Any,
+    results: Results,
+    game_id: str,
+    init_data: str,
+    polls: int,
+    answers: list[tuple[str, str]],
+    is_host: bool,
+) -> None:
+    headers = {"X-Telegram-Init-Data": init_data}
+    base = f"/api/games/{game_id}"
+
+    t = time.perf_counter()
+    r = await client.post(f"{base}/start", headers=headers)
+    results.record("post_start", t, r.status_code, (200,))
+    for _ in range(polls):
+        t = time.perf_counter()
+        r = await client.get(base, headers=headers)
+        results.record("get_game", t, r.status_code, (200,))
+    if is_host:
+        for item_id, answer in answers:
+            t = time.perf_counter()
+            r = await client.post(f"{base}/action", headers=headers, json={"item_id": item_id, "answer": answer})
+            results.record("post_action", t, r.status_code, (200, 400))
+
+
+async def _run_load(groups: int, players: int, polls: int) -> Results:
+    import httpx
+
+    from api.app_factory import create_app
+    from infrastructure.assets.asset_index import build_asset_index
+    from infrastructure.database.migrate import run_migrations
+    from services.game_session import add_player, finish_registration, start_registration
+    from services.sse_registry import broadcast_door_opened
+
+    run_migrations()
+    build_asset_index()  # bootstrap does this in the background; the harness does not run it
+    app = create_app()
+    app.state.bot = None
+    results = Results()
+    # Wrong answer first, then the dependency-ordered correct answers (clock before board).
+    answers = [("safe_1", "nope"), ("safe_1", "key"), ("clock_1", "720"), ("board_servers", "3")]
+
+    games: list[tuple[str, list[str]]] = []
+    for g in range(groups):
+        chat_id = -1000 - g
+        chat_data: dict[str, Any] = {}
+        t = time.perf_counter()
+        start_registration(chat_data)
+        for p in range(players):
+            add_player(chat_data, g * 1000 + p + 1, f"player{p}")
+        game_id = finish_registration(chat_id, chat_data)
+        results.record("lobby_join", t, 200, (200,))
+        games.append((game_id, [sign_init_data(g * 1000 + p + 1, f"player{p}") for p in range(players)]))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm-up connection so first-request imports are not charged to the measured ones.
+        warmup = SSEClient(app, f"/sse/games/{games[0][0]}", urlencode({"init_data": games[0][1][0]}))
+        await warmup.connected.wait()
+        await warmup.close()
+
+        tracemalloc.start()
+        mem_before = tracemalloc.get_traced_memory()[0]
+        sse_clients: list[tuple[str, SSEClient]] = []
+        for game_id, inits in games:
+            for init_data in inits:
+                sse = SSEClient(app, f"/sse/games/{game_id}", urlencode({"init_data": init_data}))
+                sse_clients.append((game_id, sse))
+        await asyncio.gather(*(s.connected.wait() for _, s in sse_clients))
+        mem_after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        results.latencies_ms["sse_connect"] = [(s.connected_at - s.opened_at) * 1000 for _, s in sse_clients if s.connected_at]
+        results.sse_bytes_per_conn = (mem_after - mem_before) / max(1, len(sse_clients))
+        failed = sum(1 for _, s in sse_clients if s.status != 200)
+        if failed:
+            results.errors["sse_connect"] = failed
+
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(
+                _player_flow(client, results, game_id, init_data, polls, answers, is_host=(i == 0))
+                for game_id, inits in games
+                for i, init_data in enumerate(inits)
+            )
+        )
+        # Wall time of the concurrent phase: per-request latencies include time spent waiting on
+        # other flows whenever handlers await, so this is the throughput view of the same work.
+        results.player_phase_s = time.perf_counter() - started
+        # Fan-out probe: one solve per game, measure send -> receipt on every subscriber.
+        for game_id, _ in games:
+            subs = [s for gid, s in sse_clients if gid == game_id]
+            for s in subs:
+                while not s.events.empty():
+                    s.events.get_nowait()
+                    results.sse_events += 1
+            t0 = time.perf_counter()
+            await broadcast_door_opened(game_id)
+            for s in subs:
+                try:
+                    received_at, _ = await asyncio.wait_for(s.events.get(), timeout=5)
+                    results.fanout_ms.append((received_at - t0) * 1000)
+                    results.sse_events += 1
+                except asyncio.TimeoutError:
+                    results.errors["sse_fanout"] = results.errors.get("sse_fanout", 0) + 1
+        for game_id, inits in games:
+            for init_data in inits:
+                t = time.perf_counter()
+                r = await client.post(f"/api/games/{game_id}/time_up", headers={"X-Telegram-Init-Data": init_data})
+                results.record("post_time_up", t, r.status_code, (200, 404))
+        results.duration_s = time.perf_counter() - started
+        for _, s in sse_clients:
+            while not s.events.empty():
+                s.events.get_nowait()
+                results.sse_events += 1
+        await asyncio.gather(*(s.close() for _, s in sse_clients))
+    return results
+
+
+def summarize(results: Results) -> dict[str, float]:
+    summary: dict[str, float] = {}
+    for key, values in sorted(results.latencies_ms.items()):
+        summary[f"{key}_p50_ms"] = round(_percentile(values, 50), 3)
+        summary[f"{key}_p99_ms"] = round(_percentile(values, 99), 3)
+    summary["sse_fanout_p50_ms"] = round(_percentile(results.fanout_ms, 50), 3)
+    summary["sse_fanout_p99_ms"] = round(_percentile(results.fanout_ms, 99), 3)
+    summary["player_phase_ms"] = round(results.player_phase_s * 1000, 3)
+    summary["sse_events_per_s"] = round(results.sse_events / results.duration_s, 1) if results.duration_s else 0.0
+    summary["sse_bytes_per_conn"] = round(results.sse_bytes_per_conn, 1)
+    return summary
+
+
+def compare_to_baseline(
+    summary: dict[str, float],
+    baseline: dict[str, float],
+    tolerance: float,
+    min_delta_ms: float,
+) -> list[str]:
+    """Return regressions: gated metrics worse than baseline * (1 + tolerance).
+    Latencies must also be min_delta_ms slower, so sub-millisecond jitter does not fail the run."""
+    regressions: list[str] = []
+    for key, base in baseline.items():
+        if not key.endswith(GATED_SUFFIXES) or key not in summary or base <= 0:
+            continue
+        if key.endswith("_ms") and summary[key] - base < min_delta_ms:
+            continue
+        if summary[key] > base * (1 + tolerance):
+            regressions.append(f"{key}: {summary[key]} > baseline {base} (+{tolerance:.0%})")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--groups", type=int, default=10)
+    parser.add_argument("--players", type=int, default=5)
+    parser.add_argument("--polls", type=int, default=5, help="GET /games/{id} per player")
+    parser.add_argument("--redis", choices=("fake", "spawn"), default="fake")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed relative regression (0.5 = +50%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="ignore latency regressions smaller than this")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="escape-bench-") as tmp:
+        proc = _prepare_environment(args.redis, Path(tmp))
+        try:
+            if args.redis == "fake":
+                _install_fake_redis()
+            results = asyncio.run(_run_load(args.groups, args.players, args.polls))
+        finally:
+            if proc is not None:
+                proc.terminate()
+                proc.wait(timeout=5)
+
+    summary = summarize(results)
+    print(json.dumps({"summary": summary, "errors": results.errors}, indent=2, ensure_ascii=False))
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(summary, indent=2) + "\n", encoding="utf-8")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if results.errors:
+        print(f"FAIL: request errors {results.errors}")
+        return 1
+    if args.baseline.exists():
+        regressions = compare_to_baseline(
+            summary,
+            json.loads(args.baseline.read_text(encoding="utf-8")),
+            args.tolerance,
+            args.min_delta_ms,
+        )
+        if regressions:
+            print("FAIL: regressions past baseline:\n  " + "\n  ".join(regressions))
+            return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+# pyright: reportMissingImports=false
+"""Regression check: puzzle progress made during a Redis outage survives the reconnect.
+
+Outage (breaker opened) -> a puzzle is solved and saved (journaled) -> Redis comes back -> a request
+reads and saves the game in the window between the breaker closing and the journal replay -> the
+game read back from Redis still has the puzzle solved. Uses fakeredis; exits 1 on a lost write.
+
+    uv run python -m benchmarks.outage_replay_check
+"""
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.load_harness import _prepare_environment
+
+GAME_ID = "outage-check"
+
+
+def main() -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        _prepare_environment("fake", Path(tmp))
+        os.environ["GAME_JOURNAL_DIR"] = str(Path(tmp) / "journal")
+        os.environ["REDIS_RETRY_MIN_SECONDS"] = "0.05"
+        import fakeredis
+
+        from domain.game_state import GameState
+        from infrastructure.redis import redis_client
+        from infrastructure.redis.game_journal import journal_pending, replay_game_journal
+        from services.game_api_service import apply_demo_room
+        from services.game_session import _games_by_id, get_game_by_id, save_game
+
+        server = fakeredis.FakeRedis(decode_responses=True)
+        redis_client._redis_client, redis_client._was_reachable = server, True
+        game = GameState(chat_id=-1001234567890)
+        apply_demo_room(game)
+        save_game(GAME_ID, game)
+        puzzle_id = next(iter(game.room_puzzles))
+
+        def down() -> None:
+            raise ConnectionError("redis down (outage_replay_check)")
+
+        redis_client._connect = down
+        redis_client._clear_redis_on_error()
+        game = get_game_by_id(GAME_ID)
+        game.mark_solved(puzzle_id)
+        save_game(GAME_ID, game)  # Redis down: journaled
+
+        seen: dict[str, bool] = {}
+
+        def read_before_replay() -> None:
+            """A request landing after the breaker closed, before the journal is replayed."""
+            during = get_game_by_id(GAME_ID)
+            seen["during_replay"] = during is not None and during.is_solved(puzzle_id)
+            if during is not None:
+                save_game(GAME_ID, during)
+
+        redis_client.add_reconnect_listener(read_before_replay)
+        redis_client.add_reconnect_listener(replay_game_journal)
+        redis_client._connect = lambda: server
+        deadline = time.monotonic() + 10
+        while (journal_pending(GAME_ID) or "during_replay" not in seen) and time.monotonic() < deadline:
+            time.sleep(0.02)
+
+        _games_by_id.pop(GAME_ID)
+        after = get_game_by_id(GAME_ID)
+        seen["after_replay"] = after is not None and after.is_solved(puzzle_id)
+        redis_client.redis_close()
+
+    print(json.dumps({"breaker": redis_client.redis_breaker_state(), "solved": seen}, indent=2))
+    if not all(seen.values()) or len(seen) != 2:
+        print("FAIL: puzzle progress lost across the Redis reconnect")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,30 +1,341 @@
 # pyright: reportMissingImports=false
-"""Startup: config, DB, telegram app, background tasks."""
+"""Startup and shutdown: config, DB, telegram app, background tasks.
+
+Process roles (PROCESS_ROLE, for running several uvicorn workers / containers):
+  all      - serve HTTP/SSE and compete for the control lease (default; single worker = old behaviour)
+  control  - same as all; use for a dedicated control deployment next to edge replicas
+  edge     - serve HTTP/SSE only; Telegram sends go through a bare Bot
+
+Exactly one process holds the Redis control lease and runs the Telegram runtime (polling or
+webhook ingress), the forwarded-updates consumer and the game expiry loop. Without Redis the
+process takes the control role directly.
+
+Startup is phased: bootstrap() returns as soon as the HTTP/SSE surface can serve. The database
+(wait + optional DB_AUTO_MIGRATE) and then Telegram come up in background tasks and report their
+state via utils.component_health (/health); the media index is built in a background task as well
+(media routes serve files unhashed until it is ready). The telegram stack and the ORM models are imported
+lazily, in worker threads, so they do not delay the first request.
+
+Shutdown: SIGTERM/SIGINT start the SSE drain right away (uvicorn waits for open streams before
+running shutdown hooks); shutdown() then flushes webhook updates, cancels loops, stops Telegram
+and closes Redis, the DB pool and the log listener."""
 import asyncio
+import importlib
 import logging
+import os
+import signal
+import uuid
+from typing import Any
 
 from fastapi import FastAPI
 
-from config import log_config_warnings
-from infrastructure.database.session import init_db, wait_for_db
-from bot.app import create_telegram_app, run_telegram
+from config import config, log_config_warnings
+from infrastructure.assets.asset_index import build_asset_index, refresh_asset_index
+from infrastructure.assets.asset_pipeline import build_asset_variants
+from infrastructure.database.session import dispose_engine, wait_for_db
+from infrastructure.redis.game_journal import journal_flush, replay_game_journal
+from infrastructure.redis.redis_client import (
+    add_reconnect_listener,
+    is_redis_available,
+    redis_acquire_lease,
+    redis_close,
+    redis_release_lease,
+    redis_renew_lease,
+)
+from bot.webhook_ingress import (
+    flush_webhook_ingress,
+    forwarded_updates_loop,
+    start_webhook_ingress,
+    stop_webhook_ingress,
+)
 from services.game_lifecycle_service import check_expired_games_loop
-from services.sse_registry import sse_pubsub_listener_loop
+from services.sse_registry import begin_drain, sse_pubsub_listener_loop, wait_for_drain
+from utils.component_health import DISABLED, FAILED, READY, STANDBY, STARTING, set_component_state
+from utils.logging_config import stop_logging
+from utils.loop_watchdog import start_loop_watchdog, stop_loop_watchdog
 
 logger = logging.getLogger(__name__)
 
+_CONTROL_LEASE_KEY = "lease:control"
+_owner_id = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+_control_tasks: list[asyncio.Task[None]] = []
+_background_tasks: list[asyncio.Task[None]] = []
+_edge_bot: Any = None
+_WEBHOOK_FLUSH_SECONDS = 5.0
+_RETRY_MAX_SECONDS = 30.0
+_db_ready = asyncio.Event()
 
-async def bootstrap(app: FastAPI) -> None:
-    log_config_warnings()
-    logger.info("Startup: waiting for database")
-    wait_for_db()
+
+def _process_role() -> str:
+    role = config.PROCESS_ROLE
+    return role if role in ("control", "edge") else "all"
+
+
+async def _import_off_loop(module: str) -> None:
+    """Import a heavy module in a worker thread so the loop keeps serving meanwhile."""
+    await asyncio.to_thread(importlib.import_module, module)
+
+
+def _get_edge_bot() -> Any:
+    global _edge_bot
+    if _edge_bot is None:
+        from bot.app import create_bot
+
+        _edge_bot = create_bot()
+    return _edge_bot
+
+
+async def _prepare_edge_bot(app: FastAPI) -> None:
+    """Bare Bot for sends until (or unless) this process runs the Telegram application."""
+    bot = await asyncio.to_thread(_get_edge_bot)
+    if app.state.bot is None:
+        app.state.bot = bot
+
+
+def _run_migrations() -> None:
+    from infrastructure.database.migrate import run_migrations
+
+    run_migrations()
+
+
+async def _build_asset_variants() -> None:
+    """Transcode media variants off the event loop, then re-index so they are served."""
+    try:
+        await asyncio.to_thread(build_asset_variants)
+        await asyncio.to_thread(build_asset_index)
+    except Exception as e:
+        logger.warning("Startup: asset variant build failed: %s", e)
+
+
+async def _asset_index_loop() -> None:
+    """Build the media index in a worker thread (the server does not wait for media to be hashed),
+    then re-check the files every ASSET_INDEX_CHECK_INTERVAL; requests use the current index."""
+    try:
+        await asyncio.to_thread(build_asset_index)
+    except Exception as e:
+        logger.warning("Startup: asset index build failed: %s", e)
+    while config.ASSET_INDEX_CHECK_INTERVAL > 0:
+        await asyncio.sleep(config.ASSET_INDEX_CHECK_INTERVAL)
+        try:
+            await asyncio.to_thread(refresh_asset_index)
+        except Exception as e:
+            logger.warning("Asset index refresh failed: %s", e)
+
+
+async def _init_database() -> None:
+    """Wait for the database off the event loop (retrying with backoff), then migrate if enabled."""
+    set_component_state("database", STARTING)
+    delay = 1.0
+    while True:
+        try:
+            await asyncio.to_thread(wait_for_db, 1)
+            break
+        except Exception as e:
+            set_component_state("database", FAILED, f"unreachable: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, _RETRY_MAX_SECONDS)
+    if config.DB_AUTO_MIGRATE:
+        try:
+            await asyncio.to_thread(_run_migrations)
+        except Exception as e:
+            logger.exception("Startup: database migration failed: %s", e)
+            set_component_state("database", FAILED, f"migration failed: {e}")
+            return
+    # Load SQLAlchemy models off the loop before the first repository call needs them.
+    await _import_off_loop("infrastructure.repositories.group_repository")
+    set_component_state("database", READY)
+    _db_ready.set()
     logger.info("Startup: database is ready")
-    init_db()
-    logger.info("Startup: database init completed")
+
+
+async def _start_control(app: FastAPI) -> None:
+    """Take over control duties: Telegram runtime, update consumer, expiry loop.
+    Called once the database is ready, since handlers and the expiry loop write to it."""
+    set_component_state("telegram", STARTING)
+    await _import_off_loop("bot.app")
+    from bot.app import create_telegram_app, run_telegram
+
     tg_app = create_telegram_app()
     app.state.tg_app = tg_app
-    asyncio.create_task(check_expired_games_loop())
-    asyncio.create_task(sse_pubsub_listener_loop())
+    start_webhook_ingress(tg_app)
+    _control_tasks.append(asyncio.create_task(forwarded_updates_loop()))
+    _control_tasks.append(asyncio.create_task(check_expired_games_loop(lambda: app.state.bot)))
     logger.info("Startup: starting telegram runtime")
     await run_telegram(tg_app)
-    logger.info("Startup: telegram runtime started")
+    app.state.bot = tg_app.bot
+    set_component_state("telegram", READY, f"control owner={_owner_id}")
+    logger.info("Startup: telegram runtime started (control owner=%s)", _owner_id)
+
+
+async def _cancel_tasks(tasks: list[asyncio.Task[None]]) -> None:
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    tasks.clear()
+
+
+async def _stop_control(app: FastAPI, *, handover: bool = True) -> None:
+    """Give up control duties. handover=False on shutdown: flush pending updates first and do
+    not fall back to the edge bot."""
+    if not handover:
+        await flush_webhook_ingress(_WEBHOOK_FLUSH_SECONDS)
+    await _cancel_tasks(_control_tasks)
+    stop_webhook_ingress()
+    tg_app = getattr(app.state, "tg_app", None)
+    app.state.tg_app = None
+    app.state.bot = (await asyncio.to_thread(_get_edge_bot)) if handover else None
+    if tg_app is not None:
+        from bot.app import stop_telegram
+
+        await stop_telegram(tg_app)
+
+
+async def _control_without_lease(app: FastAPI) -> None:
+    """No Redis: this process is the control process; retry Telegram startup with backoff.
+    Redis is re-probed meanwhile: once it is reachable, compete for the lease like the others."""
+    if config.WEB_CONCURRENCY > 1:
+        logger.warning("WEB_CONCURRENCY>1 without Redis: every worker runs Telegram and the expiry loop")
+    running = False
+    delay = 1.0
+    while not await asyncio.to_thread(is_redis_available):
+        if running:
+            await asyncio.sleep(config.CONTROL_LEASE_SECONDS / 3)
+            continue
+        try:
+            await _start_control(app)
+            running = True
+        except Exception as e:
+            logger.exception("Startup: telegram runtime failed, retrying in %ss: %s", delay, e)
+            await _stop_control(app)
+            set_component_state("telegram", FAILED, str(e))
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, _RETRY_MAX_SECONDS)
+    logger.info("Redis is reachable; competing for the control lease owner=%s", _owner_id)
+    await _control_lease_loop(app, running=running)
+
+
+async def _hold_control_lease(ttl_ms: int) -> None:
+    """Renew the held lease every CONTROL_LEASE_SECONDS/3; return once it is lost."""
+    while True:
+        await asyncio.sleep(config.CONTROL_LEASE_SECONDS / 3)
+        renewed = await asyncio.to_thread(redis_renew_lease, _CONTROL_LEASE_KEY, _owner_id, ttl_ms)
+        if renewed is not False:
+            continue  # renewed, or Redis is down and nobody else can take over
+        # Expired (e.g. Redis outage) or taken by another process: re-claim if still free.
+        if not await asyncio.to_thread(redis_acquire_lease, _CONTROL_LEASE_KEY, _owner_id, ttl_ms):
+            return
+
+
+async def _control_lease_loop(app: FastAPI, *, running: bool = False) -> None:
+    """Run control duties while holding the lease; otherwise keep trying to acquire it (failover).
+    The lease is renewed by its own task from the moment it is acquired, so a slow Telegram
+    startup cannot let it expire; losing it cancels the startup. running=True: control duties
+    already run without the lease (Redis was down) and are kept if the lease is acquired."""
+    ttl_ms = int(config.CONTROL_LEASE_SECONDS * 1000)
+    delay = 0.0
+    while True:
+        await asyncio.sleep(delay)
+        delay = config.CONTROL_LEASE_SECONDS / 3
+        if not await asyncio.to_thread(redis_acquire_lease, _CONTROL_LEASE_KEY, _owner_id, ttl_ms):
+            if running:
+                logger.warning("Control lease held by another process; stopping control duties owner=%s", _owner_id)
+                await _stop_control(app)
+                running = False
+            set_component_state("telegram", STANDBY, "control lease held by another process")
+            continue
+        logger.info("Control lease acquired owner=%s", _owner_id)
+        renewer = asyncio.create_task(_hold_control_lease(ttl_ms))
+        starting = None if running else asyncio.create_task(_start_control(app))
+        try:
+            if starting is not None:
+                await asyncio.wait((renewer, starting), return_when=asyncio.FIRST_COMPLETED)
+            if starting is None or (starting.done() and starting.exception() is None):
+                await renewer  # control duties run until the lease is lost
+        finally:
+            await _cancel_tasks([task for task in (renewer, starting) if task is not None])
+        running = False
+        if starting is not None and not starting.cancelled() and starting.exception() is not None:
+            e = starting.exception()
+            logger.error("Control startup failed, stepping down: %s", e, exc_info=e)
+            await _stop_control(app)
+            set_component_state("telegram", FAILED, str(e))
+            await asyncio.to_thread(redis_release_lease, _CONTROL_LEASE_KEY, _owner_id)
+            continue
+        logger.warning("Control lease lost; stopping control duties owner=%s", _owner_id)
+        await _stop_control(app)
+        set_component_state("telegram", STANDBY, "control lease held by another process")
+
+
+def _install_drain_on_signal() -> None:
+    """Chain onto the server's SIGTERM/SIGINT handlers: start the SSE drain as soon as the signal
+    arrives, then let the server begin its normal shutdown."""
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        previous = signal.getsignal(sig)
+
+        def _handler(signum: int, frame: Any, previous: Any = previous) -> None:
+            loop.call_soon_threadsafe(begin_drain)
+            if callable(previous):
+                previous(signum, frame)
+
+        try:
+            signal.signal(sig, _handler)
+        except ValueError:
+            return  # not the main thread (e.g. embedded server); shutdown() still drains
+
+
+async def bootstrap(app: FastAPI) -> None:
+    log_config_warnings()
+    start_loop_watchdog()
+    _install_drain_on_signal()
+    _background_tasks.append(asyncio.create_task(_asset_index_loop()))
+    if config.ASSET_BUILD_ON_STARTUP:
+        _background_tasks.append(asyncio.create_task(_build_asset_variants()))
+    role = _process_role()
+    logger.info("Startup: role=%s pid=%s", role, os.getpid())
+    app.state.tg_app = None
+    # Sends (time-up notice) work while Telegram starts; control swaps in the Application bot.
+    app.state.bot = None
+    _background_tasks.append(asyncio.create_task(_prepare_edge_bot(app)))
+    _background_tasks.append(asyncio.create_task(sse_pubsub_listener_loop()))
+    # Game writes journaled during a Redis outage: replay on every reconnect, and now for
+    # journals left by processes that died before Redis came back.
+    add_reconnect_listener(replay_game_journal)
+    _background_tasks.append(asyncio.create_task(asyncio.to_thread(replay_game_journal)))
+    _background_tasks.append(asyncio.create_task(_init_database()))
+    if role == "edge":
+        set_component_state("telegram", DISABLED, "PROCESS_ROLE=edge")
+    else:
+        _background_tasks.append(asyncio.create_task(_start_control_duties(app)))
+    logger.info("Startup: serving; database and telegram start in the background")
+
+
+async def _start_control_duties(app: FastAPI) -> None:
+    # Wait before competing for the lease, so it is never held (unrenewed) while the DB is down.
+    set_component_state("telegram", STARTING, "waiting for database")
+    await _db_ready.wait()
+    if await asyncio.to_thread(is_redis_available):
+        await _control_lease_loop(app)
+    else:
+        await _control_without_lease(app)
+
+
+async def shutdown(app: FastAPI) -> None:
+    """Drain SSE, stop background work and control duties, then close pools and logging."""
+    logger.info("Shutdown: draining SSE streams")
+    begin_drain()
+    if not await wait_for_drain(config.SHUTDOWN_DRAIN_SECONDS):
+        logger.warning("Shutdown: SSE streams still open after %ss", config.SHUTDOWN_DRAIN_SECONDS)
+    await _cancel_tasks(_background_tasks)
+    await _stop_control(app, handover=False)
+    await asyncio.to_thread(redis_release_lease, _CONTROL_LEASE_KEY, _owner_id)
+    if _edge_bot is not None:
+        from bot.app import close_bot
+
+        await close_bot(_edge_bot)
+    await asyncio.to_thread(journal_flush)  # queued outage writes reach the disk
+    redis_close()
+    dispose_engine()
+    stop_loop_watchdog()
+    logger.info("Shutdown: complete")
+    stop_logging()
@@ -2,13 +2,19 @@
 """Build Telegram Application and run webhook or polling."""
 import logging
 import os
+import time
+from typing import Any
 
+from telegram import Bot
 from telegram.error import NetworkError
 from telegram.ext import ApplicationBuilder, ContextTypes
+from telegram.request import HTTPXRequest
 
 from config import config
 from bot.handlers.start_game import register_start_game_handler
 from bot.handlers.game import register_game_handlers
+from utils.metrics import BOT_API_ERRORS, BOT_API_SECONDS
+from utils.tracing import SPAN_KIND_CLIENT, start_span
 
 logger = logging.getLogger(__name__)
 
@@ -20,14 +26,56 @@ async def _telegram_error_handler(update: object, context: ContextTypes.DEFAULT_
     logger.exception("Telegram handler error. update=%s error=%s", update, context.error)
 
 
+class InstrumentedHTTPXRequest(HTTPXRequest):
+    """HTTPXRequest that records Bot API latency per method (last URL segment, e.g. sendMessage)
+    and wraps each call in a client span."""
+
+    async def do_request(self, url: str, method: str, *args: Any, **kwargs: Any) -> tuple[int, bytes]:
+        api_method = url.rsplit("/", 1)[-1]
+        started = time.perf_counter()
+        try:
+            with start_span(f"telegram.{api_method}", kind=SPAN_KIND_CLIENT, **{"rpc.method": api_method}):
+                return await super().do_request(url, method, *args, **kwargs)
+        except Exception:
+            BOT_API_ERRORS.labels(api_method).inc()
+            raise
+        finally:
+            BOT_API_SECONDS.labels(api_method).observe(time.perf_counter() - started)
+
+
+# Same pool size ApplicationBuilder uses for its default request object.
+_CONNECTION_POOL_SIZE = 256
+
+
 def create_telegram_app():
-    application = ApplicationBuilder().token(config.TELEGRAM_TOKEN).build()
+    application = (
+        ApplicationBuilder()
+        .token(config.TELEGRAM_TOKEN)
+        .request(InstrumentedHTTPXRequest(connection_pool_size=_CONNECTION_POOL_SIZE))
+        .build()
+    )
     application.add_error_handler(_telegram_error_handler)
     register_start_game_handler(application)
     register_game_handlers(application)
     return application
 
 
+def create_bot() -> Bot:
+    """Bare Bot for edge processes: sends messages (e.g. time-up notice) without running
+    handlers, polling or the webhook."""
+    request = InstrumentedHTTPXRequest(connection_pool_size=_CONNECTION_POOL_SIZE)
+    # Never polls, so getUpdates shares the one client; close_bot() then releases everything.
+    return Bot(config.TELEGRAM_TOKEN, request=request, get_updates_request=request)
+
+
+async def close_bot(bot: Bot) -> None:
+    """Close the HTTP client of a bot made by create_bot()."""
+    try:
+        await bot.request.shutdown()
+    except Exception as e:
+        logger.warning("Bot client close failed: %s", e)
+
+
 async def run_telegram(application) -> None:
     await application.initialize()
     await application.start()
@@ -38,7 +86,10 @@ async def run_telegram(application) -> None:
     if os.getenv("RENDER") and config.API_BASE_URL:
         base = config.API_BASE_URL.rstrip("/")
         webhook_url = f"{base}/webhook"
-        await application.bot.set_webhook(url=webhook_url)
+        await application.bot.set_webhook(
+            url=webhook_url,
+            secret_token=config.TELEGRAM_WEBHOOK_SECRET or None,
+        )
         logger.info("Telegram mode=webhook webhook_url=%s", webhook_url)
     else:
         if application.updater is None:
@@ -51,3 +102,16 @@ async def run_telegram(application) -> None:
             raise RuntimeError(
                 "Polling failed (cannot reach Telegram). Configure webhook on hosted environments."
             ) from e
+
+
+async def stop_telegram(application) -> None:
+    """Stop polling (if running) and the application; used when this process gives up the control role."""
+    try:
+        if application.updater is not None and application.updater.running:
+            await application.updater.stop()
+        if application.running:
+            await application.stop()
+        await application.shutdown()
+        logger.info("Telegram runtime stopped")
+    except Exception as e:
+        logger.warning("Telegram runtime stop failed: %s", e)
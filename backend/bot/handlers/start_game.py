@@ -147,7 +147,7 @@ async def lobby_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         game_id = finish_registration(chat_id, chat_data)
         game = get_game_by_id(game_id)
         if game:
-            game["started_at"] = datetime.now(timezone.utc).isoformat()
+            game.started_at = datetime.now(timezone.utc).isoformat()
             save_game(game_id, game)
         game_url = game_entry_url(game_id)
         if "lobby_msg_id" not in chat_data:
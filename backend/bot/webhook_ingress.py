@@ -0,0 +1,175 @@
+# pyright: reportMissingImports=false
+"""Telegram webhook ingress: verify secret token, buffer raw bodies, decode and dispatch in a worker pool.
+
+The /webhook endpoint only checks the secret header, drops redeliveries by update_id and
+enqueues the raw bytes, so Telegram gets its 200 before any JSON parsing happens."""
+import asyncio
+import hmac
+import json
+import logging
+import re
+from collections import deque
+from typing import Any
+
+from config import config
+from infrastructure.redis.redis_client import is_redis_available, redis_pop_forwarded_updates
+from utils.metrics import Gauge
+
+logger = logging.getLogger(__name__)
+
+SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+# Telegram puts update_id first in the payload; scanning a short prefix avoids a full decode.
+_UPDATE_ID_RE = re.compile(rb'"update_id"\s*:\s*(\d+)')
+_UPDATE_ID_SCAN_BYTES = 256
+
+
+class UpdateDeduplicator:
+    """Bounded window of recently seen update_ids (FIFO eviction)."""
+
+    def __init__(self, window: int) -> None:
+        self._window = max(1, window)
+        self._order: deque[int] = deque()
+        self._seen: set[int] = set()
+
+    def check_and_add(self, update_id: int) -> bool:
+        """Return True if update_id was already seen; otherwise remember it and return False."""
+        if update_id in self._seen:
+            return True
+        self._seen.add(update_id)
+        self._order.append(update_id)
+        if len(self._order) > self._window:
+            self._seen.discard(self._order.popleft())
+        return False
+
+
+_ingress: asyncio.Queue[bytes] | None = None
+_dedup = UpdateDeduplicator(config.WEBHOOK_DEDUP_WINDOW)
+_workers: list[asyncio.Task[None]] = []
+
+Gauge(
+    "escape_webhook_ingress_queue_depth",
+    "Raw webhook bodies waiting for a decode worker.",
+    callback=lambda: _ingress.qsize() if _ingress is not None else 0,
+)
+
+
+def verify_secret_token(header_value: str | None) -> bool:
+    """True when no secret is configured or the header matches it (constant-time compare)."""
+    expected = config.TELEGRAM_WEBHOOK_SECRET
+    if not expected:
+        return True
+    return hmac.compare_digest((header_value or "").encode(), expected.encode())
+
+
+def _peek_update_id(raw: bytes) -> int | None:
+    match = _UPDATE_ID_RE.search(raw, 0, _UPDATE_ID_SCAN_BYTES)
+    return int(match.group(1)) if match else None
+
+
+def is_ingress_running() -> bool:
+    return _ingress is not None and bool(_workers)
+
+
+def enqueue_update(raw: bytes) -> bool:
+    """Buffer raw update body for the worker pool. Returns False only when the buffer is full.
+    Duplicate update_ids (Telegram redeliveries) are accepted and dropped."""
+    if _ingress is None:
+        return False
+    # Check for room before marking the id seen: a rejected update is redelivered by Telegram
+    # (or retried by the forwarder) and must not be dropped as a duplicate then.
+    if _ingress.full():
+        logger.warning("Webhook ingress buffer full (size=%s)", _ingress.maxsize)
+        return False
+    update_id = _peek_update_id(raw)
+    if update_id is not None and _dedup.check_and_add(update_id):
+        logger.debug("Webhook duplicate update_id=%s dropped", update_id)
+        return True
+    _ingress.put_nowait(raw)
+    return True
+
+
+def _drain_batch(queue: asyncio.Queue[bytes], first: bytes, limit: int) -> list[bytes]:
+    batch = [first]
+    while len(batch) < limit:
+        try:
+            batch.append(queue.get_nowait())
+        except asyncio.QueueEmpty:
+            break
+    return batch
+
+
+async def _ingress_worker(tg_app: Any, queue: asyncio.Queue[bytes]) -> None:
+    """Decode buffered bodies in batches and hand Update objects to the telegram application."""
+    from telegram import Update
+
+    while True:
+        first = await queue.get()
+        batch = _drain_batch(queue, first, config.WEBHOOK_BATCH_SIZE)
+        try:
+            for raw in batch:
+                try:
+                    data = json.loads(raw)
+                    if _peek_update_id(raw) is None:
+                        update_id = data.get("update_id")
+                        if isinstance(update_id, int) and _dedup.check_and_add(update_id):
+                            continue
+                    update = Update.de_json(data=data, bot=tg_app.bot)
+                    await tg_app.update_queue.put(update)
+                except Exception as e:
+                    logger.exception("Webhook update processing failed: %s", e)
+        finally:
+            for _ in batch:
+                queue.task_done()
+
+
+def start_webhook_ingress(tg_app: Any) -> list[asyncio.Task[None]]:
+    """Create the bounded ingress buffer and start the decode/dispatch worker pool."""
+    global _ingress
+    if _workers:
+        return list(_workers)
+    _ingress = asyncio.Queue(maxsize=config.WEBHOOK_INGRESS_MAXSIZE)
+    for _ in range(max(1, config.WEBHOOK_WORKERS)):
+        _workers.append(asyncio.create_task(_ingress_worker(tg_app, _ingress)))
+    logger.info(
+        "Webhook ingress started workers=%s maxsize=%s",
+        len(_workers),
+        config.WEBHOOK_INGRESS_MAXSIZE,
+    )
+    return list(_workers)
+
+
+async def flush_webhook_ingress(timeout: float) -> bool:
+    """Wait until buffered updates have been handed to the application. False on timeout."""
+    if _ingress is None or not _workers:
+        return True
+    try:
+        await asyncio.wait_for(_ingress.join(), timeout)
+        return True
+    except asyncio.TimeoutError:
+        logger.warning("Webhook ingress flush timed out pending=%s", _ingress.qsize())
+        return False
+
+
+def stop_webhook_ingress() -> None:
+    """Cancel the worker pool and drop the buffer (control role handed over)."""
+    global _ingress
+    for task in _workers:
+        task.cancel()
+    _workers.clear()
+    _ingress = None
+
+
+async def forwarded_updates_loop() -> None:
+    """Control process: feed updates that edge processes received on /webhook into the local ingress."""
+    while True:
+        raws = await asyncio.to_thread(redis_pop_forwarded_updates, 1, config.WEBHOOK_BATCH_SIZE)
+        if not raws:
+            if not is_redis_available():
+                await asyncio.sleep(1)
+            continue
+        for raw in raws:
+            while not enqueue_update(raw.encode("utf-8")):
+                if _ingress is None:
+                    return
+                await asyncio.sleep(0.05)  # buffer full: apply backpressure to the Redis list
@@ -4,7 +4,9 @@ from .settings import (
     log_config_warnings,
     IMAGES_DIR,
     ROOM_ASSETS_DIR,
+    AUDIO_DIR,
     LORE_WAV_PATH,
+    ASSET_VARIANTS_DIR,
 )
 
-__all__ = ["config", "log_config_warnings", "IMAGES_DIR", "ROOM_ASSETS_DIR", "LORE_WAV_PATH"]
+__all__ = ["config", "log_config_warnings", "IMAGES_DIR", "ROOM_ASSETS_DIR", "AUDIO_DIR", "LORE_WAV_PATH", "ASSET_VARIANTS_DIR"]
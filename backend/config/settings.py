@@ -1,6 +1,7 @@
 # pyright: reportMissingImports=false
 """Application configuration. Single source for env and derived values."""
 import os
+import tempfile
 from pathlib import Path
 import logging
 
@@ -31,6 +32,21 @@ class Config:
     TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
     TELEGRAM_BOT_USERNAME = _str_env("TELEGRAM_BOT_USERNAME", "").lstrip("@")
     TELEGRAM_MINI_APP_SHORT_NAME = _str_env("TELEGRAM_MINI_APP_SHORT_NAME", "").strip("/")
+    # Sent by Telegram in X-Telegram-Bot-Api-Secret-Token; empty disables the check.
+    TELEGRAM_WEBHOOK_SECRET = _str_env("TELEGRAM_WEBHOOK_SECRET")
+    WEBHOOK_INGRESS_MAXSIZE = int(os.getenv("WEBHOOK_INGRESS_MAXSIZE") or "1000")
+    WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS") or "4")
+    WEBHOOK_BATCH_SIZE = int(os.getenv("WEBHOOK_BATCH_SIZE") or "32")
+    WEBHOOK_DEDUP_WINDOW = int(os.getenv("WEBHOOK_DEDUP_WINDOW") or "10000")
+
+    # --- Admin / diagnostics ---
+    # X-Admin-Token for /admin/* (profiler); empty disables the admin endpoints.
+    ADMIN_TOKEN = (os.getenv("ADMIN_TOKEN") or "").strip()
+    PROFILER_SLOW_CALLBACK_MS: float = float(os.getenv("PROFILER_SLOW_CALLBACK_MS") or "20")
+    # Event-loop stall watchdog (utils/loop_watchdog.py)
+    LOOP_WATCHDOG_ENABLED: bool = (os.getenv("LOOP_WATCHDOG_ENABLED") or "1").lower() in ("1", "true", "yes")
+    LOOP_WATCHDOG_INTERVAL_MS: float = float(os.getenv("LOOP_WATCHDOG_INTERVAL_MS") or "50")
+    LOOP_STALL_THRESHOLD_MS: float = float(os.getenv("LOOP_STALL_THRESHOLD_MS") or "100")
 
     # --- URLs (API, web app / frontend) ---
     API_BASE_URL = _str_env("API_BASE_URL")
@@ -40,8 +56,41 @@ class Config:
     # --- App ---
     PORT = int(os.getenv("PORT", "8000"))
     MODE = os.getenv("ENV", "production")
+    # Create missing tables at startup (in the background). Production runs
+    # `python -m infrastructure.database.migrate` once per deploy instead.
+    DB_AUTO_MIGRATE: bool = (os.getenv("DB_AUTO_MIGRATE") or ("0" if MODE == "production" else "1")).lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+    # Multi-worker: uvicorn workers per container; every worker serves HTTP/SSE.
+    WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY") or "1")
+    # all = serve HTTP and compete for the control lease; control = same, dedicated deployment;
+    # edge = HTTP/SSE only (no Telegram runtime, no expiry loop).
+    PROCESS_ROLE = (os.getenv("PROCESS_ROLE") or "all").strip().lower()
+    # Redis lease held by the single process that runs Telegram polling/webhook and the expiry loop.
+    CONTROL_LEASE_SECONDS = float(os.getenv("CONTROL_LEASE_SECONDS") or "15")
+    # Shutdown: how long to wait for SSE streams to close after the drain signal, and the
+    # jittered reconnect delay sent to clients (SSE retry:), so they do not all reconnect at once.
+    SHUTDOWN_DRAIN_SECONDS = float(os.getenv("SHUTDOWN_DRAIN_SECONDS") or "5")
+    SSE_RECONNECT_MIN_MS = int(os.getenv("SSE_RECONNECT_MIN_MS") or "1000")
+    SSE_RECONNECT_MAX_MS = int(os.getenv("SSE_RECONNECT_MAX_MS") or "15000")
     PROJECT_NAME: str = "AI Escape Room"
 
+    # --- Logging ---
+    LOG_LEVEL: str = (os.getenv("LOG_LEVEL") or "INFO").upper()
+    # "text" (key=value fields) or "json" (one object per line)
+    LOG_FORMAT: str = (os.getenv("LOG_FORMAT") or "text").lower()
+    # Max messages per second per hot-path call site (SSE, realtime auth); 0 = no limit.
+    LOG_SAMPLE_RATE: float = float(os.getenv("LOG_SAMPLE_RATE") or "1")
+
+    # --- Tracing ---
+    # none | memory | otlp-file
+    TRACE_EXPORTER: str = (os.getenv("TRACE_EXPORTER") or "none").lower()
+    TRACE_FILE: str = os.getenv("TRACE_FILE") or "traces.otlp.jsonl"
+    TRACE_SAMPLE_RATIO: float = float(os.getenv("TRACE_SAMPLE_RATIO") or "1")
+    TRACE_MEMORY_MAX_SPANS: int = int(os.getenv("TRACE_MEMORY_MAX_SPANS") or "5000")
+
     # --- AI ---
     GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY", "")
     GEMINI_MODEL: str = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
@@ -60,6 +109,13 @@ class Config:
         or os.getenv("REDIS_INTERNAL_URL")
         or "redis://localhost:6379/0"
     )
+    # Socket timeouts bound how long one store call can block; keep REDIS_SOCKET_TIMEOUT above
+    # the 1s BRPOP used for forwarded webhook updates.
+    REDIS_CONNECT_TIMEOUT: float = float(os.getenv("REDIS_CONNECT_TIMEOUT") or "1")
+    REDIS_SOCKET_TIMEOUT: float = float(os.getenv("REDIS_SOCKET_TIMEOUT") or "3")
+    # Circuit breaker: background reconnect probe backoff (doubles from min to max).
+    REDIS_RETRY_MIN_SECONDS: float = float(os.getenv("REDIS_RETRY_MIN_SECONDS") or "1")
+    REDIS_RETRY_MAX_SECONDS: float = float(os.getenv("REDIS_RETRY_MAX_SECONDS") or "30")
 
     # --- Database ---
     _raw_db_url: str = os.getenv(
@@ -68,6 +124,20 @@ class Config:
     )
     DATABASE_URL: str = _ensure_db_ssl(_raw_db_url)
     GAME_SESSION_TTL: int = int(os.getenv("GAME_SESSION_TTL", "86400"))
+    # In-process game cache bound (LRU); entries also expire after GAME_SESSION_TTL.
+    GAME_CACHE_MAX_ENTRIES: int = int(os.getenv("GAME_CACHE_MAX_ENTRIES") or "5000")
+    # Local journal of game writes made while Redis is unreachable (replayed when it returns).
+    GAME_JOURNAL_DIR: str = os.getenv("GAME_JOURNAL_DIR") or os.path.join(tempfile.gettempdir(), "escape-room-journal")
+    # Redis game document encoding: msgpack (zstd above the threshold) or json (rollback). Reads accept both.
+    GAME_CODEC: str = (os.getenv("GAME_CODEC") or "msgpack").strip().lower()
+    GAME_CODEC_COMPRESS_MIN_BYTES: int = int(os.getenv("GAME_CODEC_COMPRESS_MIN_BYTES") or "2048")
+    GAME_CODEC_ZSTD_LEVEL: int = int(os.getenv("GAME_CODEC_ZSTD_LEVEL") or "3")
+
+    # --- Media ---
+    # Seconds between background re-checks of the media files (0 = index built at startup only).
+    ASSET_INDEX_CHECK_INTERVAL: float = float(os.getenv("ASSET_INDEX_CHECK_INTERVAL") or "5")
+    # Transcode missing/stale media variants in the background at startup (the Docker build already does it).
+    ASSET_BUILD_ON_STARTUP: bool = (os.getenv("ASSET_BUILD_ON_STARTUP") or "0").lower() in ("1", "true", "yes")
 
     @staticmethod
     def base_url() -> str:
@@ -101,6 +171,14 @@ def log_config_warnings() -> None:
             "Mini App deep-link config missing: set TELEGRAM_BOT_USERNAME and TELEGRAM_MINI_APP_SHORT_NAME. "
             "Fallback URL /game?game_id=... will be used."
         )
+    if Config.MODE == "production" and not os.getenv("GAME_JOURNAL_DIR"):
+        logger.warning(
+            "GAME_JOURNAL_DIR is not set: the Redis outage journal is kept in %s; mount a persistent "
+            "directory and set it, or writes journaled during an outage are lost with the container.",
+            Config.GAME_JOURNAL_DIR,
+        )
+    if Config.PROCESS_ROLE not in ("all", "control", "edge"):
+        logger.warning("PROCESS_ROLE=%r is not one of all/control/edge; treating as all", Config.PROCESS_ROLE)
 
 
 config = Config()
@@ -111,4 +189,6 @@ _REPO_ROOT = _BACKEND_DIR.parent
 IMAGES_DIR = _REPO_ROOT / "images"
 ROOM_ASSETS_DIR = _BACKEND_DIR / "room_assets"
 AUDIO_DIR = _BACKEND_DIR / "audio"
+# Transcoded WebP/AVIF/Opus/AAC variants (generated by infrastructure.assets.asset_pipeline, not committed)
+ASSET_VARIANTS_DIR = Path(os.getenv("ASSET_VARIANTS_DIR") or (_BACKEND_DIR / "asset_variants"))
 LORE_WAV_PATH = AUDIO_DIR / "lore.wav"
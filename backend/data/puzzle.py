@@ -1,5 +1,10 @@
 # pyright: reportMissingImports=false
-"""Puzzle game content: Caesar encoding, messages, and dependency rules (order of solving)."""
+"""Puzzle game content: Caesar encoding, answer matching, messages, and dependency rules (order of solving)."""
+import unicodedata
+from collections.abc import Callable
+from typing import Any, TypeVar
+
+from domain.puzzle_graph import PuzzleGraph, compile_puzzle_graph
 
 CAESAR_SHIFT = 3
 
@@ -33,9 +38,23 @@ def caesar_encode(password: str, shift: int = CAESAR_SHIFT) -> str:
     return "-".join(str(c) for c in codes)
 
 
+# Removed before comparing: Hebrew cantillation and niqqud (U+0591-U+05C7 marks), bidi controls
+# (LRM/RLM/ALM, embeddings, isolates) and zero-width characters pasted along with Hebrew text.
+# Final letters compare equal to their regular forms (ם/מ, ן/נ, ץ/צ, ף/פ, ך/כ).
+_ANSWER_TRANSLATION = {
+    **{cp: None for cp in range(0x0591, 0x05C8) if unicodedata.category(chr(cp)) == "Mn"},
+    **dict.fromkeys((0x061C, 0x200B, 0x200C, 0x200D, 0x200E, 0x200F, 0xFEFF)),
+    **dict.fromkeys(range(0x202A, 0x202F)),
+    **dict.fromkeys(range(0x2066, 0x206A)),
+    **{ord(final): regular for final, regular in zip("ךםןףץ", "כמנפצ")},
+}
+
+
 def normalize_answer(answer: str) -> str:
-    """Strip and lowercase for comparison (e.g. KEY/key/Key → key)."""
-    return (answer or "").strip().lower()
+    """Canonical form for comparison: NFKC, casefold, without niqqud/bidi marks, final letters as
+    regular ones, whitespace runs as one space (e.g. KEY/key/Key → key, "שָׁלוֹשׁ\u200f" → "שלוש")."""
+    text = unicodedata.normalize("NFKC", answer or "").casefold().translate(_ANSWER_TRANSLATION)
+    return " ".join(text.split())
 
 
 # --- Puzzle dependencies (order: which item_id requires others solved first) ---
@@ -49,6 +68,36 @@ DEPENDENCY_BLOCK_MESSAGES: dict[str, str] = {
 }
 
 
+# Rejects a cycle in the rules at import (startup), instead of a room nobody can finish.
+compile_puzzle_graph(
+    sorted({*PUZZLE_DEPENDENCIES, *(dep for deps in PUZZLE_DEPENDENCIES.values() for dep in deps)}),
+    PUZZLE_DEPENDENCIES,
+)
+
+# id(room_puzzles) -> (room_puzzles, compiled value). GameState shares one room_puzzles dict
+# between all games of a room, so each room is compiled once and the lookup is O(1).
+_room_graphs: dict[int, tuple[dict[str, Any], PuzzleGraph]] = {}
+_room_answers: dict[int, tuple[dict[str, Any], dict[str, frozenset[str]]]] = {}
+_ROOM_CACHE_MAX = 256
+
+T = TypeVar("T")
+
+
+def _compiled_per_room(
+    cache: dict[int, tuple[dict[str, Any], T]],
+    room_puzzles: dict[str, dict[str, Any]],
+    compile_room: Callable[[dict[str, dict[str, Any]]], T],
+) -> T:
+    entry = cache.get(id(room_puzzles))
+    if entry is not None and entry[0] is room_puzzles:
+        return entry[1]
+    value = compile_room(room_puzzles)
+    if len(cache) >= _ROOM_CACHE_MAX:
+        cache.clear()
+    cache[id(room_puzzles)] = (room_puzzles, value)
+    return value
+
+
 def get_puzzle_dependencies(room_id: str | None = None) -> dict[str, list[str]]:
     """Return dependencies for the given room. For now only demo room; room_id ignored."""
     return dict(PUZZLE_DEPENDENCIES)
@@ -56,8 +105,35 @@ def get_puzzle_dependencies(room_id: str | None = None) -> dict[str, list[str]]:
 
 def get_dependencies_for_item(item_id: str, room_id: str | None = None) -> list[str]:
     """Return item_ids that must be solved before item_id can be solved."""
-    deps = get_puzzle_dependencies(room_id)
-    return list(deps.get(item_id) or [])
+    return list(PUZZLE_DEPENDENCIES.get(item_id) or [])
+
+
+def _compile_graph(room_puzzles: dict[str, dict[str, Any]]) -> PuzzleGraph:
+    unlock_ids = [item_id for item_id, p in room_puzzles.items() if (p.get("type") or "").lower() == "unlock"]
+    return compile_puzzle_graph(tuple(room_puzzles), PUZZLE_DEPENDENCIES, unlock_ids)
+
+
+def get_puzzle_graph(room_puzzles: dict[str, dict[str, Any]]) -> PuzzleGraph:
+    """Compiled dependency graph for a room's puzzles (bits in room_puzzles order, as
+    GameState.solved). Shared read-only; compiled on first use per room."""
+    return _compiled_per_room(_room_graphs, room_puzzles, _compile_graph)
+
+
+def _compile_answers(room_puzzles: dict[str, dict[str, Any]]) -> dict[str, frozenset[str]]:
+    answers: dict[str, frozenset[str]] = {}
+    for item_id, p in room_puzzles.items():
+        accepted = [p.get("correct_answer")] + list(p.get("correct_answer_aliases") or [])
+        normalized = {normalize_answer(str(a)) for a in accepted if a is not None}
+        normalized.discard("")
+        if normalized:
+            answers[item_id] = frozenset(normalized)
+    return answers
+
+
+def get_accepted_answers(room_puzzles: dict[str, dict[str, Any]]) -> dict[str, frozenset[str]]:
+    """item_id -> normalized correct answer and aliases, for puzzles that take an answer.
+    Compiled once per room (shared read-only); a check is normalize_answer(answer) in the set."""
+    return _compiled_per_room(_room_answers, room_puzzles, _compile_answers)
 
 
 def get_block_message(item_id: str) -> str:
@@ -27,6 +27,12 @@ class PuzzleResponse(TypedDict):
     prompt_text: NotRequired[str]
 
 
+class MediaUrlsResponse(TypedDict):
+    room_image: str
+    door_video: str
+    science_lab_image: str
+
+
 class GameStateResponse(TypedDict):
     game_id: str
     players: dict[str, str]
@@ -42,6 +48,7 @@ class GameStateResponse(TypedDict):
     puzzles: NotRequired[list[PuzzleResponse]]
     solved_item_ids: NotRequired[list[str]]
     puzzle_dependencies: NotRequired[dict[str, list[str]]]
+    media_urls: NotRequired[MediaUrlsResponse]
     door_opened: NotRequired[bool]
     started_at: NotRequired[str]
     game_over: NotRequired[bool]
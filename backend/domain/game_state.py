@@ -0,0 +1,154 @@
+# pyright: reportMissingImports=false
+"""Typed state of one game session (per game_id, in Redis and in the in-process cache).
+
+Solved puzzles are a bitset over the room's puzzle order (the room_puzzles keys). The stored
+document keeps the dict shape written before this model ({"room_solved": {item_id: "solved"},
+"players": {...}, ...}); from_document()/to_document() convert at the Redis and journal
+boundary, and keys this model does not know are carried through unchanged.
+
+room_items and room_puzzles are the same for every game in a room, so equal copies are
+interned: games share one instance. Treat them as read-only; set_room() replaces them."""
+from dataclasses import dataclass, field
+from typing import Any
+
+from domain.game import PuzzleStatus
+
+_SOLVED = PuzzleStatus.SOLVED.value
+
+# Document keys read into fields by from_document (the rest go to GameState.extra).
+_FIELDS = (
+    "chat_id",
+    "game_active",
+    "version",
+    "started_at",
+    "door_opened",
+    "game_over",
+    "game_over_reason",
+    "room_image_url",
+    "room_image_width",
+    "room_image_height",
+    "room_name",
+    "room_description",
+    "room_lore",
+)
+_DOCUMENT_KEYS = frozenset(_FIELDS + ("players", "room_items", "room_puzzles", "room_solved"))
+
+# Puzzle order -> {item_id: bit}, shared by every game with the same room (i.e. all demo rooms).
+_puzzle_indexes: dict[tuple[str, ...], dict[str, int]] = {}
+# (kind, ids) -> room content shared by games whose copy is equal (see _intern).
+_shared_content: dict[tuple[str, tuple[Any, ...]], Any] = {}
+_SHARED_MAX = 256
+
+
+def _puzzle_index(order: tuple[str, ...]) -> dict[str, int]:
+    index = _puzzle_indexes.get(order)
+    if index is None:
+        if len(_puzzle_indexes) >= _SHARED_MAX:
+            _puzzle_indexes.clear()
+        index = _puzzle_indexes[order] = {item_id: bit for bit, item_id in enumerate(order)}
+    return index
+
+
+def _intern(kind: str, ids: tuple[Any, ...], value: Any) -> Any:
+    """The shared instance equal to value (value itself becomes it if there is none yet)."""
+    key = (kind, ids)
+    shared = _shared_content.get(key)
+    if shared is not None and shared == value:
+        return shared
+    if len(_shared_content) >= _SHARED_MAX:
+        _shared_content.clear()
+    _shared_content[key] = value
+    return value
+
+
+@dataclass(slots=True)
+class GameState:
+    chat_id: int | None = None
+    players: dict[str, str] = field(default_factory=dict)  # str(user_id) -> first name
+    game_active: bool = True
+    version: int = 0  # bumped by every save_game (journal replay keeps the newest)
+    started_at: str | None = None
+    door_opened: bool = False
+    game_over: bool | None = None
+    game_over_reason: str | None = None
+    room_image_url: str | None = None
+    room_image_width: int | None = None
+    room_image_height: int | None = None
+    room_name: str = ""
+    room_description: str = ""
+    room_lore: str = ""
+    room_items: list[dict[str, Any]] = field(default_factory=list)
+    room_puzzles: dict[str, dict[str, Any]] = field(default_factory=dict)
+    solved: int = 0  # bit i set = puzzle i of room_puzzles (insertion order) solved
+    extra: dict[str, Any] = field(default_factory=dict)
+    _index: dict[str, int] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def set_room(self, items: list[dict[str, Any]], puzzles: dict[str, dict[str, Any]]) -> None:
+        """Replace the room's items and puzzles; solved puzzles still in the room stay solved."""
+        solved_ids = self.solved_item_ids()
+        self.room_items = _intern("items", tuple(it.get("id") for it in items), items)
+        order = tuple(puzzles)
+        self.room_puzzles = _intern("puzzles", order, puzzles)
+        self._index = _puzzle_index(order)
+        self.solved = 0
+        for item_id in solved_ids:
+            self.mark_solved(item_id)
+
+    def is_solved(self, item_id: str) -> bool:
+        bit = self._index.get(item_id)
+        return bit is not None and bool(self.solved >> bit & 1)
+
+    def mark_solved(self, item_id: str) -> bool:
+        """Set the puzzle's bit. False if item_id is not a puzzle of this room."""
+        bit = self._index.get(item_id)
+        if bit is None:
+            return False
+        self.solved |= 1 << bit
+        return True
+
+    def solved_item_ids(self) -> list[str]:
+        """Solved puzzle ids in room order."""
+        solved = self.solved
+        return [item_id for item_id, bit in self._index.items() if solved >> bit & 1]
+
+    def has_player(self, user_id: int | str) -> bool:
+        return str(user_id) in self.players
+
+    @classmethod
+    def from_document(cls, data: dict[str, Any], roster: dict[str, str] | None = None) -> "GameState":
+        """Build from a stored document. roster (the Redis players hash) wins over players
+        stored inline, which documents written before the roster hash still carry."""
+        players = data.get("players")
+        if players:
+            players = {str(k): v for k, v in players.items()}
+            players.update(roster or {})
+        else:
+            players = roster or {}
+        game = cls(players=players, extra={k: v for k, v in data.items() if k not in _DOCUMENT_KEYS})
+        for name in _FIELDS:
+            value = data.get(name)
+            if value is not None:
+                setattr(game, name, value)
+        game.set_room(data.get("room_items") or [], data.get("room_puzzles") or {})
+        for item_id, status in (data.get("room_solved") or {}).items():
+            if status == _SOLVED:
+                game.mark_solved(item_id)
+        return game
+
+    def to_document(self, include_players: bool = True) -> dict[str, Any]:
+        """Plain dict for the codec/journal (room_solved as {item_id: "solved"}); unset fields
+        are left out, like the keys older code never wrote."""
+        doc: dict[str, Any] = dict(self.extra)
+        for name in _FIELDS:
+            value = getattr(self, name)
+            if value is not None:
+                doc[name] = value
+        if include_players:
+            doc["players"] = self.players
+        if self.room_items:
+            doc["room_items"] = self.room_items
+        if self.room_puzzles:
+            doc["room_puzzles"] = self.room_puzzles
+        if self.solved:
+            doc["room_solved"] = dict.fromkeys(self.solved_item_ids(), _SOLVED)
+        return doc
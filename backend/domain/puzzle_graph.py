@@ -0,0 +1,87 @@
+# pyright: reportMissingImports=false
+"""Compiled puzzle dependency graph of a room: dependencies as bitmasks over the room's puzzles.
+
+Bit i is the i-th puzzle of the room (room_puzzles order), the same layout as GameState.solved,
+so "can this puzzle be solved now" and "are all unlock puzzles solved" are single mask checks on
+a game's solved bitset. Compiling sorts the graph topologically and rejects cycles; a compiled
+graph is immutable and shared by every game in the room."""
+from collections import deque
+from collections.abc import Iterable, Mapping, Sequence
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class PuzzleGraph:
+    order: tuple[str, ...]  # bit i = order[i]
+    index: Mapping[str, int]
+    requires: tuple[int, ...]  # requires[i] = puzzles that must be solved before order[i]
+    unlock_mask: int
+    topo_order: tuple[str, ...]  # a solving order that respects every dependency
+    dependencies: dict[str, list[str]]  # GameStateResponse.puzzle_dependencies (do not mutate)
+
+    def can_solve(self, item_id: str, solved: int) -> bool:
+        """True when every dependency of item_id is in solved (unknown item_id: no dependencies)."""
+        bit = self.index.get(item_id)
+        if bit is None:
+            return True
+        required = self.requires[bit]
+        return solved & required == required
+
+    def all_unlocks_solved(self, solved: int) -> bool:
+        return solved & self.unlock_mask == self.unlock_mask
+
+
+def compile_puzzle_graph(
+    order: Sequence[str],
+    dependencies: Mapping[str, Sequence[str]],
+    unlock_ids: Iterable[str] = (),
+) -> PuzzleGraph:
+    """Compile dependency rules (item_id -> item_ids to solve first) for the puzzles in `order`.
+    Rules for puzzles not in the room are ignored; a dependency on a puzzle the room does not
+    have can never be met (the puzzle stays blocked). Raises ValueError on a cycle."""
+    order = tuple(order)
+    index = {item_id: bit for bit, item_id in enumerate(order)}
+    if len(index) != len(order):
+        raise ValueError("duplicate puzzle ids in room")
+    never = 1 << len(order)  # not a puzzle bit, so never in a solved set
+    requires = [0] * len(order)
+    dependents: list[list[int]] = [[] for _ in order]
+    pending = [0] * len(order)
+    kept: dict[str, list[str]] = {}
+    for item_id, deps in dependencies.items():
+        bit = index.get(item_id)
+        if bit is None:
+            continue
+        kept[item_id] = list(deps)
+        for dep in deps:
+            dep_bit = index.get(dep)
+            if dep_bit is None:
+                requires[bit] |= never
+            elif not requires[bit] >> dep_bit & 1:
+                requires[bit] |= 1 << dep_bit
+                dependents[dep_bit].append(bit)
+                pending[bit] += 1
+    ready = deque(bit for bit in range(len(order)) if not pending[bit])
+    topo: list[str] = []
+    while ready:
+        bit = ready.popleft()
+        topo.append(order[bit])
+        for dependent in dependents[bit]:
+            pending[dependent] -= 1
+            if not pending[dependent]:
+                ready.append(dependent)
+    if len(topo) < len(order):
+        cycle = [item_id for bit, item_id in enumerate(order) if pending[bit]]
+        raise ValueError(f"puzzle dependency cycle among: {', '.join(cycle)}")
+    unlock_mask = 0
+    for item_id in unlock_ids:
+        if item_id in index:
+            unlock_mask |= 1 << index[item_id]
+    return PuzzleGraph(
+        order=order,
+        index=index,
+        requires=tuple(requires),
+        unlock_mask=unlock_mask,
+        topo_order=tuple(topo),
+        dependencies=kept,
+    )
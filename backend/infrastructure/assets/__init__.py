@@ -0,0 +1 @@
+# Static media assets: resolved-path index with content hashes.
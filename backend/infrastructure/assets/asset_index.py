@@ -0,0 +1,262 @@
+# pyright: reportMissingImports=false
+"""Index of static media assets: logical name -> resolved file, size, content hash and ETag.
+
+Built by a background task after startup (the server does not wait for the media to be hashed),
+then re-checked every ASSET_INDEX_CHECK_INTERVAL (refresh_asset_index in a worker thread) and
+rebuilt when a watched directory or resolved file changes. Requests only read the current index:
+they never glob, stat or hash, get None until the first build is done, and keep getting the
+previous index while a rebuild runs. Scripts without the app call build_asset_index() first."""
+import hashlib
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+from config import ASSET_VARIANTS_DIR, AUDIO_DIR, IMAGES_DIR, LORE_WAV_PATH, ROOM_ASSETS_DIR
+
+logger = logging.getLogger(__name__)
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+VARIANTS_MANIFEST_NAME = "variants.json"
+
+
+@dataclass(frozen=True)
+class AssetRule:
+    """Where to look for one logical asset: exact names first, then newest glob match, per base dir."""
+
+    media_type: str
+    bases: tuple[Path, ...]
+    names: tuple[str, ...]
+    pattern: str | None = None
+
+
+# Logical asset name -> lookup rule (same fallbacks the media routes always had).
+ASSET_RULES: dict[str, AssetRule] = {
+    "escape_room.png": AssetRule(
+        media_type="image/png",
+        bases=(IMAGES_DIR,),
+        names=("escape_room.png",),
+        pattern="escape_room_*.png",
+    ),
+    "door_open.mp4": AssetRule(
+        media_type="video/mp4",
+        bases=(ROOM_ASSETS_DIR, IMAGES_DIR),
+        names=("door_open.mp4", "door-opening.mp4"),
+    ),
+    "science_lab_room.png": AssetRule(
+        media_type="image/png",
+        bases=(ROOM_ASSETS_DIR, IMAGES_DIR),
+        names=("science_lab_room.png", "science_lab.png"),
+        pattern="science_lab_room_*.png",
+    ),
+    "lore.wav": AssetRule(
+        media_type="audio/wav",
+        bases=(LORE_WAV_PATH.parent,),
+        names=(LORE_WAV_PATH.name,),
+    ),
+}
+
+_WATCHED_DIRS: tuple[Path, ...] = (IMAGES_DIR, ROOM_ASSETS_DIR, AUDIO_DIR, ASSET_VARIANTS_DIR)
+
+
+@dataclass(frozen=True)
+class AssetVariant:
+    """Transcoded delivery variant (see asset_pipeline) of one asset."""
+
+    path: Path
+    media_type: str
+    stat: os.stat_result
+    sha256: str
+    width: int | None = None
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.sha256[:32]}"'
+
+
+@dataclass(frozen=True)
+class Asset:
+    name: str
+    path: Path
+    media_type: str
+    stat: os.stat_result
+    sha256: str
+    variants: tuple[AssetVariant, ...] = ()
+
+    @property
+    def size(self) -> int:
+        return self.stat.st_size
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.sha256[:32]}"'
+
+    @property
+    def digest(self) -> str:
+        """Short content hash, used in content-addressed URLs."""
+        return self.sha256[:16]
+
+
+def resolve_asset_path(rule: AssetRule) -> Path | None:
+    for base in rule.bases:
+        for name in rule.names:
+            path = base / name
+            if path.is_file():
+                return path
+        if rule.pattern:
+            candidates = sorted(
+                base.glob(rule.pattern),
+                key=lambda p: p.stat().st_mtime,
+                reverse=True,
+            )
+            if candidates:
+                return candidates[0]
+    return None
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        while chunk := f.read(_HASH_CHUNK_SIZE):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _load_variants(manifest: dict, name: str, source_sha256: str) -> tuple[AssetVariant, ...]:
+    """Variants from the pipeline manifest, only when built from the current source content."""
+    entry = manifest.get(name) or {}
+    if entry.get("source_sha256") != source_sha256:
+        return ()
+    variants: list[AssetVariant] = []
+    for v in entry.get("variants") or []:
+        path = ASSET_VARIANTS_DIR / str(v.get("file") or "")
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        variants.append(
+            AssetVariant(
+                path=path,
+                media_type=str(v.get("media_type") or ""),
+                stat=st,
+                sha256=str(v.get("sha256") or source_sha256),
+                width=v.get("width"),
+            )
+        )
+    return tuple(variants)
+
+
+def _read_manifest() -> dict:
+    try:
+        return json.loads((ASSET_VARIANTS_DIR / VARIANTS_MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _dir_signature() -> tuple[tuple[str, int], ...]:
+    sig: list[tuple[str, int]] = []
+    for d in _WATCHED_DIRS:
+        try:
+            sig.append((str(d), d.stat().st_mtime_ns))
+        except OSError:
+            sig.append((str(d), -1))
+    return tuple(sig)
+
+
+class AssetIndex:
+    """Thread-safe asset index. Reads are a dict lookup; build() swaps in a new dict when done."""
+
+    def __init__(self) -> None:
+        self._assets: dict[str, Asset] = {}
+        self._signature: tuple[tuple[str, int], ...] | None = None
+        self._lock = threading.Lock()
+
+    def build(self) -> None:
+        """(Re)resolve every logical asset. Content is re-hashed only for files whose stat changed."""
+        with self._lock:
+            signature = _dir_signature()
+            manifest = _read_manifest()
+            assets: dict[str, Asset] = {}
+            for name, rule in ASSET_RULES.items():
+                path = resolve_asset_path(rule)
+                if path is None:
+                    logger.warning("Asset not found: %s", name)
+                    continue
+                st = path.stat()
+                prev = self._assets.get(name)
+                if (
+                    prev is not None
+                    and prev.path == path
+                    and prev.stat.st_mtime_ns == st.st_mtime_ns
+                    and prev.stat.st_size == st.st_size
+                ):
+                    sha = prev.sha256
+                else:
+                    sha = file_sha256(path)
+                assets[name] = Asset(
+                    name=name,
+                    path=path,
+                    media_type=rule.media_type,
+                    stat=st,
+                    sha256=sha,
+                    variants=_load_variants(manifest, name, sha),
+                )
+            self._assets = assets
+            self._signature = signature
+        logger.info("Asset index built: %s", ", ".join(f"{a.name}={a.digest}" for a in assets.values()))
+
+    def _changed(self) -> bool:
+        if self._signature != _dir_signature():
+            return True
+        for asset in self._assets.values():
+            try:
+                st = asset.path.stat()
+            except OSError:
+                return True
+            if st.st_mtime_ns != asset.stat.st_mtime_ns or st.st_size != asset.stat.st_size:
+                return True
+        return False
+
+    def refresh_if_changed(self) -> None:
+        """Rebuild when files changed since the last build. Blocking (stat/hash): not on the loop."""
+        if self._signature is None or self._changed():
+            self.build()
+
+    @property
+    def ready(self) -> bool:
+        return self._signature is not None
+
+    def get(self, name: str) -> Asset | None:
+        return self._assets.get(name)
+
+    def all(self) -> dict[str, Asset]:
+        return dict(self._assets)
+
+
+_index = AssetIndex()
+
+
+def build_asset_index() -> None:
+    """Build the index eagerly (startup). Safe to call from a worker thread."""
+    _index.build()
+
+
+def refresh_asset_index() -> None:
+    """Rebuild the index if media files changed. Blocking: run in a worker thread."""
+    _index.refresh_if_changed()
+
+
+def asset_index_ready() -> bool:
+    """True once the first build has finished."""
+    return _index.ready
+
+
+def get_asset(name: str) -> Asset | None:
+    """Resolved asset for a logical name, or None when the file is missing or not indexed yet."""
+    return _index.get(name)
+
+
+def get_all_assets() -> dict[str, Asset]:
+    return _index.all()
@@ -0,0 +1,154 @@
+# pyright: reportMissingImports=false
+"""Offline/startup transcoding of media sources into smaller delivery variants.
+
+Room images -> responsive WebP/AVIF (Pillow), lore audio -> Opus/AAC (ffmpeg when installed).
+Variants and a manifest are written to ASSET_VARIANTS_DIR; the asset index picks them up and
+the media routes choose one per request from the Accept header.
+
+Run once at build time:  python -m infrastructure.assets.asset_pipeline"""
+import json
+import logging
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Any
+
+from config import ASSET_VARIANTS_DIR
+from infrastructure.assets.asset_index import (
+    ASSET_RULES,
+    VARIANTS_MANIFEST_NAME,
+    file_sha256,
+    resolve_asset_path,
+)
+
+logger = logging.getLogger(__name__)
+
+IMAGE_ASSETS = ("escape_room.png", "science_lab_room.png")
+AUDIO_ASSETS = ("lore.wav",)
+
+# Responsive widths; the source width is always added so the full-size image has a variant too.
+IMAGE_WIDTHS = (640, 960)
+# (Pillow format, extension, media type, save options)
+IMAGE_FORMATS: tuple[tuple[str, str, str, dict[str, Any]], ...] = (
+    ("AVIF", "avif", "image/avif", {"quality": 55}),
+    ("WEBP", "webp", "image/webp", {"quality": 80, "method": 6}),
+)
+# (extension, media type, ffmpeg codec args)
+AUDIO_FORMATS: tuple[tuple[str, str, tuple[str, ...]], ...] = (
+    ("opus", "audio/ogg", ("-c:a", "libopus", "-b:a", "48k")),
+    ("m4a", "audio/mp4", ("-c:a", "aac", "-b:a", "64k", "-movflags", "+faststart")),
+)
+
+
+def _variant_entry(path: Path, media_type: str, width: int | None = None) -> dict[str, Any]:
+    entry: dict[str, Any] = {
+        "file": path.name,
+        "media_type": media_type,
+        "sha256": file_sha256(path),
+    }
+    if width is not None:
+        entry["width"] = width
+    return entry
+
+
+def _build_image_variants(name: str, source: Path, digest: str, out_dir: Path) -> list[dict[str, Any]]:
+    from PIL import Image, features
+
+    variants: list[dict[str, Any]] = []
+    stem = name.rsplit(".", 1)[0]
+    with Image.open(source) as img:
+        img.load()
+        widths = sorted({w for w in IMAGE_WIDTHS if w < img.width} | {img.width})
+        for fmt, ext, media_type, options in IMAGE_FORMATS:
+            if not features.check(fmt.lower()):
+                logger.warning("Pillow has no %s support; skipping %s variants", fmt, name)
+                continue
+            for width in widths:
+                height = round(img.height * width / img.width)
+                resized = img if width == img.width else img.resize((width, height), Image.Resampling.LANCZOS)
+                out = out_dir / f"{stem}.{digest}.w{width}.{ext}"
+                if not out.exists():
+                    tmp = out.with_name(f"{out.stem}.tmp.{ext}")
+                    try:
+                        resized.save(tmp, format=fmt, **options)
+                    except BaseException:
+                        tmp.unlink(missing_ok=True)
+                        raise
+                    tmp.replace(out)
+                variants.append(_variant_entry(out, media_type, width))
+    return variants
+
+
+def _build_audio_variants(name: str, source: Path, digest: str, out_dir: Path) -> list[dict[str, Any]]:
+    ffmpeg = shutil.which("ffmpeg")
+    if not ffmpeg:
+        logger.warning("ffmpeg not found; skipping audio variants for %s", name)
+        return []
+    variants: list[dict[str, Any]] = []
+    stem = name.rsplit(".", 1)[0]
+    for ext, media_type, codec_args in AUDIO_FORMATS:
+        out = out_dir / f"{stem}.{digest}.{ext}"
+        if not out.exists():
+            tmp = out.with_name(f"{out.stem}.tmp.{ext}")
+            cmd = [ffmpeg, "-y", "-loglevel", "error", "-i", str(source), "-vn", *codec_args, str(tmp)]
+            try:
+                subprocess.run(cmd, check=True, capture_output=True, timeout=120)
+            except (subprocess.SubprocessError, OSError) as e:
+                logger.warning("ffmpeg %s variant failed for %s: %s", ext, name, e)
+                tmp.unlink(missing_ok=True)
+                continue
+            tmp.replace(out)
+        variants.append(_variant_entry(out, media_type))
+    return variants
+
+
+def _read_previous_manifest(out_dir: Path) -> dict[str, Any]:
+    try:
+        return json.loads((out_dir / VARIANTS_MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def build_asset_variants(out_dir: Path = ASSET_VARIANTS_DIR) -> dict[str, Any]:
+    """Transcode every source whose variants are missing or stale, write the manifest, return it.
+    Variant file names embed the source digest, so unchanged sources are not re-encoded.
+    Files are written under a temporary name and renamed, so a crash never leaves a truncated
+    variant. An asset whose build fails keeps its previous manifest entry and files."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    previous = _read_previous_manifest(out_dir)
+    manifest: dict[str, Any] = {}
+    built: list[str] = []
+    for name in IMAGE_ASSETS + AUDIO_ASSETS:
+        source = resolve_asset_path(ASSET_RULES[name])
+        if source is None:
+            logger.warning("Asset source not found, no variants: %s", name)
+            continue
+        source_sha = file_sha256(source)
+        digest = source_sha[:16]
+        try:
+            if name in IMAGE_ASSETS:
+                variants = _build_image_variants(name, source, digest, out_dir)
+            else:
+                variants = _build_audio_variants(name, source, digest, out_dir)
+        except Exception as e:
+            logger.warning("Variant build failed for %s: %s", name, e)
+            if name in previous:
+                manifest[name] = previous[name]
+            continue
+        manifest[name] = {"source_sha256": source_sha, "variants": variants}
+        built.append(name.rsplit(".", 1)[0] + ".")
+        logger.info("Asset variants built: %s -> %d files", name, len(variants))
+    # Remove old variants (and leftover temp files) only of assets rebuilt just now.
+    referenced = {v["file"] for entry in manifest.values() for v in entry["variants"]}
+    for stale in out_dir.iterdir():
+        if stale.is_file() and stale.name not in referenced and stale.name.startswith(tuple(built)):
+            stale.unlink(missing_ok=True)
+    tmp_manifest = out_dir / f"{VARIANTS_MANIFEST_NAME}.tmp"
+    tmp_manifest.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    tmp_manifest.replace(out_dir / VARIANTS_MANIFEST_NAME)
+    return manifest
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    build_asset_variants()
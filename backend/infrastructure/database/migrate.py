@@ -0,0 +1,32 @@
+# pyright: reportMissingImports=false
+"""One-shot schema migration: python -m infrastructure.database.migrate
+
+Creates missing tables from the ORM models (CREATE TABLE IF NOT EXISTS semantics). Run once per
+deploy before starting the server; with DB_AUTO_MIGRATE the server runs it in the background."""
+import logging
+import sys
+
+from infrastructure.database.session import get_engine, wait_for_db
+from infrastructure.models.db_models import Base
+
+logger = logging.getLogger(__name__)
+
+
+def run_migrations() -> None:
+    Base.metadata.create_all(bind=get_engine())
+    logger.info("Database schema is up to date")
+
+
+def main() -> int:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    try:
+        wait_for_db()
+        run_migrations()
+    except Exception as e:
+        logger.error("Migration failed: %s", e)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,31 +1,55 @@
 # pyright: reportMissingImports=false
-"""SQLAlchemy engine and session factory. Use get_session() or dependency injection."""
+"""SQLAlchemy engine and session factory. Use get_session() or dependency injection.
+
+The engine (and SQLAlchemy itself) is created on first use via get_engine(), so importing
+this module at startup costs nothing until the database is actually needed."""
 import logging
+import threading
 import time
 from contextlib import contextmanager
-from typing import Generator
-
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import Session, sessionmaker
+from typing import TYPE_CHECKING, Any, Generator
 
 from config import config
-from infrastructure.models.db_models import Base
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+    from sqlalchemy.orm import Session
 
 logger = logging.getLogger(__name__)
 DATABASE_URL = config.DATABASE_URL
 
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=60,
-    echo=False,
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+_engine: "Engine | None" = None
+_session_factory: Any = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> "Engine":
+    """Create the engine and session factory on first call (thread-safe)."""
+    global _engine, _session_factory
+    if _engine is not None:
+        return _engine
+    with _engine_lock:
+        if _engine is None:
+            from sqlalchemy import create_engine
+            from sqlalchemy.orm import sessionmaker
+
+            engine = create_engine(
+                DATABASE_URL,
+                pool_pre_ping=True,
+                pool_recycle=60,
+                echo=False,
+            )
+            _session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+            _engine = engine
+    return _engine
 
 
 def wait_for_db(max_attempts: int = 30, interval: float = 2.0) -> None:
     if max_attempts < 1:
         return
+    from sqlalchemy import text
+
+    engine = get_engine()
     for attempt in range(1, max_attempts + 1):
         try:
             with engine.connect() as conn:
@@ -39,13 +63,16 @@ def wait_for_db(max_attempts: int = 30, interval: float = 2.0) -> None:
             time.sleep(interval)
 
 
-def init_db() -> None:
-    Base.metadata.create_all(bind=engine)
+def dispose_engine() -> None:
+    """Close pooled DB connections (shutdown). No-op if the engine was never created."""
+    if _engine is not None:
+        _engine.dispose()
 
 
 @contextmanager
-def get_session() -> Generator[Session, None, None]:
-    session = SessionLocal()
+def get_session() -> Generator["Session", None, None]:
+    get_engine()
+    session = _session_factory()
     try:
         yield session
         session.commit()
@@ -0,0 +1,76 @@
+# pyright: reportMissingImports=false
+"""Versioned encoding of game documents stored in Redis.
+
+The first byte says how the rest is encoded:
+  0x01  msgpack
+  0x02  msgpack, zstd-compressed (payloads of GAME_CODEC_COMPRESS_MIN_BYTES and up)
+  "{"   legacy JSON document (written before the codec, or with GAME_CODEC=json)
+Every format is always decoded, so old entries keep working during a rollout and
+GAME_CODEC=json is a safe rollback. zstandard is imported on the first compressed payload."""
+import json
+import threading
+from typing import Any
+
+import msgpack
+
+from config import config
+
+FORMAT_MSGPACK = 0x01
+FORMAT_MSGPACK_ZSTD = 0x02
+_JSON_START = ord("{")
+
+_local = threading.local()  # zstd (de)compressor contexts are not thread-safe
+
+
+def _compressor() -> Any:
+    compressor = getattr(_local, "compressor", None)
+    if compressor is None:
+        import zstandard
+
+        compressor = _local.compressor = zstandard.ZstdCompressor(level=config.GAME_CODEC_ZSTD_LEVEL)
+    return compressor
+
+
+def _decompress(payload: bytes) -> bytes:
+    import zstandard
+
+    decompressor = getattr(_local, "decompressor", None)
+    if decompressor is None:
+        decompressor = _local.decompressor = zstandard.ZstdDecompressor()
+    try:
+        return decompressor.decompress(payload)
+    except zstandard.ZstdError as e:
+        raise ValueError(f"corrupt compressed game payload: {e}") from e
+
+
+def encode_game(game: dict[str, Any]) -> bytes:
+    """Encode with the configured codec (GAME_CODEC: msgpack | json)."""
+    if config.GAME_CODEC == "json":
+        return json.dumps(game, ensure_ascii=False).encode("utf-8")
+    packed = msgpack.packb(game, use_bin_type=True)
+    if len(packed) >= config.GAME_CODEC_COMPRESS_MIN_BYTES:
+        return bytes((FORMAT_MSGPACK_ZSTD,)) + _compressor().compress(packed)
+    return bytes((FORMAT_MSGPACK,)) + packed
+
+
+def decode_game(raw: bytes | str) -> dict[str, Any]:
+    """Decode any format encode_game has ever written. ValueError for unknown or corrupt data."""
+    if isinstance(raw, str):
+        raw = raw.encode("utf-8")
+    if not raw:
+        raise ValueError("empty game payload")
+    tag = raw[0]
+    try:
+        if tag == _JSON_START:
+            data = json.loads(raw)
+        elif tag == FORMAT_MSGPACK:
+            data = msgpack.unpackb(raw[1:], raw=False, strict_map_key=False)
+        elif tag == FORMAT_MSGPACK_ZSTD:
+            data = msgpack.unpackb(_decompress(raw[1:]), raw=False, strict_map_key=False)
+        else:
+            raise ValueError(f"unknown game payload format 0x{tag:02x}")
+    except msgpack.UnpackException as e:
+        raise ValueError(f"corrupt game payload: {e}") from e
+    if not isinstance(data, dict):
+        raise ValueError("game payload is not a mapping")
+    return data
@@ -0,0 +1,236 @@
+# pyright: reportMissingImports=false
+"""Local write-ahead journal for game writes that could not reach Redis (degraded mode).
+
+Each process appends JSON lines to GAME_JOURNAL_DIR/journal-<host>-<pid>.jsonl:
+  {"op": "set", "game_id": ..., "version": n, "game": {...}, "ts": ...}
+  {"op": "delete", "game_id": ..., "version": n, "ts": ...}
+Only writes made after Redis was reachable once are journaled (no journal without Redis).
+Appends go through a writer thread: the caller (an async handler) only enqueues, and the writer
+appends everything queued meanwhile with one fsync per batch.
+When Redis comes back, replay_game_journal() applies the last entry per game with
+redis_replay_game (skipped when Redis already holds a newer version) and removes the file.
+A journal past _COMPACT_BYTES is rewritten with only the last entry per game.
+Until its entry is replayed, a journaled game is pending (journal_pending): the reconnected Redis
+still holds the pre-outage copy, so readers must use the local one.
+Journals left by processes that died during an outage are replayed on the next startup; the host
+in the name keeps containers sharing the directory (all pid 1) apart. Another host's journal is
+only taken once untouched for _FOREIGN_STALE_SECONDS (its process is gone or has replayed)."""
+import json
+import logging
+import os
+import queue
+import re
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from config import config
+from domain.game_state import GameState
+from infrastructure.redis.redis_client import redis_replay_game
+from utils.metrics import GAME_JOURNAL_EVENTS
+
+logger = logging.getLogger(__name__)
+
+# journal-<host>-<pid>.jsonl (being appended) or journal-<host>-<pid>.replay-<ns> (taken for replay).
+_JOURNAL_NAME_RE = re.compile(r"^journal-(.+)-(\d+)\.(jsonl|replay-\d+)$")
+_HOST = re.sub(r"[^A-Za-z0-9_.]", "_", socket.gethostname()) or "host"
+_FOREIGN_STALE_SECONDS = 3600
+_lock = threading.Lock()  # journal files (held by the writer through its fsync)
+_state_lock = threading.Lock()  # _pending and _writer, never held across I/O
+# (game_id, line) appends waiting for the writer thread.
+_queue: queue.Queue[tuple[str, str]] = queue.Queue()
+_writer: threading.Thread | None = None
+_COMPACT_BYTES = 4 << 20
+_compact_at = _COMPACT_BYTES  # own journal size that triggers the next compaction
+# game_id -> version of this process's last journaled write, until replay has applied (or Redis
+# superseded) it. Deletes are included: a pending game with no local copy has ended.
+_pending: dict[str, int] = {}
+
+
+def _journal_dir() -> Path:
+    return Path(config.GAME_JOURNAL_DIR)
+
+
+def _own_journal() -> Path:
+    return _journal_dir() / f"journal-{_HOST}-{os.getpid()}.jsonl"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _entry_line(entry: dict[str, Any]) -> str:
+    return json.dumps(entry, ensure_ascii=False, default=str) + "\n"
+
+
+def journal_game_write(game_id: str, game: GameState | None, version: int = 0) -> None:
+    """Journal a set (game) or delete (game=None, version one above the last one written) that
+    did not reach Redis. Only enqueues: the writer thread appends and fsyncs it shortly after."""
+    global _writer
+    entry: dict[str, Any] = {
+        "op": "delete" if game is None else "set",
+        "game_id": game_id,
+        "version": game.version if game is not None else version,
+        "ts": time.time(),
+    }
+    if game is not None:
+        entry["game"] = game.to_document()
+    line = _entry_line(entry)
+    with _state_lock:
+        _pending[game_id] = entry["version"]
+        _queue.put((game_id, line))
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(target=_writer_loop, name="game-journal-writer", daemon=True)
+            _writer.start()
+
+
+def _writer_loop() -> None:
+    """Append queued entries in batches: one open/write/fsync for everything queued meanwhile."""
+    global _compact_at
+    while True:
+        batch = [_queue.get()]
+        while True:
+            try:
+                batch.append(_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            with _lock:
+                _journal_dir().mkdir(parents=True, exist_ok=True)
+                with open(_own_journal(), "a", encoding="utf-8") as f:
+                    f.write("".join(line for _, line in batch))
+                    f.flush()
+                    os.fsync(f.fileno())
+                    size = f.tell()
+                if size >= _compact_at:
+                    _compact_at = max(_COMPACT_BYTES, 2 * _compact(_own_journal()))
+            GAME_JOURNAL_EVENTS.labels("appended").inc(len(batch))
+        except OSError as e:
+            logger.warning("Game journal append failed games=%s: %s", [game_id for game_id, _ in batch], e)
+        finally:
+            for _ in batch:
+                _queue.task_done()
+
+
+def journal_flush() -> None:
+    """Block until every queued entry is written (before replay and at shutdown)."""
+    _queue.join()
+
+
+def journal_pending(game_id: str) -> bool:
+    """True while a write of this game journaled by this process has not reached Redis."""
+    return game_id in _pending
+
+
+def _settle(game_id: str, version: int) -> None:
+    """The journaled write with this version is in Redis (or superseded there): no longer pending."""
+    with _state_lock:
+        if _pending.get(game_id, version) <= version:
+            _pending.pop(game_id, None)
+
+
+def _compact(path: Path) -> int:
+    """Rewrite path with only the last entry per game (call with _lock held). Returns the new size."""
+    latest = _read_latest(path)
+    tmp = path.with_suffix(".compact")
+    with open(tmp, "w", encoding="utf-8") as f:
+        for entry in latest.values():
+            f.write(_entry_line(entry))
+        f.flush()
+        os.fsync(f.fileno())
+        size = f.tell()
+    os.replace(tmp, path)
+    GAME_JOURNAL_EVENTS.labels("compacted").inc()
+    logger.info("Game journal compacted file=%s games=%s bytes=%s", path.name, len(latest), size)
+    return size
+
+
+def _read_latest(path: Path) -> dict[str, dict[str, Any]]:
+    """Last entry per game. Lines are in write order, so a delete after a set wins, whatever
+    the versions."""
+    latest: dict[str, dict[str, Any]] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn last line from a crash mid-write
+            game_id = entry.get("game_id")
+            if isinstance(game_id, str):
+                latest.pop(game_id, None)  # keep the file order of the last entries
+                latest[game_id] = entry
+    return latest
+
+
+def _replay_file(path: Path) -> bool:
+    """Apply one journal file; True when done (file removed), False if Redis went away again."""
+    try:
+        latest = _read_latest(path)
+    except FileNotFoundError:
+        return True  # replayed by another process
+    for game_id, entry in latest.items():
+        document = entry.get("game") if entry.get("op") == "set" else None
+        version = int(entry.get("version") or 0)
+        applied = redis_replay_game(
+            game_id,
+            GameState.from_document(document) if document is not None else None,
+            version,
+        )
+        if applied is None:
+            return False
+        _settle(game_id, version)
+        GAME_JOURNAL_EVENTS.labels("replayed" if applied else "superseded").inc()
+    path.unlink(missing_ok=True)
+    logger.info("Game journal replayed file=%s games=%s", path.name, len(latest))
+    return True
+
+
+def _take_foreign(path: Path, kind: str) -> Path | None:
+    """Another host's journal, renamed for replay once it is stale; None while it may be live."""
+    try:
+        if time.time() - path.stat().st_mtime < _FOREIGN_STALE_SECONDS:
+            return None
+        if kind != "jsonl":
+            return path
+        taken = path.with_suffix(f".replay-{time.time_ns()}")
+        path.rename(taken)  # its owner, if still around, starts a new file
+        return taken
+    except FileNotFoundError:
+        return None  # taken by another process
+
+
+def replay_game_journal() -> None:
+    """Replay this process's journal and any left by dead processes. Blocking (run in a thread).
+    The own journal is flushed and renamed first, so writes made meanwhile start a new file."""
+    directory = _journal_dir()
+    if not directory.is_dir():
+        return
+    journal_flush()
+    with _lock:
+        own = _own_journal()
+        if own.exists():
+            own.rename(own.with_suffix(f".replay-{time.time_ns()}"))
+    for path in sorted(directory.iterdir()):
+        match = _JOURNAL_NAME_RE.match(path.name)
+        if not match:
+            continue
+        host, pid, kind = match.group(1), int(match.group(2)), match.group(3)
+        if host != _HOST:
+            if not (path := _take_foreign(path, kind)):
+                continue  # possibly live on its host: it replays its own journal
+        elif pid == os.getpid():
+            if kind == "jsonl":
+                continue  # written after the rename above; replayed next time
+        elif _pid_alive(pid):
+            continue  # another live process replays its own journal
+        if not _replay_file(path):
+            logger.warning("Game journal replay stopped: Redis unavailable again")
+            return
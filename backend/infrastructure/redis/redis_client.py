@@ -1,106 +1,347 @@
 # pyright: reportMissingImports=false
 """Redis-backed game session store. Used when REDIS_URL is set."""
-import json
 import logging
+import random
+import threading
+from collections.abc import Callable
 from typing import Any
 
 import redis
+from redis.client import NEVER_DECODE
 
 from config import config
+from domain.game_state import GameState
+from infrastructure.redis.game_codec import decode_game, encode_game
+from utils.metrics import REDIS_CONNECTION_RESETS, REDIS_OP_SECONDS, Gauge, timed
+from utils.tracing import SPAN_KIND_CLIENT, traced
 
 logger = logging.getLogger(__name__)
 
 _KEY_PREFIX = "game:"
 _redis_client: Any = None
+_was_reachable = False  # a connection has succeeded at least once in this process
+
+# Circuit breaker. After a failed connect or a connection/timeout error the breaker opens: store
+# calls get None from _get_redis() at once and fall back to the in-memory path, instead of
+# reconnecting (and blocking up to the socket timeout) on every call. A background thread probes
+# with exponential backoff (half-open while it tries) and closes the breaker once PING succeeds.
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+_breaker_state = BREAKER_CLOSED
+_breaker_lock = threading.Lock()
+_probe_thread: threading.Thread | None = None
+_probe_stop = threading.Event()
+# Called (in the probe thread) each time the breaker closes again, e.g. to replay the local journal.
+_reconnect_listeners: list[Callable[[], None]] = []
+
+Gauge(
+    "escape_redis_breaker_open",
+    "1 while the Redis circuit breaker is open or half-open (store calls use the in-memory path).",
+    callback=lambda: 0 if _breaker_state == BREAKER_CLOSED else 1,
+)
+
+
+def _connect() -> Any:
+    client = redis.from_url(
+        config.REDIS_URL,
+        decode_responses=True,
+        socket_connect_timeout=config.REDIS_CONNECT_TIMEOUT,
+        socket_timeout=config.REDIS_SOCKET_TIMEOUT,
+    )
+    client.ping()
+    return client
+
+
+def _redis_location() -> str:
+    return config.REDIS_URL.split("@")[-1] if "@" in config.REDIS_URL else "local"
 
 
 def _get_redis():
-    global _redis_client
-    if _redis_client is not None:
-        return _redis_client
+    global _redis_client, _was_reachable
+    client = _redis_client
+    if client is not None:
+        return client
     if not getattr(config, "REDIS_URL", None):
         return None
-    try:
-        client = redis.from_url(
-            config.REDIS_URL,
-            decode_responses=True,
-        )
-        client.ping()
-        _redis_client = client
-        logger.info("Redis game store connected: %s", config.REDIS_URL.split("@")[-1] if "@" in config.REDIS_URL else "local")
+    with _breaker_lock:
+        if _redis_client is not None:
+            return _redis_client
+        if _breaker_state != BREAKER_CLOSED:
+            return None  # open or probing: fail fast, no network
+        try:
+            _redis_client = _connect()
+        except Exception as e:
+            logger.warning("Redis not available, using in-memory store: %s", e)
+            _open_breaker()
+            return None
+        _was_reachable = True
+        logger.info("Redis game store connected: %s", _redis_location())
         return _redis_client
-    except Exception as e:
-        _redis_client = None
-        logger.warning("Redis not available, using in-memory store: %s", e)
-        return None
+
+
+def _open_breaker() -> None:
+    """Open the breaker and start the probe thread (call with _breaker_lock held)."""
+    global _breaker_state, _probe_thread
+    _breaker_state = BREAKER_OPEN
+    if _probe_thread is None or not _probe_thread.is_alive():
+        _probe_stop.clear()
+        _probe_thread = threading.Thread(target=_probe_loop, name="redis-breaker-probe", daemon=True)
+        _probe_thread.start()
+
+
+def _probe_loop() -> None:
+    """Probe until the breaker closes and stays closed through the reconnect listeners. A listener
+    that hits a connection error reopens the breaker while this thread is alive (so _open_breaker
+    starts no new probe): keep probing then, instead of leaving it open."""
+    global _redis_client, _breaker_state, _was_reachable, _probe_thread
+    delay = config.REDIS_RETRY_MIN_SECONDS
+    while not _probe_stop.wait(delay * random.uniform(0.8, 1.2)):
+        with _breaker_lock:
+            _breaker_state = BREAKER_HALF_OPEN
+        try:
+            client = _connect()
+        except Exception as e:
+            with _breaker_lock:
+                _breaker_state = BREAKER_OPEN
+            delay = min(delay * 2, config.REDIS_RETRY_MAX_SECONDS)
+            logger.debug("Redis probe failed, next attempt in ~%.1fs: %s", delay, e)
+            continue
+        with _breaker_lock:
+            _redis_client = client
+            _breaker_state = BREAKER_CLOSED
+            _was_reachable = True
+        logger.info("Redis reconnected (circuit closed): %s", _redis_location())
+        for listener in list(_reconnect_listeners):
+            try:
+                listener()
+            except Exception as e:
+                logger.exception("Redis reconnect listener failed: %s", e)
+        with _breaker_lock:
+            if _breaker_state == BREAKER_CLOSED:
+                _probe_thread = None  # the next _open_breaker starts a fresh probe
+                return
+        delay = config.REDIS_RETRY_MIN_SECONDS
 
 
 def _clear_redis_on_error():
+    global _redis_client, _was_reachable
+    with _breaker_lock:
+        client, _redis_client = _redis_client, None
+        if client is not None:
+            _was_reachable = True
+            REDIS_CONNECTION_RESETS.inc()
+            logger.warning("Redis circuit open; using in-memory store until it recovers")
+            try:
+                client.connection_pool.disconnect()
+            except Exception:
+                pass
+        _open_breaker()
+
+
+def redis_breaker_state() -> str:
+    return _breaker_state
+
+
+def redis_was_reachable() -> bool:
+    """True once Redis has been connected in this process (a failed write is then an outage to
+    journal, not a deployment without Redis)."""
+    return _was_reachable
+
+
+def add_reconnect_listener(listener: Callable[[], None]) -> None:
+    """Run listener (in a background thread) whenever Redis comes back after an outage."""
+    if listener not in _reconnect_listeners:
+        _reconnect_listeners.append(listener)
+
+
+def redis_close() -> None:
+    """Stop the breaker probe and disconnect the connection pool (shutdown)."""
     global _redis_client
-    _redis_client = None
+    _probe_stop.set()
+    client, _redis_client = _redis_client, None
+    if client is None:
+        return
+    try:
+        client.connection_pool.disconnect()
+    except Exception as e:
+        logger.warning("Redis close error: %s", e)
+
+
+def is_redis_available() -> bool:
+    return _get_redis() is not None
 
 
 def _key(game_id: str) -> str:
     return f"{_KEY_PREFIX}{game_id}"
 
 
-def redis_get_game(game_id: str) -> dict[str, Any] | None:
+def _players_key(game_id: str) -> str:
+    return f"{_KEY_PREFIX}{game_id}:players"
+
+
+def _get_raw(client: Any, key: str) -> Any:
+    """GET returning bytes: game documents are binary (game_codec), the client decodes to str."""
+    return client.execute_command("GET", key, **{NEVER_DECODE: True})
+
+
+def _queue_game_write(pipe: Any, game_id: str, game: GameState, ttl: int) -> None:
+    pipe.setex(_key(game_id), ttl, encode_game(game.to_document(include_players=False)))
+    if game.players:
+        pipe.hset(_players_key(game_id), mapping=game.players)
+    pipe.expire(_players_key(game_id), ttl)
+
+
+@traced("redis.get_game", kind=SPAN_KIND_CLIENT, **{"db.system": "redis", "db.operation": "get_game"})
+@timed(REDIS_OP_SECONDS, "get_game")
+def redis_get_game(game_id: str) -> GameState | None:
+    """Game document with its roster hash as players (one round trip)."""
     r = _get_redis()
     if not r:
         return None
     try:
-        raw = r.get(_key(game_id))
+        pipe = r.pipeline(transaction=False)
+        _get_raw(pipe, _key(game_id))
+        pipe.hgetall(_players_key(game_id))
+        raw, roster = pipe.execute()
         if not raw:
             return None
-        data = json.loads(raw)
-        if "players" in data and isinstance(data["players"], dict):
-            data["players"] = {str(k): v for k, v in data["players"].items()}
-        return data
+        return GameState.from_document(decode_game(raw), roster)
     except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
         logger.warning("Redis connection lost (get_game): %s", e)
         _clear_redis_on_error()
         return None
-    except (json.JSONDecodeError, TypeError) as e:
+    except (ValueError, TypeError, AttributeError) as e:
         logger.warning("redis_get_game decode error game_id=%s: %s", game_id, e)
         return None
 
 
-def redis_set_game(game_id: str, game: dict[str, Any], ttl_seconds: int | None = None) -> bool:
+@traced("redis.set_game", kind=SPAN_KIND_CLIENT, **{"db.system": "redis", "db.operation": "set_game"})
+@timed(REDIS_OP_SECONDS, "set_game")
+def redis_set_game(game_id: str, game: GameState, ttl_seconds: int | None = None) -> bool:
+    """Write the game document; players go to the roster hash, not the document."""
     r = _get_redis()
     if not r:
         return False
     ttl = ttl_seconds if ttl_seconds is not None else getattr(config, "GAME_SESSION_TTL", 86400)
     try:
-        out = dict(game)
-        if "players" in out and isinstance(out["players"], dict):
-            out["players"] = {str(k): v for k, v in out["players"].items()}
-        r.setex(_key(game_id), ttl, json.dumps(out, ensure_ascii=False))
+        pipe = r.pipeline(transaction=False)
+        _queue_game_write(pipe, game_id, game, ttl)
+        pipe.execute()
         return True
     except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
         logger.warning("Redis connection lost (set_game): %s", e)
         _clear_redis_on_error()
         return False
-    except (TypeError, ValueError) as e:
+    except (TypeError, ValueError, AttributeError) as e:
         logger.warning("redis_set_game error game_id=%s: %s", game_id, e)
         return False
 
 
+@traced("redis.add_player", kind=SPAN_KIND_CLIENT, **{"db.system": "redis", "db.operation": "add_player"})
+@timed(REDIS_OP_SECONDS, "add_player")
+def redis_add_player(game_id: str, user_id: str, name: str, ttl_seconds: int | None = None) -> bool | None:
+    """HSETNX into the roster hash (late join). True if added, False if already a player,
+    None when Redis is unavailable. The game document is not touched."""
+    r = _get_redis()
+    if not r:
+        return None
+    ttl = ttl_seconds if ttl_seconds is not None else getattr(config, "GAME_SESSION_TTL", 86400)
+    try:
+        pipe = r.pipeline(transaction=False)
+        pipe.hsetnx(_players_key(game_id), user_id, name)
+        pipe.expire(_players_key(game_id), ttl)
+        added, _ = pipe.execute()
+        return bool(added)
+    except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
+        logger.warning("Redis connection lost (add_player): %s", e)
+        _clear_redis_on_error()
+        return None
+
+
+@traced("redis.game_exists", kind=SPAN_KIND_CLIENT, **{"db.system": "redis", "db.operation": "game_exists"})
+@timed(REDIS_OP_SECONDS, "game_exists")
+def redis_game_exists(game_id: str) -> bool | None:
+    """EXISTS check without fetching the game document. None when Redis is unavailable."""
+    r = _get_redis()
+    if not r:
+        return None
+    try:
+        return bool(r.exists(_key(game_id)))
+    except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
+        logger.warning("Redis connection lost (game_exists): %s", e)
+        _clear_redis_on_error()
+        return None
+
+
+@traced("redis.delete_game", kind=SPAN_KIND_CLIENT, **{"db.system": "redis", "db.operation": "delete_game"})
+@timed(REDIS_OP_SECONDS, "delete_game")
 def redis_delete_game(game_id: str) -> bool:
+    """Delete the game document and roster. False when Redis was not reached or on error."""
     r = _get_redis()
     if not r:
-        return True
+        return False
     try:
-        r.delete(_key(game_id))
+        r.delete(_key(game_id), _players_key(game_id))
         return True
     except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
         logger.warning("Redis connection lost (delete_game): %s", e)
         _clear_redis_on_error()
-        return True
+        return False
     except Exception as e:
         logger.warning("redis_delete_game error game_id=%s: %s", game_id, e)
         return False
 
 
+def _game_version(raw: bytes | None) -> int:
+    if not raw:
+        return -1
+    try:
+        return int(decode_game(raw).get("version") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+@traced("redis.replay_game", kind=SPAN_KIND_CLIENT, **{"db.system": "redis", "db.operation": "replay_game"})
+@timed(REDIS_OP_SECONDS, "replay_game")
+def redis_replay_game(
+    game_id: str,
+    game: GameState | None,
+    version: int,
+    ttl_seconds: int | None = None,
+) -> bool | None:
+    """Apply a journaled write unless Redis already holds a newer version of the game
+    (WATCH/MULTI), or a journaled delete (game=None; an ended game stays ended). True if
+    applied, False if Redis was newer, None when Redis is unavailable."""
+    r = _get_redis()
+    if not r:
+        return None
+    ttl = ttl_seconds if ttl_seconds is not None else getattr(config, "GAME_SESSION_TTL", 86400)
+    try:
+        for _ in range(3):
+            with r.pipeline() as pipe:
+                try:
+                    pipe.watch(_key(game_id))
+                    if game is not None and _game_version(_get_raw(pipe, _key(game_id))) > version:
+                        return False
+                    pipe.multi()
+                    if game is None:
+                        pipe.delete(_key(game_id), _players_key(game_id))
+                    else:
+                        _queue_game_write(pipe, game_id, game, ttl)
+                    pipe.execute()
+                    return True
+                except redis.exceptions.WatchError:
+                    continue  # written concurrently; re-check the version
+        return False
+    except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
+        logger.warning("Redis connection lost (replay_game): %s", e)
+        _clear_redis_on_error()
+        return None
+
+
+@traced("redis.publish", kind=SPAN_KIND_CLIENT, **{"db.system": "redis", "db.operation": "publish"})
+@timed(REDIS_OP_SECONDS, "publish")
 def redis_publish(channel: str, payload: str) -> bool:
     """Publish raw string payload to a Redis pub/sub channel."""
     r = _get_redis()
@@ -166,6 +407,8 @@ def redis_close_pubsub(pubsub) -> None:
 _LEADERBOARD_KEY = "leaderboard"
 
 
+@traced("redis.get_leaderboard", kind=SPAN_KIND_CLIENT, **{"db.system": "redis", "db.operation": "get_leaderboard"})
+@timed(REDIS_OP_SECONDS, "get_leaderboard")
 def redis_get_leaderboard_top10() -> list[tuple[str, float]]:
     """Return top 10 from Redis sorted set 'leaderboard' (ascending = best first). Returns [(member, score), ...] or []."""
     r = _get_redis()
@@ -188,3 +431,181 @@ def redis_get_leaderboard_top10() -> list[tuple[str, float]]:
     except (TypeError, ValueError) as e:
         logger.warning("redis_get_leaderboard_top10 error: %s", e)
         return []
+
+
+# --- Multi-process coordination (PROCESS_ROLE=control/edge, see bootstrap) ---
+_TIMED_GAMES_KEY = "games:timed"  # sorted set: game_id -> timer deadline (unix seconds)
+_UPDATES_KEY = "tg:updates"  # list: raw webhook bodies forwarded from edge workers to control
+_UPDATES_MAX = 10000
+
+
+@timed(REDIS_OP_SECONDS, "schedule_timeout")
+def redis_schedule_game_timeout(game_id: str, deadline_ts: float) -> bool:
+    """Register a running game's timer deadline so any control process can expire it."""
+    r = _get_redis()
+    if not r:
+        return False
+    try:
+        r.zadd(_TIMED_GAMES_KEY, {game_id: deadline_ts})
+        return True
+    except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
+        logger.warning("Redis connection lost (schedule_timeout): %s", e)
+        _clear_redis_on_error()
+        return False
+
+
+@timed(REDIS_OP_SECONDS, "due_timeouts")
+def redis_due_game_timeouts(now_ts: float, limit: int = 500) -> list[str] | None:
+    """game_ids whose deadline has passed. None when Redis is unavailable."""
+    r = _get_redis()
+    if not r:
+        return None
+    try:
+        return list(r.zrangebyscore(_TIMED_GAMES_KEY, "-inf", now_ts, start=0, num=limit))
+    except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
+        logger.warning("Redis connection lost (due_timeouts): %s", e)
+        _clear_redis_on_error()
+        return None
+
+
+def redis_clear_game_timeout(game_id: str) -> None:
+    r = _get_redis()
+    if not r:
+        return
+    try:
+        r.zrem(_TIMED_GAMES_KEY, game_id)
+    except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
+        logger.warning("Redis connection lost (clear_timeout): %s", e)
+        _clear_redis_on_error()
+
+
+@timed(REDIS_OP_SECONDS, "forward_update")
+def redis_forward_update(raw: str) -> bool:
+    """Queue a raw webhook update for the control process (bounded list)."""
+    r = _get_redis()
+    if not r:
+        return False
+    try:
+        pipe = r.pipeline(transaction=False)
+        pipe.lpush(_UPDATES_KEY, raw)
+        pipe.ltrim(_UPDATES_KEY, 0, _UPDATES_MAX - 1)
+        pipe.execute()
+        return True
+    except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
+        logger.warning("Redis connection lost (forward_update): %s", e)
+        _clear_redis_on_error()
+        return False
+
+
+def redis_pop_forwarded_updates(timeout: int, batch: int) -> list[str]:
+    """Block up to `timeout` seconds for forwarded updates; returns up to `batch`, oldest first.
+    Blocking call: run it in a worker thread."""
+    r = _get_redis()
+    if not r:
+        return []
+    try:
+        first = r.brpop(_UPDATES_KEY, timeout=timeout)
+        if not first:
+            return []
+        items = [first[1]]
+        while len(items) < batch:
+            item = r.rpop(_UPDATES_KEY)
+            if item is None:
+                break
+            items.append(item)
+        return items
+    except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
+        logger.warning("Redis connection lost (pop_updates): %s", e)
+        _clear_redis_on_error()
+        return []
+
+
+def redis_acquire_lease(key: str, owner: str, ttl_ms: int) -> bool | None:
+    """SET NX PX lease. None when Redis is unavailable (caller decides)."""
+    r = _get_redis()
+    if not r:
+        return None
+    try:
+        return bool(r.set(key, owner, nx=True, px=ttl_ms))
+    except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
+        logger.warning("Redis connection lost (acquire_lease): %s", e)
+        _clear_redis_on_error()
+        return None
+
+
+def _if_lease_owner(r: Any, key: str, owner: str, action: Callable[[Any], None]) -> bool:
+    """Run `action` on a MULTI pipeline only if `owner` still holds `key` (WATCH check-and-set)."""
+    with r.pipeline() as pipe:
+        try:
+            pipe.watch(key)
+            if pipe.get(key) != owner:
+                pipe.unwatch()
+                return False
+            pipe.multi()
+            action(pipe)
+            pipe.execute()
+            return True
+        except redis.exceptions.WatchError:
+            return False
+
+
+def redis_renew_lease(key: str, owner: str, ttl_ms: int) -> bool | None:
+    """Extend the lease if `owner` still holds it. None when Redis is unavailable."""
+    r = _get_redis()
+    if not r:
+        return None
+    try:
+        return _if_lease_owner(r, key, owner, lambda pipe: pipe.pexpire(key, ttl_ms))
+    except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
+        logger.warning("Redis connection lost (renew_lease): %s", e)
+        _clear_redis_on_error()
+        return None
+
+
+def redis_release_lease(key: str, owner: str) -> None:
+    r = _get_redis()
+    if not r:
+        return
+    try:
+        _if_lease_owner(r, key, owner, lambda pipe: pipe.delete(key))
+    except Exception as e:
+        logger.warning("redis_release_lease error key=%s: %s", key, e)
+
+
+# --- One-shot claims (e.g. time_up: one authoritative transition per game) ---
+@timed(REDIS_OP_SECONDS, "claim")
+def redis_claim_once(key: str, value: str, ttl_seconds: int) -> bool | None:
+    """SET NX EX: True if this caller made the claim, False if it already existed.
+    None when Redis is unavailable."""
+    r = _get_redis()
+    if not r:
+        return None
+    try:
+        return bool(r.set(key, value, nx=True, ex=ttl_seconds))
+    except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
+        logger.warning("Redis connection lost (claim): %s", e)
+        _clear_redis_on_error()
+        return None
+
+
+def redis_get_claim(key: str) -> str | None:
+    r = _get_redis()
+    if not r:
+        return None
+    try:
+        return r.get(key)
+    except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
+        logger.warning("Redis connection lost (get_claim): %s", e)
+        _clear_redis_on_error()
+        return None
+
+
+def redis_release_claim(key: str) -> None:
+    r = _get_redis()
+    if not r:
+        return
+    try:
+        r.delete(key)
+    except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
+        logger.warning("Redis connection lost (release_claim): %s", e)
+        _clear_redis_on_error()
@@ -5,10 +5,12 @@ from datetime import datetime, timezone
 
 from infrastructure.models.db_models import Group
 from infrastructure.database.session import get_session
+from utils.tracing import SPAN_KIND_CLIENT, traced
 
 logger = logging.getLogger(__name__)
 
 
+@traced("db.groups.set_finished_at", kind=SPAN_KIND_CLIENT, **{"db.system": "sql", "db.operation": "update"})
 def set_finished_at(chat_id: int, finished_at: datetime | None = None) -> None:
     when = finished_at or datetime.now(timezone.utc)
     try:
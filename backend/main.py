@@ -1,11 +1,13 @@
 # pyright: reportMissingImports=false
-"""Entry point: create app, register startup, run server."""
+"""Entry point: create app, register startup/shutdown, run server."""
 import uvicorn
 
 from config import config
 from api.app_factory import create_app
-from bootstrap import bootstrap
+from bootstrap import bootstrap, shutdown
+from utils.logging_config import configure_logging
 
+configure_logging()
 app = create_app()
 
 
@@ -14,11 +16,17 @@ async def on_startup():
     await bootstrap(app)
 
 
+@app.on_event("shutdown")
+async def on_shutdown():
+    await shutdown(app)
+
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=config.PORT,
-        reload=config.MODE != "production",
+        reload=config.MODE != "production" and config.WEB_CONCURRENCY == 1,
+        workers=config.WEB_CONCURRENCY,
         timeout_keep_alive=0,
     )
@@ -1,9 +1,7 @@
 # pyright: reportMissingImports=false
 """Game API service: demo room application and GameStateResponse building. Used by app/api/games.py."""
 import logging
-from typing import Any
 
-from config import config
 from data.demo_room import (
     DEMO_ROOM_HEIGHT,
     DEMO_ROOM_ITEMS,
@@ -11,63 +9,83 @@ from data.demo_room import (
     DEMO_ROOM_PUZZLES,
     DEMO_ROOM_WIDTH,
 )
-from data.puzzle import SAFE_BACKSTORY, get_puzzle_dependencies
-from domain.game import GameStateResponse, PuzzleResponse, PuzzleStatus
+from data.puzzle import SAFE_BACKSTORY, get_puzzle_graph
+from domain.game import GameStateResponse, MediaUrlsResponse, PuzzleResponse
+from domain.game_state import GameState
+from services.game_session import claim_game_init, save_game
+from utils.metrics import GAME_STATE_BUILD_SECONDS, timed
+from utils.tracing import traced
+from utils.urls import asset_url
 
 logger = logging.getLogger(__name__)
 
 
-def apply_demo_room(game: dict[str, Any]) -> None:
+def apply_demo_room(game: GameState) -> None:
     """Inject demo room items, puzzles, and static room image URL. Mutates game in place.
-    room_image_url must point to the API (backend) that serves /room/escape_room.png, not the frontend."""
-    api_base = (config.API_BASE_URL or "http://localhost:8000").strip().rstrip("/")
-    game["room_image_url"] = f"{api_base}/room/escape_room.png"
-    game["room_image_width"] = DEMO_ROOM_WIDTH
-    game["room_image_height"] = DEMO_ROOM_HEIGHT
-    game["room_name"] = DEMO_ROOM_META["room_name"]
-    game["room_description"] = DEMO_ROOM_META["room_description"]
-    game["room_lore"] = DEMO_ROOM_META.get("room_lore", "")
-    game["room_items"] = [dict(it) for it in DEMO_ROOM_ITEMS]
-    game["room_puzzles"] = {}
-    for item_id, p in DEMO_ROOM_PUZZLES.items():
-        game["room_puzzles"][item_id] = dict(p)
-
-
-def needs_demo_room(game: dict[str, Any]) -> bool:
+    room_image_url points to the API (backend) content-addressed asset URL, not the frontend."""
+    game.room_image_url = asset_url("escape_room.png")
+    game.room_image_width = DEMO_ROOM_WIDTH
+    game.room_image_height = DEMO_ROOM_HEIGHT
+    game.room_name = DEMO_ROOM_META["room_name"]
+    game.room_description = DEMO_ROOM_META["room_description"]
+    game.room_lore = DEMO_ROOM_META.get("room_lore", "")
+    game.set_room([dict(it) for it in DEMO_ROOM_ITEMS], {item_id: dict(p) for item_id, p in DEMO_ROOM_PUZZLES.items()})
+
+
+def needs_demo_room(game: GameState) -> bool:
     """True when room data is missing or incomplete (same logic as get_game_state)."""
     return (
-        not game.get("room_image_url")
-        or len(game.get("room_items") or []) < len(DEMO_ROOM_ITEMS)
-        or not game.get("room_image_width")
+        not game.room_image_url
+        or len(game.room_items) < len(DEMO_ROOM_ITEMS)
+        or not game.room_image_width
     )
 
 
-def build_game_state_response(game_id: str, game: dict[str, Any]) -> GameStateResponse:
+def ensure_demo_room(game_id: str, game: GameState) -> None:
+    """Apply the demo room if missing. Every caller gets it in memory (it is deterministic); only
+    the first caller per game (claim_game_init) writes it, so start-of-game bursts save once."""
+    if not needs_demo_room(game):
+        return
+    apply_demo_room(game)
+    if claim_game_init(game_id, "demo_room"):
+        save_game(game_id, game)
+        logger.info("Room applied for game_id=%s (items + positions, no image)", game_id)
+
+
+def build_media_urls() -> MediaUrlsResponse:
+    """Content-addressed URLs of the room media (current hashes from the asset index)."""
+    return {
+        "room_image": asset_url("escape_room.png"),
+        "door_video": asset_url("door_open.mp4"),
+        "science_lab_image": asset_url("science_lab_room.png"),
+    }
+
+
+@traced("build_game_state_response")
+@timed(GAME_STATE_BUILD_SECONDS)
+def build_game_state_response(game_id: str, game: GameState) -> GameStateResponse:
     """Build GameStateResponse dict from game state (after demo room applied if needed)."""
-    players_raw = game.get("players", {})
-    players_str: dict[str, str] = {str(k): v for k, v in players_raw.items()}
     out: GameStateResponse = {
         "game_id": game_id,
-        "players": players_str,
-        "game_active": game.get("game_active", True),
+        "players": dict(game.players),
+        "game_active": game.game_active,
     }
-    if game.get("started_at"):
-        out["started_at"] = game["started_at"]
-    if game.get("game_over") is not None:
-        out["game_over"] = bool(game.get("game_over"))
-    if game.get("game_over_reason"):
-        out["game_over_reason"] = str(game.get("game_over_reason"))
-    if game.get("door_opened"):
-        out["door_opened"] = bool(game.get("door_opened"))
-    if game.get("room_image_url") or game.get("room_items"):
-        if game.get("room_image_url"):
-            out["room_image_url"] = game["room_image_url"]
-            out["room_image_width"] = game.get("room_image_width") or DEMO_ROOM_WIDTH
-            out["room_image_height"] = game.get("room_image_height") or DEMO_ROOM_HEIGHT
-        out["room_name"] = game.get("room_name", "")
-        out["room_description"] = game.get("room_description", "")
-        out["room_lore"] = game.get("room_lore", "")
-        items_raw = game.get("room_items") or []
+    if game.started_at:
+        out["started_at"] = game.started_at
+    if game.game_over is not None:
+        out["game_over"] = bool(game.game_over)
+    if game.game_over_reason:
+        out["game_over_reason"] = str(game.game_over_reason)
+    if game.door_opened:
+        out["door_opened"] = True
+    if game.room_image_url or game.room_items:
+        if game.room_image_url:
+            out["room_image_url"] = game.room_image_url
+            out["room_image_width"] = game.room_image_width or DEMO_ROOM_WIDTH
+            out["room_image_height"] = game.room_image_height or DEMO_ROOM_HEIGHT
+        out["room_name"] = game.room_name
+        out["room_description"] = game.room_description
+        out["room_lore"] = game.room_lore
         out["room_items"] = [
             {
                 "id": it["id"],
@@ -76,12 +94,11 @@ def build_game_state_response(game_id: str, game: dict[str, Any]) -> GameStateRe
                 "y": it["y"],
                 "action_type": it.get("action_type", "examine"),
             }
-            for it in items_raw
+            for it in game.room_items
         ]
-        puzzles_raw = game.get("room_puzzles") or {}
         puzzles_list: list[PuzzleResponse] = []
         first_unlock: PuzzleResponse | None = None
-        for item_id, p in puzzles_raw.items():
+        for item_id, p in game.room_puzzles.items():
             ptype = p.get("type") or ("unlock" if p.get("correct_answer") else "examine")
             pr: PuzzleResponse = {
                 "item_id": item_id,
@@ -98,29 +115,20 @@ def build_game_state_response(game_id: str, game: dict[str, Any]) -> GameStateRe
         out["puzzles"] = puzzles_list
         if first_unlock:
             out["puzzle"] = first_unlock
-        room_solved = game.get("room_solved") or {}
-        out["solved_item_ids"] = [
-            iid for iid, status in room_solved.items()
-            if status == PuzzleStatus.SOLVED.value
-        ]
-        out["puzzle_dependencies"] = get_puzzle_dependencies()
+        out["solved_item_ids"] = game.solved_item_ids()
+        out["puzzle_dependencies"] = get_puzzle_graph(game.room_puzzles).dependencies
+        out["media_urls"] = build_media_urls()
     return out
 
 
-def item_label(game: dict[str, Any], item_id: str) -> str:
+def item_label(game: GameState, item_id: str) -> str:
     """Get display label for room item; fallback to item_id."""
-    for it in game.get("room_items") or []:
+    for it in game.room_items:
         if it.get("id") == item_id:
             return (it.get("label") or item_id).strip()
     return item_id
 
 
-def all_unlock_puzzles_solved(game: dict[str, Any]) -> bool:
-    """True if every unlock puzzle in room_puzzles is marked SOLVED in room_solved."""
-    puzzles = game.get("room_puzzles") or {}
-    room_solved = game.get("room_solved") or {}
-    for item_id, p in puzzles.items():
-        if (p.get("type") or "").lower() == "unlock":
-            if room_solved.get(item_id) != PuzzleStatus.SOLVED.value:
-                return False
-    return True
+def all_unlock_puzzles_solved(game: GameState) -> bool:
+    """True if every unlock puzzle in room_puzzles is solved (one mask check)."""
+    return get_puzzle_graph(game.room_puzzles).all_unlocks_solved(game.solved)
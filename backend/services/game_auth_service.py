@@ -2,7 +2,8 @@
 """Game auth for Web API and SSE.
 
 HTTP: resolve game and player from request headers (initData, late join).
-SSE: validate initData and require existing player in game["players"].
+SSE: validate initData and resolve the player (late join), skipping the game load for players
+confirmed recently. Late join only adds to the roster hash; it never rewrites the game document.
 Raises HTTPException on failure."""
 import logging
 from typing import Any
@@ -10,7 +11,9 @@ from typing import Any
 from fastapi import HTTPException, Request
 
 from config import config
-from services.game_session import get_game_by_id, save_game
+from domain.game_state import GameState
+from services.game_session import game_exists, is_known_player, get_game_by_id, join_game, remember_player
+from utils.tracing import traced
 from utils.telegram_webapp import (
     get_user_first_name_from_validated,
     get_user_id_from_validated,
@@ -21,22 +24,13 @@ logger = logging.getLogger(__name__)
 
 GAME_NOT_FOUND_DETAIL = "משחק לא נמצא או שהסתיים."
 INIT_DATA_REQUIRED_DETAIL = "פתחו את המשחק בלחיצה על הכפתור שמופיע בהודעה בקבוצה (כניסה למשחק או שחק עכשיו)."
-REALTIME_PLAYERS_ONLY_DETAIL = "רק שחקנים רשומים יכולים לקבל עדכונים בזמן אמת."
 
 
-def _is_player_registered(players: dict[Any, Any], user_id: int) -> bool:
-    """Support both int and str keys in players map."""
-    return user_id in players or str(user_id) in players
-
-
-def _validate_and_load_game(game_id: str, init_data: str) -> tuple[dict, int | None, Any]:
-    """Load game; if init_data present, validate and return (game, user_id, validated). Otherwise (game, None, None). Raises HTTPException on 401/404."""
-    game = get_game_by_id(game_id)
-    if not game:
-        raise HTTPException(status_code=404, detail=GAME_NOT_FOUND_DETAIL)
+def _validate_init_data(init_data: str) -> tuple[int | None, Any]:
+    """If init_data present, validate and return (user_id, validated); otherwise (None, None). Raises HTTPException(401)."""
     init_data = (init_data or "").strip()
     if not init_data:
-        return (game, None, None)
+        return (None, None)
     token = config.TELEGRAM_TOKEN or ""
     validated = validate_init_data(init_data, token)
     if not validated:
@@ -44,54 +38,75 @@ def _validate_and_load_game(game_id: str, init_data: str) -> tuple[dict, int | N
     user_id = get_user_id_from_validated(validated)
     if user_id is None:
         raise HTTPException(status_code=401, detail=INIT_DATA_REQUIRED_DETAIL)
+    return (user_id, validated)
+
+
+def _validate_and_load_game(game_id: str, init_data: str) -> tuple[GameState, int | None, Any]:
+    """Load game; if init_data present, validate and return (game, user_id, validated). Otherwise (game, None, None). Raises HTTPException on 401/404."""
+    game = get_game_by_id(game_id)
+    if not game:
+        raise HTTPException(status_code=404, detail=GAME_NOT_FOUND_DETAIL)
+    user_id, validated = _validate_init_data(init_data)
     return (game, user_id, validated)
 
 
-def get_game_for_request(game_id: str, request: Request) -> dict:
+@traced("auth.authorize_game_asset_request")
+def authorize_game_asset_request(game_id: str, init_data: str) -> int | None:
+    """Authorize a static game-scoped asset (e.g. lore audio) without loading game state:
+    validate initData when present, then check the game exists. Returns user_id or None.
+    Raises HTTPException on 401/404."""
+    user_id, _ = _validate_init_data(init_data)
+    if not game_exists(game_id):
+        raise HTTPException(status_code=404, detail=GAME_NOT_FOUND_DETAIL)
+    return user_id
+
+
+def validate_request_init_data(request: Request) -> int | None:
+    """Check the request's initData signature without loading the game (e.g. the game has
+    already ended). Returns user_id or None when absent. Raises HTTPException(401)."""
+    user_id, _ = _validate_init_data(request.headers.get("X-Telegram-Init-Data") or "")
+    return user_id
+
+
+@traced("auth.get_game_for_request")
+def get_game_for_request(game_id: str, request: Request) -> GameState:
     """Load game for REST API and allow late-join when initData exists."""
     init_data = request.headers.get("X-Telegram-Init-Data") or ""
     game, user_id, validated = _validate_and_load_game(game_id, init_data)
     if user_id is None:
         return game
-    players = game.get("players") or {}
-    if not _is_player_registered(players, int(user_id)):
-        name = get_user_first_name_from_validated(validated)
-        players[str(user_id)] = name
-        game["players"] = players
-        save_game(game_id, game)
+    if game.has_player(user_id):
+        remember_player(game_id, int(user_id))
+        return game
+    name = get_user_first_name_from_validated(validated)
+    if join_game(game_id, game, int(user_id), name):
         logger.info("Late join: added user_id=%s to game_id=%s as %s", user_id, game_id, name)
     return game
 
 
-def get_game_and_user_for_realtime(game_id: str, init_data: str) -> tuple[dict, int]:
-    """Resolve game and user_id for realtime connection.
+@traced("auth.authorize_realtime_user")
+def authorize_realtime_user(game_id: str, init_data: str) -> int:
+    """Resolve user_id for a realtime connection.
 
-    Requires valid initData and that the user is already in game["players"].
-    Raises HTTPException with status_code 401/403/404 on failure.
+    Requires valid initData. Players confirmed recently in this process (e.g. SSE reconnects)
+    are accepted without loading the game; otherwise the game is loaded and the user joins
+    the roster if needed. Raises HTTPException with status_code 401/404 on failure.
     """
     if not (init_data or "").strip():
         raise HTTPException(status_code=401, detail=INIT_DATA_REQUIRED_DETAIL)
-    game, user_id, validated = _validate_and_load_game(game_id, init_data)
-    assert user_id is not None  # _validate_and_load_game raises if init_data present and invalid
-    players = game.get("players") or {}
-    if not _is_player_registered(players, int(user_id)):
-        logger.info(
-            "SSE late-join game_id=%s user_id=%s players_count_before=%s",
-            game_id,
-            user_id,
-            len(players),
-        )
-        name = get_user_first_name_from_validated(validated)
-        players[str(user_id)] = name
-        game["players"] = players
-        save_game(game_id, game)
-        players = game.get("players") or {}
-    if not _is_player_registered(players, int(user_id)):
-        logger.info(
-            "SSE players-only reject game_id=%s user_id=%s players_count=%s",
-            game_id,
-            user_id,
-            len(players),
-        )
-        raise HTTPException(status_code=403, detail=REALTIME_PLAYERS_ONLY_DETAIL)
-    return game, int(user_id)
+    user_id, validated = _validate_init_data(init_data)
+    assert user_id is not None  # _validate_init_data raises if init_data present and invalid
+    if is_known_player(game_id, int(user_id)):
+        return int(user_id)
+    game = get_game_by_id(game_id)
+    if not game:
+        raise HTTPException(status_code=404, detail=GAME_NOT_FOUND_DETAIL)
+    if game.has_player(user_id):
+        remember_player(game_id, int(user_id))
+        return int(user_id)
+    logger.info(
+        "SSE late-join",
+        extra={"game_id": game_id, "user_id": user_id, "players_count_before": len(game.players)},
+    )
+    join_game(game_id, game, int(user_id), get_user_first_name_from_validated(validated))
+    return int(user_id)
@@ -1,16 +1,27 @@
 # pyright: reportMissingImports=false
 """Game lifecycle: start, time up, door opened. Pure business logic; raises HTTPException where appropriate."""
 import asyncio
+import json
 import logging
+import time
+from collections import OrderedDict
+from collections.abc import Callable
 from datetime import datetime, timezone
 from typing import Any
 
 from fastapi import HTTPException
 
+from domain.game_state import GameState
 from services.game_api_service import all_unlock_puzzles_solved
-from services.game_session import end_game_by_id, get_timed_games_snapshot, save_game
-from infrastructure.repositories.group_repository import set_finished_at
+from services.game_session import (
+    end_game_by_id,
+    get_timed_games_snapshot,
+    save_game,
+    schedule_game_timeout,
+)
+from infrastructure.redis.redis_client import redis_claim_once, redis_get_claim, redis_release_claim
 from services.sse_registry import broadcast_door_opened, broadcast_game_over
+from utils.metrics import EXPIRY_LOOP_SECONDS, GAMES_EXPIRED, TIME_UP_CALLS
 
 logger = logging.getLogger(__name__)
 
@@ -18,17 +29,30 @@ TIME_UP_MESSAGE = "⏰ הזמן נגמר! Game Over.\n\nהמשחק הסתיים.
 DOOR_NOT_READY_DETAIL = "עדיין לא פתרתם את כל החידות בחדר."
 TOTAL_SECONDS = 60 * 60  # 60 minutes
 
+# Time-up single flight: the Redis claim makes one process the winner, in-flight futures make
+# one coroutine per process do the work, and finished results answer every later caller.
+_TIME_UP_CLAIM_PREFIX = "time_up:"
+_TIME_UP_RESULT_TTL_SECONDS = 6 * 60 * 60
+_TIME_UP_RESULTS_MAX = 10000
+_time_up_inflight: dict[str, asyncio.Future[dict[str, Any]]] = {}
+_time_up_results: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
 
-def record_game_start(game_id: str, game: dict[str, Any]) -> None:
+
+def record_game_start(game_id: str, game: GameState) -> None:
     """Set started_at if not set and persist. Idempotent."""
-    if not game.get("started_at"):
-        game["started_at"] = datetime.now(timezone.utc).isoformat()
+    if not game.started_at:
+        started = datetime.now(timezone.utc)
+        game.started_at = started.isoformat()
         save_game(game_id, game)
+        schedule_game_timeout(game_id, started.timestamp() + TOTAL_SECONDS)
 
 
-async def handle_time_up(game_id: str, game: dict[str, Any], bot: Any) -> None:
+async def handle_time_up(game_id: str, game: GameState, bot: Any) -> None:
     """End game: set group finished_at, end session, broadcast game_over, notify Telegram group."""
-    chat_id = game.get("chat_id")
+    # Imported here: the repository pulls in SQLAlchemy and the ORM models (cold start).
+    from infrastructure.repositories.group_repository import set_finished_at
+
+    chat_id = game.chat_id
     if chat_id is not None:
         set_finished_at(int(chat_id))
     end_game_by_id(game_id)
@@ -47,34 +71,121 @@ async def handle_time_up(game_id: str, game: dict[str, Any], bot: Any) -> None:
             )
 
 
-async def handle_door_opened(game_id: str, game: dict[str, Any]) -> None:
+def _remember_time_up(game_id: str, result: dict[str, Any]) -> None:
+    _time_up_results[game_id] = (time.monotonic() + _TIME_UP_RESULT_TTL_SECONDS, result)
+    _time_up_results.move_to_end(game_id)
+    while len(_time_up_results) > _TIME_UP_RESULTS_MAX:
+        _time_up_results.popitem(last=False)
+
+
+def _local_time_up_result(game_id: str) -> dict[str, Any] | None:
+    entry = _time_up_results.get(game_id)
+    if entry is None:
+        return None
+    if entry[0] < time.monotonic():
+        _time_up_results.pop(game_id, None)
+        return None
+    return entry[1]
+
+
+async def get_time_up_result(game_id: str) -> dict[str, Any] | None:
+    """Result of a finished time-up transition for this game (this process or any other)."""
+    result = _local_time_up_result(game_id)
+    if result is not None:
+        return result
+    raw = await asyncio.to_thread(redis_get_claim, _TIME_UP_CLAIM_PREFIX + game_id)
+    if raw is None:
+        return None
+    try:
+        result = json.loads(raw)
+    except (TypeError, ValueError):
+        return None
+    _remember_time_up(game_id, result)
+    return result
+
+
+async def end_game_on_time_up(
+    game_id: str,
+    game: GameState,
+    bot: Any,
+    reason: str = "timeout",
+) -> dict[str, Any]:
+    """Run handle_time_up at most once per game across all callers and processes.
+    Concurrent callers share the in-flight result; later callers get the cached one."""
+    cached = _local_time_up_result(game_id)
+    if cached is not None:
+        TIME_UP_CALLS.labels("cached").inc()
+        return cached
+    inflight = _time_up_inflight.get(game_id)
+    if inflight is not None:
+        TIME_UP_CALLS.labels("coalesced").inc()
+        return await asyncio.shield(inflight)
+    future: asyncio.Future[dict[str, Any]] = asyncio.get_running_loop().create_future()
+    _time_up_inflight[game_id] = future
+    try:
+        result = {
+            "ok": True,
+            "message": "game_over",
+            "reason": reason,
+            "ended_at": datetime.now(timezone.utc).isoformat(),
+        }
+        claim_key = _TIME_UP_CLAIM_PREFIX + game_id
+        claimed = await asyncio.to_thread(
+            redis_claim_once, claim_key, json.dumps(result), _TIME_UP_RESULT_TTL_SECONDS
+        )
+        if claimed is False:
+            TIME_UP_CALLS.labels("remote").inc()
+            result = await get_time_up_result(game_id) or result
+        else:
+            # Claimed, or no Redis (single process: the in-flight map is the only guard).
+            try:
+                await handle_time_up(game_id, game, bot)
+            except BaseException:
+                if claimed:
+                    await asyncio.to_thread(redis_release_claim, claim_key)
+                raise
+            TIME_UP_CALLS.labels("transition").inc()
+        _remember_time_up(game_id, result)
+        future.set_result(result)
+        return result
+    except BaseException as e:
+        future.set_exception(e)
+        future.exception()  # mark retrieved when nobody else was waiting
+        raise
+    finally:
+        _time_up_inflight.pop(game_id, None)
+
+
+async def handle_door_opened(game_id: str, game: GameState) -> None:
     """Ensure all unlock puzzles are solved, then broadcast door_opened. Raises HTTPException(400) if not ready."""
     if not all_unlock_puzzles_solved(game):
         raise HTTPException(status_code=400, detail=DOOR_NOT_READY_DETAIL)
     # Persist that the door was opened so late joiners / re-opened WebApps
     # can resume directly in the second room (science lab view).
-    game["door_opened"] = True
+    game.door_opened = True
     save_game(game_id, game)
     await broadcast_door_opened(game_id)
 
 
-async def check_expired_games_loop() -> None:
-    """Background task: every 10s check in-memory games for timer expiry; set game_over and broadcast."""
+async def check_expired_games_loop(get_bot: Callable[[], Any] = lambda: None) -> None:
+    """Background task: every 10s check timed games for expiry and end them through the same
+    single-flight path as POST /time_up (one DB write, one group message per game).
+    Runs in the control process only (see bootstrap); deadlines come from Redis when available."""
     while True:
         await asyncio.sleep(10)
+        pass_started = time.perf_counter()
         now = datetime.now(timezone.utc)
         for game_id, game in get_timed_games_snapshot():
             try:
-                started_at_str = game.get("started_at")
+                started_at_str = game.started_at
                 if not started_at_str:
                     continue
                 started = datetime.fromisoformat(started_at_str.replace("Z", "+00:00"))
                 elapsed = (now - started).total_seconds()
                 if elapsed >= TOTAL_SECONDS:
-                    game["game_over"] = True
-                    game["game_over_reason"] = "timeout"
-                    save_game(game_id, game)
-                    await broadcast_game_over(game_id, reason="timeout")
+                    await end_game_on_time_up(game_id, game, get_bot(), reason="timeout")
+                    GAMES_EXPIRED.inc()
                     logger.info("Game expired by timer: game_id=%s", game_id)
             except Exception as e:
                 logger.warning("check_expired_games game_id=%s: %s", game_id, e)
+        EXPIRY_LOOP_SECONDS.observe(time.perf_counter() - pass_started)
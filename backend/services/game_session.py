@@ -1,21 +1,60 @@
 # pyright: reportMissingImports=false
 """Game session state: registration, game_id, players. Used by handlers and Web API.
-When REDIS_URL is set, game state is stored in Redis; otherwise in-memory."""
+When REDIS_URL is set, game state is stored in Redis (players in a separate roster hash, so a late
+join never rewrites the game document); otherwise in-memory."""
 import logging
+import time
 import uuid
 from typing import Any
 
+from config import config
+from domain.game_state import GameState
+from infrastructure.redis.game_journal import journal_game_write, journal_pending
 from infrastructure.redis.redis_client import (
+    redis_add_player,
+    redis_claim_once,
+    redis_clear_game_timeout,
     redis_delete_game,
+    redis_due_game_timeouts,
+    redis_game_exists,
     redis_get_game,
+    redis_schedule_game_timeout,
     redis_set_game,
+    redis_was_reachable,
 )
+from utils.metrics import GAME_CACHE_EVICTIONS, Gauge
+from utils.tracing import traced
+from utils.ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
-# In-memory fallback when Redis is not available.
-# Format: { game_id: { "chat_id": int, "players": { user_id: name }, "game_active": bool, ... } }
-_games_by_id: dict[str, dict[str, Any]] = {}
+# In-memory copy (the store itself when Redis is not available). Bounded LRU whose entries expire
+# GAME_SESSION_TTL after the last write, like the Redis keys, so abandoned games do not pile up.
+_games_by_id: TTLCache[GameState] = TTLCache(
+    config.GAME_CACHE_MAX_ENTRIES,
+    config.GAME_SESSION_TTL,
+    on_evict=lambda reason: GAME_CACHE_EVICTIONS.labels(reason).inc(),
+)
+
+Gauge("escape_game_cache_entries", "Games held in the in-process game cache.", callback=lambda: len(_games_by_id))
+Gauge(
+    "escape_game_cache_bytes",
+    "Estimated size of the in-process game cache (sampled JSON size x entries).",
+    callback=lambda: _games_by_id.approx_bytes(serialize=GameState.to_document),
+)
+
+# game_id -> monotonic expiry of a positive Redis EXISTS answer (static asset auth, no state load).
+_known_game_ids: dict[str, float] = {}
+_KNOWN_GAME_TTL_SECONDS = 60.0
+_KNOWN_GAME_MAX = 10000
+
+# game_id -> {user_id: monotonic expiry} of confirmed players, so realtime reconnects skip the game load.
+_known_players: dict[str, dict[str, float]] = {}
+_KNOWN_PLAYER_TTL_SECONDS = 60.0
+
+# game_id -> one-time init steps claimed in this process (used when Redis is unavailable).
+_init_claims: dict[str, set[str]] = {}
+_INIT_CLAIM_TTL_SECONDS = 6 * 3600
 
 
 def start_registration(chat_data: dict[str, Any]) -> None:
@@ -50,40 +89,107 @@ def finish_registration(chat_id: int, chat_data: dict[str, Any]) -> str:
     game_id = str(uuid.uuid4())
     chat_data["game_active"] = True
     chat_data["game_id"] = game_id
-    game = {
-        "chat_id": chat_id,
-        "players": dict(chat_data.get("players") or {}),
-        "game_active": True,
-    }
-    _games_by_id[game_id] = game
-    redis_set_game(game_id, game)
+    game = GameState(
+        chat_id=chat_id,
+        players={str(k): v for k, v in (chat_data.get("players") or {}).items()},
+        game_active=True,
+    )
+    save_game(game_id, game)
     logger.info("Game created: game_id=%s chat_id=%s", game_id, chat_id)
     return game_id
 
 
-def get_game_by_id(game_id: str) -> dict[str, Any] | None:
-    """For Web API: get game state by game_id (Redis first, then in-memory)."""
+@traced("game_session.get_game_by_id")
+def get_game_by_id(game_id: str) -> GameState | None:
+    """For Web API: get game state by game_id (Redis first, then in-memory). A game with a
+    journaled write not replayed yet is read from memory: Redis may hold the pre-outage copy."""
+    if journal_pending(game_id):
+        return _games_by_id.get(game_id)
     found = redis_get_game(game_id)
     if found is not None:
-        _games_by_id[game_id] = found  # keep in-memory in sync for handlers
+        _games_by_id.put(game_id, found)  # keep in-memory in sync for handlers
         return found
     found = _games_by_id.get(game_id)
     logger.debug("get_game_by_id game_id=%s found=%s", game_id, found is not None)
     return found
 
 
-def save_game(game_id: str, game: dict[str, Any]) -> None:
-    """Persist game state to Redis and in-memory (call after mutating game)."""
-    _games_by_id[game_id] = game
-    redis_set_game(game_id, game)
+def claim_game_init(game_id: str, step: str) -> bool:
+    """True for exactly one caller per (game, step), e.g. the demo-room write. Redis SET NX
+    across processes; an in-process record when Redis is unavailable."""
+    claimed = redis_claim_once(f"game_init:{step}:{game_id}", "1", _INIT_CLAIM_TTL_SECONDS)
+    if claimed is not None:
+        return claimed
+    steps = _init_claims.setdefault(game_id, set())
+    if step in steps:
+        return False
+    steps.add(step)
+    return True
+
+
+def join_game(game_id: str, game: GameState, user_id: int, name: str) -> bool:
+    """Late join: add the player to the roster (Redis hash HSETNX) without rewriting the game
+    document, and to game.players in place. Without Redis the in-memory game is the store.
+    Returns True if the player was not registered before."""
+    key = str(user_id)
+    registered = key in game.players
+    added = redis_add_player(game_id, key, name)
+    if not registered:
+        game.players[key] = name
+    if added is None:
+        added = not registered
+        if added:
+            save_game(game_id, game)  # Redis down: in-memory copy + journal
+    remember_player(game_id, user_id)
+    return added
+
+
+def remember_player(game_id: str, user_id: int) -> None:
+    """Record a confirmed player for is_known_player (short-lived, per process)."""
+    if game_id not in _known_players and len(_known_players) >= _KNOWN_GAME_MAX:
+        _known_players.clear()
+    _known_players.setdefault(game_id, {})[str(user_id)] = time.monotonic() + _KNOWN_PLAYER_TTL_SECONDS
+
+
+def is_known_player(game_id: str, user_id: int) -> bool:
+    """Membership check without loading the game: True if user_id was confirmed as a player of
+    game_id in this process within the last _KNOWN_PLAYER_TTL_SECONDS."""
+    expires = _known_players.get(game_id, {}).get(str(user_id))
+    return expires is not None and expires > time.monotonic()
+
+
+def game_exists(game_id: str) -> bool:
+    """Existence check without loading game state: in-memory, recent positives, then Redis EXISTS."""
+    if game_id in _games_by_id:
+        return True
+    now = time.monotonic()
+    expires = _known_game_ids.get(game_id)
+    if expires is not None and expires > now:
+        return True
+    if not redis_game_exists(game_id):
+        _known_game_ids.pop(game_id, None)
+        return False
+    if len(_known_game_ids) >= _KNOWN_GAME_MAX:
+        _known_game_ids.clear()
+    _known_game_ids[game_id] = now + _KNOWN_GAME_TTL_SECONDS
+    return True
+
+
+@traced("game_session.save_game")
+def save_game(game_id: str, game: GameState) -> None:
+    """Persist game state to Redis and in-memory (call after mutating game). Bumps
+    game.version; a write that misses Redis goes to the local journal for replay."""
+    game.version += 1
+    _games_by_id.put(game_id, game)
+    if not redis_set_game(game_id, game) and redis_was_reachable():
+        journal_game_write(game_id, game)
 
 
 def end_game_chat(chat_data: dict[str, Any]) -> None:
     """Clear game state for this chat (e.g. on /end_game)."""
     game_id = chat_data.pop("game_id", None)
     if game_id:
-        _games_by_id.pop(game_id, None)
-        redis_delete_game(game_id)
+        end_game_by_id(game_id)
     chat_data["game_active"] = False
     chat_data["players"] = {}
     chat_data.pop("registration_msg_id", None)
@@ -94,15 +200,41 @@ def end_game_chat(chat_data: dict[str, Any]) -> None:
 
 def end_game_by_id(game_id: str) -> None:
     """Remove game from store (Redis + in-memory)."""
-    _games_by_id.pop(game_id, None)
-    redis_delete_game(game_id)
+    ended = _games_by_id.pop(game_id)
+    _known_game_ids.pop(game_id, None)
+    _init_claims.pop(game_id, None)
+    _known_players.pop(game_id, None)
+    if not redis_delete_game(game_id) and redis_was_reachable():
+        journal_game_write(game_id, None, (ended.version if ended is not None else 0) + 1)
+    redis_clear_game_timeout(game_id)
+
+
+def schedule_game_timeout(game_id: str, deadline_ts: float) -> None:
+    """Register the timer deadline (unix seconds) in Redis so whichever process runs the
+    expiry loop sees games started by any worker."""
+    redis_schedule_game_timeout(game_id, deadline_ts)
+
+
+def clear_game_timeout(game_id: str) -> None:
+    redis_clear_game_timeout(game_id)
 
 
-def get_timed_games_snapshot() -> list[tuple[str, dict[str, Any]]]:
+def get_timed_games_snapshot() -> list[tuple[str, GameState]]:
     """Return list of (game_id, game) for games that have started_at and are not game_over.
-    Used by the expired-games background task. Only includes in-memory games."""
-    result: list[tuple[str, dict[str, Any]]] = []
-    for gid, g in list(_games_by_id.items()):
-        if g.get("started_at") and not g.get("game_over"):
+    Used by the expired-games background task. With Redis: games whose scheduled deadline has
+    passed, from any process. Without Redis: in-memory games."""
+    due = redis_due_game_timeouts(time.time())
+    if due is not None:
+        result_due: list[tuple[str, GameState]] = []
+        for gid in due:
+            game = get_game_by_id(gid)
+            if game is None or game.game_over:
+                redis_clear_game_timeout(gid)
+                continue
+            result_due.append((gid, game))
+        return result_due
+    result: list[tuple[str, GameState]] = []
+    for gid, g in _games_by_id.items():
+        if g.started_at and not g.game_over:
             result.append((gid, g))
     return result
@@ -3,15 +3,26 @@
 import asyncio
 import json
 import logging
+import random
+import time
 import uuid
 from typing import Any
 
+from config import config
 from infrastructure.redis.redis_client import (
     redis_close_pubsub,
     redis_create_pubsub,
     redis_publish,
     redis_pubsub_get_message,
 )
+from utils.metrics import (
+    SSE_BROADCAST_FANOUT,
+    SSE_BROADCAST_SECONDS,
+    SSE_PUBSUB_LAG_SECONDS,
+    Gauge,
+)
+from utils.logging_config import log_sampled
+from utils.tracing import SPAN_KIND_CONSUMER, parse_traceparent, start_span, traced, traceparent
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +30,34 @@ logger = logging.getLogger(__name__)
 _connections: dict[str, list[asyncio.Queue[dict[str, Any]]]] = {}
 _PUBSUB_CHANNEL = "sse:broadcast"
 _INSTANCE_ID = uuid.uuid4().hex
+# Last event a stream sends on shutdown; queued events ahead of it are still delivered.
+DRAIN_EVENT_TYPE = "server_draining"
+_draining = False
+
+
+def _queue_depth_samples() -> list[tuple[tuple[str], int]]:
+    depths = [q.qsize() for queues in list(_connections.values()) for q in queues]
+    return [(("total",), sum(depths)), (("max",), max(depths, default=0))]
+
+
+# Read at scrape time from _connections; register/unregister stay metric-free.
+Gauge(
+    "escape_sse_connections",
+    "Open SSE subscriber queues in this process.",
+    callback=lambda: sum(len(queues) for queues in list(_connections.values())),
+)
+Gauge("escape_sse_games", "Games with at least one SSE subscriber.", callback=lambda: len(_connections))
+Gauge(
+    "escape_sse_connections_per_game_max",
+    "Largest subscriber count of any single game.",
+    callback=lambda: max((len(queues) for queues in list(_connections.values())), default=0),
+)
+Gauge(
+    "escape_sse_queue_depth",
+    "Undelivered events across subscriber queues (total and deepest queue).",
+    ("stat",),
+    callback=_queue_depth_samples,
+)
 
 
 def register(game_id: str) -> asyncio.Queue[dict[str, Any]]:
@@ -27,9 +66,7 @@ def register(game_id: str) -> asyncio.Queue[dict[str, Any]]:
     if game_id not in _connections:
         _connections[game_id] = []
     _connections[game_id].append(queue)
-    n = len(_connections[game_id])
-    logger.debug("SSE registered game_id=%s total=%s", game_id, n)
-    logger.info("SSE register game_id=%s connections_count=%s", game_id, n)
+    log_sampled(logger, logging.INFO, "SSE register", game_id=game_id, connections=len(_connections[game_id]))
     return queue
 
 
@@ -46,43 +83,75 @@ def unregister(game_id: str, queue: asyncio.Queue[dict[str, Any]]) -> None:
             n = 0
         else:
             n = len(_connections[game_id])
-    logger.debug("SSE unregistered game_id=%s", game_id)
-    logger.info("SSE unregister game_id=%s connections_count=%s", game_id, n)
+    log_sampled(logger, logging.INFO, "SSE unregister", game_id=game_id, connections=n)
+
+
+def is_draining() -> bool:
+    return _draining
+
+
+def reconnect_delay_ms() -> int:
+    """Jittered client reconnect delay, spreading reconnects after a deploy."""
+    return random.randint(config.SSE_RECONNECT_MIN_MS, max(config.SSE_RECONNECT_MIN_MS, config.SSE_RECONNECT_MAX_MS))
+
+
+def begin_drain() -> int:
+    """Stop accepting subscribers and tell each open stream to close after its queued events,
+    with its own reconnect delay. Idempotent; returns the number of streams signalled."""
+    global _draining
+    if _draining:
+        return 0
+    _draining = True
+    signalled = 0
+    for queues in list(_connections.values()):
+        for queue in list(queues):
+            queue.put_nowait({"type": DRAIN_EVENT_TYPE, "retry_ms": reconnect_delay_ms()})
+            signalled += 1
+    logger.info("SSE drain started streams=%s", signalled)
+    return signalled
+
+
+async def wait_for_drain(timeout: float) -> bool:
+    """Wait until every SSE stream has unregistered. False if some are still open at timeout."""
+    deadline = time.monotonic() + timeout
+    while _connections and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+    return not _connections
 
 
 async def _broadcast_local(game_id: str, payload: dict[str, Any], *, origin: str) -> None:
     """Push payload to all subscriber queues for this game_id."""
+    started = time.perf_counter()
     if game_id not in _connections:
-        logger.info(
-            "SSE broadcast game_id=%s origin=%s skipped no_connections",
-            game_id,
-            origin,
-        )
+        SSE_BROADCAST_FANOUT.labels(origin).observe(0)
+        log_sampled(logger, logging.DEBUG, "SSE broadcast skipped no_connections", game_id=game_id, origin=origin)
         return
     conn_count = len(_connections[game_id])
-    logger.info(
-        "SSE broadcast game_id=%s origin=%s connections=%s payload_type=%s",
-        game_id,
-        origin,
-        conn_count,
-        payload.get("type") or payload.get("event"),
-    )
     dead_count = 0
     for queue in list(_connections[game_id]):
         try:
             queue.put_nowait(payload)
         except Exception as e:
             dead_count += 1
-            logger.info("SSE enqueue failed game_id=%s err=%s", game_id, e)
+            logger.warning("SSE enqueue failed: %s", e, extra={"game_id": game_id})
             unregister(game_id, queue)
-    if dead_count:
-        logger.info(
-            "SSE broadcast pruning_dead game_id=%s dead_count=%s",
-            game_id,
-            dead_count,
-        )
+    elapsed = time.perf_counter() - started
+    SSE_BROADCAST_FANOUT.labels(origin).observe(conn_count)
+    SSE_BROADCAST_SECONDS.labels(origin).observe(elapsed)
+    log_sampled(
+        logger,
+        logging.INFO,
+        "SSE broadcast",
+        game_id=game_id,
+        origin=origin,
+        connections=conn_count,
+        dead=dead_count,
+        payload_type=payload.get("type") or payload.get("event"),
+        latency_ms=round(elapsed * 1000, 3),
+    )
 
 
+@traced("sse.broadcast")
 async def _broadcast(game_id: str, payload: dict[str, Any]) -> None:
     """Push payload locally and publish to Redis pub/sub for other processes."""
     await _broadcast_local(game_id, payload, origin="local")
@@ -90,7 +159,11 @@ async def _broadcast(game_id: str, payload: dict[str, Any]) -> None:
         "source": _INSTANCE_ID,
         "game_id": game_id,
         "payload": payload,
+        "sent_at": time.time(),
     }
+    parent = traceparent()
+    if parent:
+        envelope["traceparent"] = parent
     published = redis_publish(_PUBSUB_CHANNEL, json.dumps(envelope, ensure_ascii=False))
     if not published:
         logger.debug("SSE pubsub publish skipped/unavailable game_id=%s", game_id)
@@ -124,7 +197,19 @@ async def sse_pubsub_listener_loop() -> None:
                     continue
                 if not isinstance(game_id, str) or not isinstance(payload, dict):
                     continue
-                await _broadcast_local(game_id, payload, origin="redis")
+                sent_at = parsed.get("sent_at")
+                lag = max(0.0, time.time() - sent_at) if isinstance(sent_at, (int, float)) else None
+                if lag is not None:
+                    SSE_PUBSUB_LAG_SECONDS.observe(lag)
+                # Continues the publisher's trace, so cross-instance fan-out shows up under it.
+                with start_span(
+                    "sse.pubsub.receive",
+                    kind=SPAN_KIND_CONSUMER,
+                    parent=parse_traceparent(parsed.get("traceparent")),
+                    game_id=game_id,
+                    lag_ms=round(lag * 1000, 3) if lag is not None else -1,
+                ):
+                    await _broadcast_local(game_id, payload, origin="redis")
         except Exception as e:
             logger.warning("SSE pubsub listener error: %s", e)
         finally:
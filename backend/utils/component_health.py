@@ -0,0 +1,40 @@
+# pyright: reportMissingImports=false
+"""Startup state of background-initialized components (database, telegram), shown in /health.
+
+The HTTP/SSE surface is ready as soon as the app starts; slower dependencies report here
+while they come up in the background."""
+import time
+from dataclasses import asdict, dataclass
+from typing import Any
+
+STARTING = "starting"
+READY = "ready"
+FAILED = "failed"
+STANDBY = "standby"  # not this process's job right now (e.g. another process holds the control lease)
+DISABLED = "disabled"
+
+
+@dataclass
+class ComponentStatus:
+    state: str
+    since: float
+    detail: str | None = None
+
+
+_components: dict[str, ComponentStatus] = {}
+
+
+def set_component_state(name: str, state: str, detail: str | None = None) -> None:
+    current = _components.get(name)
+    if current is not None and current.state == state and current.detail == detail:
+        return
+    _components[name] = ComponentStatus(state=state, since=time.time(), detail=detail)
+
+
+def get_component_state(name: str) -> str | None:
+    status = _components.get(name)
+    return status.state if status is not None else None
+
+
+def component_snapshot() -> dict[str, dict[str, Any]]:
+    return {name: asdict(status) for name, status in _components.items()}
@@ -0,0 +1,142 @@
+# pyright: reportMissingImports=false
+"""Logging setup: non-blocking queue handler, text/JSON formatting, rate-limited hot-path logs.
+
+configure_logging() puts a QueueHandler on the root logger; a QueueListener thread does the
+formatting and the stdout write, so the event loop only enqueues records. Structured fields
+go in `extra=` and are rendered as key=value (text) or top-level JSON keys (json).
+
+log_sampled() limits high-frequency call sites (SSE register/broadcast, realtime auth) to
+LOG_SAMPLE_RATE messages per second each and reports how many were suppressed."""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any
+
+from config import config
+
+# Attributes every LogRecord has; anything else came from `extra=`.
+_RESERVED_ATTRS = frozenset(
+    vars(logging.LogRecord("", 0, "", 0, "", None, None)).keys() | {"message", "asctime", "taskName"}
+)
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+def _record_fields(record: logging.LogRecord) -> dict[str, Any]:
+    return {k: v for k, v in record.__dict__.items() if k not in _RESERVED_ATTRS}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, exc, plus structured fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        out: dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        out.update(_record_fields(record))
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        return json.dumps(out, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Classic one-line format with structured fields appended as key=value."""
+
+    def __init__(self) -> None:
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = _record_fields(record)
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        return line
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread.
+    Log args should be immutable values (ids, counts), as they are on the hot paths."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def configure_logging() -> None:
+    """Install the queue handler on the root logger (idempotent). Level and format from config."""
+    global _listener
+    if _listener is not None:
+        return
+    formatter: logging.Formatter = JsonFormatter() if config.LOG_FORMAT == "json" else TextFormatter()
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(formatter)
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_DeferredQueueHandler(log_queue))
+    root.setLevel(config.LOG_LEVEL)
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    _listener = None
+
+
+class LogSampler:
+    """Token bucket per call-site key: `rate` messages per second, bursts up to `burst`."""
+
+    def __init__(self, rate: float, burst: int | None = None) -> None:
+        self._rate = rate
+        self._burst = float(burst if burst is not None else max(1, int(rate)))
+        self._buckets: dict[str, list[float]] = {}  # key -> [tokens, last_refill, suppressed]
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str) -> int | None:
+        """None when suppressed; otherwise the number of messages suppressed since the last one."""
+        if self._rate <= 0:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self._burst, now, 0]
+            bucket[0] = min(self._burst, bucket[0] + (now - bucket[1]) * self._rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                return None
+            bucket[0] -= 1
+            suppressed, bucket[2] = int(bucket[2]), 0
+            return suppressed
+
+
+_sampler = LogSampler(config.LOG_SAMPLE_RATE)
+
+
+def log_sampled(logger: logging.Logger, level: int, msg: str, *args: Any, key: str | None = None, **fields: Any) -> None:
+    """Rate-limited log for hot paths. `key` defaults to the message template (one bucket per
+    call site); keyword fields become structured fields. Disabled levels cost one check."""
+    if not logger.isEnabledFor(level):
+        return
+    suppressed = _sampler.acquire(key or f"{logger.name}:{msg}")
+    if suppressed is None:
+        return
+    if suppressed:
+        fields["suppressed"] = suppressed
+    logger.log(level, msg, *args, extra=fields, stacklevel=2)
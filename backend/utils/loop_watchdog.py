@@ -0,0 +1,178 @@
+# pyright: reportMissingImports=false
+"""Event-loop stall detector with per-call-site attribution.
+
+A heartbeat task wakes every LOOP_WATCHDOG_INTERVAL_MS and records how late it woke
+(loop lag). A monitor thread notices when the heartbeat is overdue by more than
+LOOP_STALL_THRESHOLD_MS, grabs the loop thread's stack while it is still blocked and
+attributes the stall to the innermost frame in our own code (e.g. a sync Redis or DB call
+inside a coroutine). Stalls are aggregated per call site for /metrics and /admin/loop-stalls."""
+import asyncio
+import logging
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from config import config
+from utils.logging_config import log_sampled
+from utils.metrics import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+_BACKEND_DIR = str(Path(__file__).resolve().parent.parent)
+_MAX_CALL_SITES = 100
+_MAX_STACK_FRAMES = 30
+OTHER_CALL_SITE = "other"
+UNKNOWN_CALL_SITE = "unknown"
+
+LOOP_LAG_SECONDS = Histogram(
+    "escape_event_loop_lag_seconds",
+    "How late the watchdog heartbeat woke up.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+LOOP_STALLS = Counter(
+    "escape_event_loop_stalls_total", "Event-loop stalls over the threshold, by blocking call site.", ("callsite",)
+)
+LOOP_STALL_SECONDS = Counter(
+    "escape_event_loop_stall_seconds_total", "Time the event loop was stalled, by blocking call site.", ("callsite",)
+)
+
+
+@dataclass
+class CallSiteStats:
+    count: int = 0
+    total_s: float = 0.0
+    max_s: float = 0.0
+    last_seen: float = 0.0
+    example_stack: list[str] = field(default_factory=list)
+
+
+_lock = threading.Lock()
+_stats: dict[str, CallSiteStats] = {}
+_pending: tuple[str, list[str]] | None = None  # captured by the monitor, consumed by the heartbeat
+_last_beat = 0.0
+_monitor: threading.Thread | None = None
+_heartbeat_task: asyncio.Task[None] | None = None
+_stop_event = threading.Event()
+
+
+def _is_own_code(filename: str) -> bool:
+    return filename.startswith(_BACKEND_DIR) and ".venv" not in filename and "site-packages" not in filename
+
+
+def _attribute(frame: Any) -> tuple[str, list[str]]:
+    """Innermost frame in our code (file:line function) plus our frames, outermost first."""
+    own: list[str] = []
+    while frame is not None:
+        code = frame.f_code
+        if _is_own_code(code.co_filename):
+            rel = code.co_filename[len(_BACKEND_DIR) + 1 :]
+            own.append(f"{rel}:{frame.f_lineno} {code.co_name}")
+        frame = frame.f_back
+    if not own:
+        return UNKNOWN_CALL_SITE, []
+    return own[0], list(reversed(own[:_MAX_STACK_FRAMES]))
+
+
+def _record(lag: float, site: str, stack: list[str]) -> None:
+    with _lock:
+        stats = _stats.get(site)
+        if stats is None:
+            if len(_stats) >= _MAX_CALL_SITES:
+                site = OTHER_CALL_SITE
+                stats = _stats.setdefault(site, CallSiteStats())
+            else:
+                stats = _stats[site] = CallSiteStats()
+        stats.count += 1
+        stats.total_s += lag
+        stats.max_s = max(stats.max_s, lag)
+        stats.last_seen = time.time()
+        if stack:
+            stats.example_stack = stack
+    LOOP_STALLS.labels(site).inc()
+    LOOP_STALL_SECONDS.labels(site).inc(lag)
+    log_sampled(logger, logging.WARNING, "Event loop stalled", lag_ms=round(lag * 1000, 1), callsite=site)
+
+
+async def _heartbeat(interval: float, threshold: float) -> None:
+    global _last_beat, _pending
+    while True:
+        before = time.monotonic()
+        _last_beat = before
+        await asyncio.sleep(interval)
+        lag = max(0.0, time.monotonic() - before - interval)
+        LOOP_LAG_SECONDS.observe(lag)
+        if lag >= threshold:
+            with _lock:
+                site, stack = _pending or (UNKNOWN_CALL_SITE, [])
+                _pending = None
+            _record(lag, site, stack)
+
+
+def _monitor_loop(loop_thread_id: int, interval: float, threshold: float, stop: threading.Event) -> None:
+    global _pending
+    captured_for = 0.0
+    while not stop.wait(interval / 2):
+        beat = _last_beat
+        if not beat or beat == captured_for:
+            continue
+        if time.monotonic() - beat - interval < threshold:
+            continue
+        # Loop is blocked right now: its current stack is the culprit.
+        frame = sys._current_frames().get(loop_thread_id)
+        if frame is None:
+            continue
+        site, stack = _attribute(frame)
+        with _lock:
+            _pending = (site, stack)
+        captured_for = beat
+
+
+def start_loop_watchdog() -> None:
+    """Start heartbeat task and monitor thread on the running loop (idempotent)."""
+    global _monitor, _heartbeat_task
+    if not config.LOOP_WATCHDOG_ENABLED or _heartbeat_task is not None:
+        return
+    interval = config.LOOP_WATCHDOG_INTERVAL_MS / 1000
+    threshold = config.LOOP_STALL_THRESHOLD_MS / 1000
+    _heartbeat_task = asyncio.create_task(_heartbeat(interval, threshold))
+    _stop_event.clear()
+    _monitor = threading.Thread(
+        target=_monitor_loop,
+        args=(threading.get_ident(), interval, threshold, _stop_event),
+        name="loop-watchdog",
+        daemon=True,
+    )
+    _monitor.start()
+    logger.info("Loop watchdog started interval_ms=%s threshold_ms=%s", interval * 1000, threshold * 1000)
+
+
+def stop_loop_watchdog() -> None:
+    global _monitor, _heartbeat_task
+    if _heartbeat_task is not None:
+        _heartbeat_task.cancel()
+        _heartbeat_task = None
+    _stop_event.set()
+    if _monitor is not None:
+        _monitor.join(timeout=1)
+        _monitor = None
+
+
+def get_stall_report(top: int = 20) -> list[dict[str, Any]]:
+    """Call sites ranked by total stall time."""
+    with _lock:
+        rows = [
+            {
+                "callsite": site,
+                "count": s.count,
+                "total_ms": round(s.total_s * 1000, 1),
+                "max_ms": round(s.max_s * 1000, 1),
+                "last_seen": s.last_seen,
+                "stack": list(s.example_stack),
+            }
+            for site, s in _stats.items()
+        ]
+    rows.sort(key=lambda r: r["total_ms"], reverse=True)
+    return rows[:top]
@@ -0,0 +1,295 @@
+# pyright: reportMissingImports=false
+"""In-process metrics rendered in the Prometheus text exposition format (GET /metrics).
+
+Counters, gauges and histograms with fixed label names, no client library. Thread-safe,
+since Redis calls also run in worker threads. Gauges can take a callback that is read at
+scrape time (e.g. SSE connection counts), so hot paths do not update them."""
+import abc
+import math
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Seconds; covers sub-millisecond Redis ops up to slow Bot API calls.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_registry: list["_Metric"] = []
+_registry_lock = threading.Lock()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs: Iterable[tuple[str, str]]) -> str:
+    items = [f'{k}="{_escape(v)}"' for k, v in pairs]
+    return "{" + ",".join(items) + "}" if items else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class _Metric(abc.ABC):
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        self._children: dict[tuple[str, ...], Any] = {}
+        if not labelnames:
+            # Unlabelled series exist from the start, so scrapes see 0 rather than nothing.
+            self._children[()] = self._new_child()
+        with _registry_lock:
+            _registry.append(self)
+
+    @abc.abstractmethod
+    def _new_child(self) -> Any:
+        ...
+
+    def labels(self, *values: Any) -> Any:
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    @abc.abstractmethod
+    def _samples(self) -> Iterator[str]:
+        ...
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class _Value:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self) -> None:
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    def set(self, value: float) -> None:
+        self.value = float(value)
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def _samples(self) -> Iterator[str]:
+        for key, child in list(self._children.items()):
+            yield f"{self.name}{_format_labels(zip(self.labelnames, key))} {_format_value(child.value)}"
+
+
+class Gauge(_Metric):
+    """Gauge; with a callback the value is computed at scrape time. Labelled callbacks
+    return (label_values, value) pairs."""
+
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        callback: Callable[[], Any] | None = None,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._callback = callback
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+    def _samples(self) -> Iterator[str]:
+        if self._callback is not None:
+            result = self._callback()
+            pairs = result if self.labelnames else [((), result)]
+            for key, value in pairs:
+                labels = _format_labels(zip(self.labelnames, (str(v) for v in key)))
+                yield f"{self.name}{labels} {_format_value(value)}"
+            return
+        for key, child in list(self._children.items()):
+            yield f"{self.name}{_format_labels(zip(self.labelnames, key))} {_format_value(child.value)}"
+
+
+class _HistogramValue:
+    __slots__ = ("_upper_bounds", "_counts", "sum", "count", "_lock")
+
+    def __init__(self, upper_bounds: tuple[float, ...]) -> None:
+        self._upper_bounds = upper_bounds
+        self._counts = [0] * len(upper_bounds)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.sum += value
+            self.count += 1
+            for i, bound in enumerate(self._upper_bounds):
+                if value <= bound:
+                    self._counts[i] += 1
+                    break
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def snapshot(self) -> tuple[list[int], float, int]:
+        with self._lock:
+            return list(self._counts), self.sum, self.count
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        self._upper_bounds = tuple(sorted(buckets)) + (math.inf,)
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self._upper_bounds)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def _samples(self) -> Iterator[str]:
+        for key, child in list(self._children.items()):
+            base = list(zip(self.labelnames, key))
+            counts, total, count = child.snapshot()
+            cumulative = 0
+            for bound, n in zip(self._upper_bounds, counts):
+                cumulative += n
+                yield f"{self.name}_bucket{_format_labels(base + [('le', _format_value(bound))])} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(base)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(base)} {count}"
+
+
+def timed(histogram: Histogram, *label_values: Any) -> Callable[[F], F]:
+    """Decorator: observe the wall time of each call of a sync function."""
+
+    def decorator(fn: F) -> F:
+        child = histogram.labels(*label_values)
+
+        @wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - start)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def render_metrics() -> str:
+    """Serialize every registered metric (Prometheus text format 0.0.4)."""
+    with _registry_lock:
+        metrics = list(_registry)
+    return "\n".join(m.render() for m in metrics) + "\n"
+
+
+# --- Hot-path metrics (defined here so every layer imports one catalog) ---
+REDIS_OP_SECONDS = Histogram(
+    "escape_redis_op_duration_seconds", "Redis game store call latency by function.", ("op",)
+)
+REDIS_CONNECTION_RESETS = Counter(
+    "escape_redis_connection_resets_total", "Redis client dropped after a connection or timeout error."
+)
+INIT_DATA_VALIDATE_SECONDS = Histogram(
+    "escape_init_data_validate_duration_seconds", "Telegram WebApp initData HMAC validation time."
+)
+GAME_STATE_BUILD_SECONDS = Histogram(
+    "escape_game_state_build_duration_seconds", "build_game_state_response time."
+)
+SSE_BROADCAST_SECONDS = Histogram(
+    "escape_sse_broadcast_duration_seconds", "Time to enqueue one event to all local subscribers.", ("origin",)
+)
+SSE_BROADCAST_FANOUT = Histogram(
+    "escape_sse_broadcast_subscribers",
+    "Local subscribers per broadcast event.",
+    ("origin",),
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 250),
+)
+SSE_PUBSUB_LAG_SECONDS = Histogram(
+    "escape_sse_pubsub_lag_seconds", "Publish-to-receive delay of cross-process SSE events."
+)
+EXPIRY_LOOP_SECONDS = Histogram(
+    "escape_expiry_loop_duration_seconds", "One pass of the game timer expiry loop."
+)
+GAMES_EXPIRED = Counter("escape_games_expired_total", "Games ended by the expiry loop.")
+GAME_CACHE_EVICTIONS = Counter(
+    "escape_game_cache_evictions_total",
+    "Games dropped from the in-process game cache: expired (TTL) or size (LRU, GAME_CACHE_MAX_ENTRIES).",
+    ("reason",),
+)
+GAME_JOURNAL_EVENTS = Counter(
+    "escape_game_journal_total",
+    "Degraded-mode journal: appended (write missed Redis), replayed (applied on reconnect), "
+    "superseded (Redis already had a newer version), compacted (journal rewritten, last entry per game).",
+    ("event",),
+)
+TIME_UP_CALLS = Counter(
+    "escape_time_up_total",
+    "time_up requests by outcome: transition (this call ended the game), coalesced (joined an "
+    "in-flight call), cached (already ended here), remote (ended by another process).",
+    ("outcome",),
+)
+BOT_API_SECONDS = Histogram(
+    "escape_telegram_bot_api_duration_seconds", "Telegram Bot API call latency by method.", ("method",)
+)
+BOT_API_ERRORS = Counter(
+    "escape_telegram_bot_api_errors_total", "Telegram Bot API calls that raised.", ("method",)
+)
@@ -0,0 +1,219 @@
+# pyright: reportMissingImports=false
+"""On-demand sampling profiler for the running worker (admin endpoint).
+
+A timer thread samples sys._current_frames() every few milliseconds and counts collapsed
+stacks ("thread;file:func;file:func N", flamegraph.pl / speedscope input). Blocking calls
+on the event loop (sync Redis, SQLAlchemy sessions) show up under the loop thread.
+
+While it runs, event-loop lag is measured with a heartbeat coroutine and asyncio Handle
+callbacks slower than PROFILER_SLOW_CALLBACK_MS are recorded with the task they belong to.
+Slow callbacks need the pure-Python asyncio loop: uvloop (uvicorn[standard]) runs callbacks in
+C without asyncio.Handle._run, so there the result says they are unavailable and why.
+One profile at a time per process."""
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any
+
+from config import config
+
+MAX_PROFILE_SECONDS = 60.0
+MIN_INTERVAL_SECONDS = 0.001
+_HEARTBEAT_SECONDS = 0.01
+_MAX_STACK_DEPTH = 128
+
+_lock = threading.Lock()
+
+
+class ProfilerBusyError(RuntimeError):
+    """A profile is already running in this process."""
+
+
+@dataclass
+class ProfileResult:
+    duration_s: float
+    interval_ms: float
+    samples: int
+    stacks: Counter[str]
+    loop_lag_ms: dict[str, float]
+    slow_callbacks: list[dict[str, Any]] = field(default_factory=list)
+    slow_callbacks_unavailable: str | None = None  # why slow callbacks were not recorded
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def to_dict(self, top: int = 50) -> dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "duration_s": round(self.duration_s, 3),
+            "interval_ms": self.interval_ms,
+            "samples": self.samples,
+            "loop_lag_ms": self.loop_lag_ms,
+            "slow_callbacks": self.slow_callbacks,
+            "slow_callbacks_unavailable": self.slow_callbacks_unavailable,
+            "top_stacks": [{"stack": s, "count": c} for s, c in self.stacks.most_common(top)],
+            "collapsed": self.collapsed(),
+        }
+
+
+def _frame_label(frame: Any) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}".replace(";", ":").replace(" ", "_")
+
+
+def _collapse(frame: Any, thread_label: str) -> str:
+    parts: list[str] = []
+    while frame is not None and len(parts) < _MAX_STACK_DEPTH:
+        parts.append(_frame_label(frame))
+        frame = frame.f_back
+    parts.append(thread_label)
+    return ";".join(reversed(parts))
+
+
+class _StackSampler(threading.Thread):
+    def __init__(self, interval: float, loop_thread_id: int) -> None:
+        super().__init__(name="sampling-profiler", daemon=True)
+        self._interval = interval
+        self._loop_thread_id = loop_thread_id
+        self._stop_event = threading.Event()
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+
+    def _thread_labels(self) -> dict[int, str]:
+        labels = {t.ident: t.name.replace(" ", "_").replace(";", ":") for t in threading.enumerate() if t.ident}
+        labels[self._loop_thread_id] = "event-loop"
+        return labels
+
+    def run(self) -> None:
+        own = threading.get_ident()
+        labels = self._thread_labels()
+        while not self._stop_event.wait(self._interval):
+            frames = sys._current_frames()
+            for thread_id, frame in frames.items():
+                if thread_id == own:
+                    continue
+                label = labels.get(thread_id)
+                if label is None:
+                    labels = self._thread_labels()
+                    label = labels.get(thread_id, f"thread-{thread_id}")
+                self.stacks[_collapse(frame, label)] += 1
+            self.samples += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join(timeout=2)
+
+
+def _describe_callback(handle: asyncio.Handle) -> str:
+    callback = getattr(handle, "_callback", None)
+    owner = getattr(callback, "__self__", None)
+    if isinstance(owner, asyncio.Task):
+        coro = owner.get_coro()
+        return f"task {owner.get_name()} {getattr(coro, '__qualname__', coro)}"
+    return getattr(callback, "__qualname__", None) or repr(callback)
+
+
+def _slow_callbacks_unavailable(loop: asyncio.AbstractEventLoop) -> str | None:
+    """None when the loop runs callbacks through asyncio.Handle._run, else the reason it does not."""
+    if isinstance(loop, asyncio.BaseEventLoop):
+        return None
+    loop_type = type(loop)
+    return f"{loop_type.__module__}.{loop_type.__qualname__} does not run callbacks through asyncio.Handle (e.g. uvloop)"
+
+
+class _SlowCallbackRecorder:
+    """Temporarily wraps asyncio.Handle._run to time every loop callback (asyncio's own loop only)."""
+
+    def __init__(self, threshold: float) -> None:
+        self._threshold = threshold
+        self._original: Any = None
+        self.slow: dict[str, list[float]] = {}
+
+    def install(self) -> None:
+        original = asyncio.Handle._run
+        recorder = self
+
+        def _run(handle: asyncio.Handle) -> None:
+            started = time.perf_counter()
+            try:
+                original(handle)
+            finally:
+                elapsed = time.perf_counter() - started
+                if elapsed >= recorder._threshold:
+                    recorder.slow.setdefault(_describe_callback(handle), []).append(elapsed)
+
+        self._original = original
+        asyncio.Handle._run = _run  # type: ignore[method-assign]
+
+    def uninstall(self) -> None:
+        if self._original is not None:
+            asyncio.Handle._run = self._original  # type: ignore[method-assign]
+            self._original = None
+
+    def summary(self, top: int = 20) -> list[dict[str, Any]]:
+        rows = [
+            {
+                "callback": name,
+                "count": len(times),
+                "max_ms": round(max(times) * 1000, 3),
+                "total_ms": round(sum(times) * 1000, 3),
+            }
+            for name, times in self.slow.items()
+        ]
+        rows.sort(key=lambda r: r["total_ms"], reverse=True)
+        return rows[:top]
+
+
+async def _measure_loop_lag(seconds: float) -> dict[str, float]:
+    """Heartbeat: how late each short sleep wakes up is time the loop spent elsewhere."""
+    lags: list[float] = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        before = time.perf_counter()
+        await asyncio.sleep(_HEARTBEAT_SECONDS)
+        lags.append(max(0.0, time.perf_counter() - before - _HEARTBEAT_SECONDS))
+    if not lags:
+        return {"samples": 0, "mean": 0.0, "p50": 0.0, "p99": 0.0, "max": 0.0}
+    ordered = sorted(lags)
+    return {
+        "samples": len(lags),
+        "mean": round(sum(lags) / len(lags) * 1000, 3),
+        "p50": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p99": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000, 3),
+        "max": round(ordered[-1] * 1000, 3),
+    }
+
+
+async def run_profile(seconds: float, interval: float) -> ProfileResult:
+    """Sample all threads for `seconds` while measuring loop lag and slow callbacks.
+    Raises ProfilerBusyError if a profile is already running."""
+    seconds = min(max(seconds, 0.1), MAX_PROFILE_SECONDS)
+    interval = max(interval, MIN_INTERVAL_SECONDS)
+    if not _lock.acquire(blocking=False):
+        raise ProfilerBusyError("profile already running")
+    sampler = _StackSampler(interval, threading.get_ident())
+    recorder = _SlowCallbackRecorder(config.PROFILER_SLOW_CALLBACK_MS / 1000)
+    unavailable = _slow_callbacks_unavailable(asyncio.get_running_loop())
+    started = time.perf_counter()
+    try:
+        if unavailable is None:
+            recorder.install()
+        sampler.start()
+        loop_lag = await _measure_loop_lag(seconds)
+    finally:
+        sampler.stop()
+        recorder.uninstall()
+        _lock.release()
+    return ProfileResult(
+        duration_s=time.perf_counter() - started,
+        interval_ms=round(interval * 1000, 3),
+        samples=sampler.samples,
+        stacks=sampler.stacks,
+        loop_lag_ms=loop_lag,
+        slow_callbacks=recorder.summary(),
+        slow_callbacks_unavailable=unavailable,
+    )
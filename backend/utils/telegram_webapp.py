@@ -6,12 +6,17 @@ import json
 import logging
 from urllib.parse import parse_qs, unquote
 
+from utils.metrics import INIT_DATA_VALIDATE_SECONDS, timed
+from utils.tracing import traced
+
 logger = logging.getLogger(__name__)
 
 # Max age of initData (seconds). Telegram recommends not accepting data older than a day.
 INIT_DATA_MAX_AGE_SECONDS = 86400
 
 
+@traced("validate_init_data")
+@timed(INIT_DATA_VALIDATE_SECONDS)
 def validate_init_data(init_data: str, bot_token: str) -> dict | None:
     """
     Validate Telegram Web App initData string and return parsed payload (with 'user' containing 'id')
@@ -0,0 +1,307 @@
+# pyright: reportMissingImports=false
+"""Request tracing with OpenTelemetry-compatible spans (W3C trace context, OTLP/JSON export).
+
+No SDK dependency: spans live in a contextvar, so nesting follows sync calls, awaits and
+asyncio.to_thread. Exporters (TRACE_EXPORTER):
+  none       - start_span() is a shared no-op; tracing costs one check per call
+  memory     - keep the last TRACE_MEMORY_MAX_SPANS finished spans (get_finished_spans())
+  otlp-file  - append OTLP/JSON ExportTraceServiceRequest lines to TRACE_FILE from a writer thread
+
+Cross-process: traceparent() goes into the Redis pub/sub envelope, parse_traceparent() on receive."""
+import atexit
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any, TypeVar
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+SERVICE_NAME = "escape-room-backend"
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+# OTLP SpanKind values
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+SPAN_KIND_CONSUMER = 5
+
+
+class Span:
+    """One timed operation. Non-recording spans only carry ids for propagation."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "kind", "start_ns", "end_ns", "attributes", "error", "recording")
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: str | None,
+        kind: int,
+        recording: bool,
+        attributes: dict[str, Any] | None = None,
+    ) -> None:
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes or {}
+        self.error: str | None = None
+        self.recording = recording
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if self.recording:
+            self.attributes[key] = value
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_otlp(self) -> dict[str, Any]:
+        span: dict[str, Any] = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class SpanContext:
+    """Remote parent extracted from a traceparent string."""
+
+    __slots__ = ("trace_id", "span_id", "sampled")
+
+    def __init__(self, trace_id: str, span_id: str, sampled: bool) -> None:
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.sampled = sampled
+
+
+def _otlp_attribute(key: str, value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+class MemoryExporter:
+    def __init__(self, max_spans: int) -> None:
+        self._spans: deque[Span] = deque(maxlen=max_spans)
+
+    def export(self, span: Span) -> None:
+        self._spans.append(span)
+
+    def spans(self) -> list[Span]:
+        return list(self._spans)
+
+    def clear(self) -> None:
+        self._spans.clear()
+
+    def shutdown(self) -> None:
+        return
+
+
+class OTLPFileExporter:
+    """Batches finished spans on a writer thread; one OTLP/JSON request object per line."""
+
+    def __init__(self, path: str, flush_interval: float = 1.0, max_batch: int = 512) -> None:
+        self._path = path
+        self._flush_interval = flush_interval
+        self._max_batch = max_batch
+        self._queue: queue.SimpleQueue[Span | None] = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="otlp-file-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span) -> None:
+        self._queue.put(span)
+
+    def _write(self, batch: list[Span]) -> None:
+        request = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            _otlp_attribute("service.name", SERVICE_NAME),
+                            _otlp_attribute("process.pid", os.getpid()),
+                        ]
+                    },
+                    "scopeSpans": [{"scope": {"name": __name__}, "spans": [s.to_otlp() for s in batch]}],
+                }
+            ]
+        }
+        try:
+            with open(self._path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(request, ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.warning("Trace export to %s failed: %s", self._path, e)
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            batch: list[Span] = []
+            deadline = time.monotonic() + self._flush_interval
+            while len(batch) < self._max_batch:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            if batch:
+                self._write(batch)
+
+    def shutdown(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+
+def _create_exporter() -> MemoryExporter | OTLPFileExporter | None:
+    kind = config.TRACE_EXPORTER
+    if kind == "memory":
+        return MemoryExporter(config.TRACE_MEMORY_MAX_SPANS)
+    if kind == "otlp-file":
+        exporter = OTLPFileExporter(config.TRACE_FILE)
+        atexit.register(exporter.shutdown)
+        return exporter
+    return None
+
+
+_exporter = _create_exporter()
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar("current_span", default=None)
+
+
+def tracing_enabled() -> bool:
+    return _exporter is not None
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+
+def _new_trace_id() -> str:
+    return f"{random.getrandbits(128):032x}"
+
+
+@contextmanager
+def _noop_span() -> Iterator[None]:
+    yield None
+
+
+@contextmanager
+def _span(
+    name: str,
+    kind: int,
+    parent: SpanContext | None,
+    attributes: dict[str, Any],
+) -> Iterator[Span]:
+    local_parent = _current_span.get()
+    if parent is not None:
+        trace_id, parent_id, recording = parent.trace_id, parent.span_id, parent.sampled
+    elif local_parent is not None:
+        trace_id, parent_id, recording = local_parent.trace_id, local_parent.span_id, local_parent.recording
+    else:
+        trace_id, parent_id = _new_trace_id(), None
+        recording = random.random() < config.TRACE_SAMPLE_RATIO
+    span = Span(name, trace_id, parent_id, kind, recording, attributes)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        span.end_ns = time.time_ns()
+        if span.recording and _exporter is not None:
+            _exporter.export(span)
+
+
+def start_span(
+    name: str,
+    *,
+    kind: int = SPAN_KIND_INTERNAL,
+    parent: SpanContext | None = None,
+    **attributes: Any,
+):
+    """Context manager for a child of the current span (or a new root / remote child).
+    Yields the Span, or None when tracing is off."""
+    if _exporter is None:
+        return _noop_span()
+    return _span(name, kind, parent, attributes)
+
+
+def traced(name: str, *, kind: int = SPAN_KIND_INTERNAL, **attributes: Any) -> Callable[[F], F]:
+    """Decorator: run each call (sync or async) inside a span."""
+
+    def decorator(fn: F) -> F:
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                if _exporter is None:
+                    return await fn(*args, **kwargs)
+                with _span(name, kind, None, dict(attributes)):
+                    return await fn(*args, **kwargs)
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _exporter is None:
+                return fn(*args, **kwargs)
+            with _span(name, kind, None, dict(attributes)):
+                return fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def traceparent() -> str | None:
+    """W3C traceparent of the current span, for outgoing messages."""
+    span = _current_span.get()
+    if span is None:
+        return None
+    return f"00-{span.trace_id}-{span.span_id}-{'01' if span.recording else '00'}"
+
+
+def parse_traceparent(value: Any) -> SpanContext | None:
+    if not isinstance(value, str):
+        return None
+    match = _TRACEPARENT_RE.match(value.strip().lower())
+    if not match or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return SpanContext(match.group(1), match.group(2), sampled=bool(int(match.group(3), 16) & 1))
+
+
+def get_finished_spans() -> list[Span]:
+    """Finished spans held by the memory exporter (empty for other exporters)."""
+    return _exporter.spans() if isinstance(_exporter, MemoryExporter) else []
@@ -0,0 +1,111 @@
+# pyright: reportMissingImports=false
+"""Bounded in-process LRU cache with per-entry expiry (thread-safe)."""
+import json
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any, Generic, TypeVar
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    """At most max_entries items, least recently used evicted first; each entry expires
+    ttl_seconds after its last put (reads do not extend it, like a Redis SETEX key).
+
+    Expired entries are dropped when read and, a few per put, from the LRU end, so entries
+    nobody touches again do not linger. on_evict(reason) is called for every entry dropped
+    by the cache itself: "expired" or "size" (not for pop())."""
+
+    _PURGE_BATCH = 8
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        on_evict: Callable[[str], None] | None = None,
+    ) -> None:
+        self._max_entries = max(1, max_entries)
+        self._ttl = ttl_seconds
+        self._on_evict = on_evict
+        self._entries: OrderedDict[str, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evicted(self, reason: str) -> None:
+        if self._on_evict is not None:
+            self._on_evict(reason)
+
+    def get(self, key: str) -> V | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                return entry[1]
+            del self._entries[key]
+        self._evicted("expired")
+        return None
+
+    def put(self, key: str, value: V) -> None:
+        reasons: list[str] = []
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = (now + self._ttl, value)
+            self._entries.move_to_end(key)
+            for _ in range(self._PURGE_BATCH):
+                oldest_key, (expires, _) = next(iter(self._entries.items()))
+                if oldest_key == key or expires > now:
+                    break
+                del self._entries[oldest_key]
+                reasons.append("expired")
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                reasons.append("size")
+        for reason in reasons:
+            self._evicted(reason)
+
+    def pop(self, key: str) -> V | None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return entry[1] if entry is not None else None
+
+    def __contains__(self, key: object) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)  # type: ignore[call-overload]
+            return entry is not None and entry[0] > time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def items(self) -> list[tuple[str, V]]:
+        """Snapshot of live entries, least recently used first."""
+        now = time.monotonic()
+        with self._lock:
+            return [(key, value) for key, (expires, value) in self._entries.items() if expires > now]
+
+    def purge_expired(self) -> int:
+        """Drop every expired entry; returns how many were dropped."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, (expires, _) in self._entries.items() if expires <= now]
+            for key in expired:
+                del self._entries[key]
+        for _ in expired:
+            self._evicted("expired")
+        return len(expired)
+
+    def approx_bytes(self, sample: int = 32, serialize: Callable[[V], Any] | None = None) -> int:
+        """Estimated size of the cached values: mean JSON length of the most recently used
+        `sample` entries (of serialize(value) if given) times the entry count (cheap enough
+        for a metrics scrape)."""
+        with self._lock:
+            count = len(self._entries)
+            recent = [value for _, value in list(reversed(self._entries.values()))[:sample]]
+        if serialize is not None:
+            recent = [serialize(value) for value in recent]
+        if not recent:
+            return 0
+        sizes = [len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8")) for value in recent]
+        return sum(sizes) * count // len(sizes)
@@ -3,6 +3,15 @@
 from urllib.parse import quote
 
 from config import config
+from infrastructure.assets.asset_index import get_asset
+
+# Logical media asset -> fixed route, used when the asset index has no entry for it.
+_MEDIA_FALLBACK_ROUTES = {
+    "escape_room.png": "/room/escape_room.png",
+    "door_open.mp4": "/room/door_open.mp4",
+    "science_lab_room.png": "/room/science_lab_room.png",
+    "lore.wav": "/audio/lore.wav",
+}
 
 
 def game_app_url() -> str:
@@ -23,3 +32,21 @@ def game_entry_url(game_id: str) -> str:
         encoded_game_id = quote(str(game_id), safe="")
         return f"https://t.me/{bot_username}/{mini_app_short_name}?startapp={encoded_game_id}"
     return game_page_url(game_id)
+
+
+def api_base_url() -> str:
+    """Base URL of the API (backend), which serves media – not the frontend."""
+    return (config.API_BASE_URL or "http://localhost:8000").strip().rstrip("/")
+
+
+def versioned_asset_path(name: str, digest: str) -> str:
+    return f"/assets/{digest}/{name}"
+
+
+def asset_url(name: str) -> str:
+    """Content-addressed media URL (/assets/{content hash}/{name}), cacheable forever.
+    Falls back to the fixed route when the asset is not indexed."""
+    asset = get_asset(name)
+    if asset is None:
+        return f"{api_base_url()}{_MEDIA_FALLBACK_ROUTES.get(name, '/room/' + name)}"
+    return f"{api_base_url()}{versioned_asset_path(name, asset.digest)}"
@@ -106,6 +106,14 @@ export interface GameStateResponse {
   game_over?: boolean
   /** Server reason for game_over. */
   game_over_reason?: 'timeout' | 'solved' | string
+  /** Content-addressed media URLs (hash in path, cached forever by browser/CDN). */
+  media_urls?: MediaUrls
+}
+
+export interface MediaUrls {
+  room_image?: string
+  door_video?: string
+  science_lab_image?: string
 }
 
 /** Room canvas size – larger than screen so user scrolls left/right (panorama) */
@@ -167,7 +175,17 @@ function getLoreAudioUrl(gameId: string): string {
   return gameUrl(gameId) + '/lore/audio'
 }
 
-/** Fetch lore audio with initData header (for playback in GamePage). */
+/**
+ * Lore audio URL for an <audio> element: initData goes in the query (media elements cannot send headers),
+ * so the browser streams it with Range requests and playback starts before the whole file arrives.
+ */
+export function getLoreAudioStreamUrl(gameId: string): string {
+  const init = getInitData()
+  const url = getLoreAudioUrl(gameId)
+  return init ? url + '?init_data=' + encodeURIComponent(init) : url
+}
+
+/** Fetch lore audio with initData header (blob fallback when streaming playback fails). */
 export function fetchLoreAudio(gameId: string): Promise<Response> {
   return fetch(getLoreAudioUrl(gameId), { headers: gameHeaders() })
 }
@@ -3,19 +3,20 @@ import { getDoorVideoSrc } from '../constants/roomHotspots'
 
 type DoorVideoOverlayProps = {
   roomImageUrl: string | undefined
+  doorVideoUrl?: string
   videoRef: RefObject<HTMLVideoElement>
   onEnded: () => void
   onError: () => void
 }
 
 export function DoorVideoOverlay(props: DoorVideoOverlayProps) {
-  const { roomImageUrl, videoRef, onEnded, onError } = props
+  const { roomImageUrl, doorVideoUrl, videoRef, onEnded, onError } = props
   return (
     <div className="door-video-fullscreen" role="presentation">
       <video
         ref={videoRef}
         className="door-video-fullscreen-video"
-        src={getDoorVideoSrc(roomImageUrl)}
+        src={getDoorVideoSrc(roomImageUrl, doorVideoUrl)}
         autoPlay
         muted
         playsInline
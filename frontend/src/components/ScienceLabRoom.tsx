@@ -4,16 +4,17 @@ import { getRoomMediaUrl } from '../api/client'
 type ScienceLabRoomProps = {
   panoramaRef: RefObject<HTMLDivElement>
   onImageLoad: () => void
+  imageUrl?: string
 }
 
 export function ScienceLabRoom(props: ScienceLabRoomProps) {
-  const { panoramaRef, onImageLoad } = props
+  const { panoramaRef, onImageLoad, imageUrl } = props
   return (
     <div className="science-lab-room" role="region" aria-label="חדר המעבדה">
       <div className="room-wrapper science-lab-room-panorama" ref={panoramaRef}>
         <div className="room-container">
           <img
-            src={getRoomMediaUrl('science_lab_room.png')}
+            src={imageUrl || getRoomMediaUrl('science_lab_room.png')}
             alt="מעבדה"
             className="room-image"
             onLoad={onImageLoad}
@@ -3,8 +3,9 @@ import { getRoomMediaUrl } from '../api/client'
 /** Initial countdown duration in seconds (01:00:00). */
 export const INITIAL_TIMER_SECONDS = 3600
 
-/** Door opening video – served by backend from images/door_open.mp4 at same base as room image */
-export function getDoorVideoSrc(roomImageUrl: string | undefined): string {
+/** Door opening video – content-addressed URL from the server when present, else same base as room image */
+export function getDoorVideoSrc(roomImageUrl: string | undefined, doorVideoUrl?: string): string {
+  if (doorVideoUrl) return doorVideoUrl
   if (!roomImageUrl) return getRoomMediaUrl('door_open.mp4')
   return roomImageUrl.replace(/escape_room\.png$/i, 'door_open.mp4')
 }
@@ -35,8 +35,15 @@ export function useGameSSE(params: GameSSEParams): void {
     const url = getGameSSEUrl(gameId)
     const es = new EventSource(url)
     const sseRecoveryPollRef = { current: null as ReturnType<typeof setInterval> | null }
+    // Server restart: it sent a jittered reconnect delay; hold recovery polling until then too.
+    const drainDelayRef = { current: null as ReturnType<typeof setTimeout> | null }
+    let drainRetryAt = 0
 
     const stopRecoveryPolling = () => {
+      if (drainDelayRef.current) {
+        clearTimeout(drainDelayRef.current)
+        drainDelayRef.current = null
+      }
       if (sseRecoveryPollRef.current) {
         clearInterval(sseRecoveryPollRef.current)
         sseRecoveryPollRef.current = null
@@ -63,6 +70,11 @@ export function useGameSSE(params: GameSSEParams): void {
           item_id?: string
           item_label?: string
           answer?: string
+          retry_ms?: number
+        }
+        if (data.type === 'server_draining') {
+          drainRetryAt = Date.now() + (data.retry_ms ?? 0)
+          return
         }
         if (data.type === 'game_started' && data.started_at) {
           applyStartedState(data.started_at)
@@ -89,6 +101,16 @@ export function useGameSSE(params: GameSSEParams): void {
     }
 
     es.onerror = () => {
+      const wait = drainRetryAt - Date.now()
+      if (wait > 0) {
+        if (!drainDelayRef.current && !sseRecoveryPollRef.current) {
+          drainDelayRef.current = setTimeout(() => {
+            drainDelayRef.current = null
+            startRecoveryPolling()
+          }, wait)
+        }
+        return
+      }
       startRecoveryPolling()
     }
 
@@ -1,10 +1,10 @@
 import { useCallback, useEffect, useRef, useState } from 'react'
-import { fetchLoreAudio } from '../api/client'
+import { fetchLoreAudio, getLoreAudioStreamUrl } from '../api/client'
 import type { GameStateResponse } from '../api/client'
 import { hasLoreAck, persistLoreAck } from '../utils/loreAck'
 
 /**
- * Plays lore audio (fetch blob → AudioContext or HTMLAudioElement or TTS fallback).
+ * Plays lore audio (stream via HTMLAudioElement → fetch blob → AudioContext or HTMLAudioElement or TTS fallback).
  */
 function speakWithBrowserTTS(text: string, onEnd?: () => void): void {
   if (!text.trim()) {
@@ -79,34 +79,66 @@ export function useNarration(
         audioEl.addEventListener('error', onPlayFailed)
         audioEl.play().catch(onPlayFailed)
       }
-      fetchLoreAudio(gid)
-        .then((r) => (r.ok ? r.blob() : null))
-        .then(async (blob) => {
-          if (!blob) {
-            tryFallback()
-            return
-          }
-          if (audioContext && audioContext.state !== 'closed') {
-            try {
-              const arrayBuffer = await blob.arrayBuffer()
-              const audioBuffer = await audioContext.decodeAudioData(arrayBuffer)
-              const source = audioContext.createBufferSource()
-              source.buffer = audioBuffer
-              source.connect(audioContext.destination)
-              source.onended = () => onNarrationEnd?.()
-              source.start(0)
+      const playFromBlob = () => {
+        fetchLoreAudio(gid)
+          .then((r) => (r.ok ? r.blob() : null))
+          .then(async (blob) => {
+            if (!blob) {
+              tryFallback()
               return
-            } catch {
-              // fallback
             }
-          }
-          if (audioElementForFallback) {
-            playWithAudioElement(blob, audioElementForFallback)
-          } else {
-            tryFallback()
-          }
-        })
-        .catch(tryFallback)
+            if (audioContext && audioContext.state !== 'closed') {
+              try {
+                const arrayBuffer = await blob.arrayBuffer()
+                const audioBuffer = await audioContext.decodeAudioData(arrayBuffer)
+                const source = audioContext.createBufferSource()
+                source.buffer = audioBuffer
+                source.connect(audioContext.destination)
+                source.onended = () => onNarrationEnd?.()
+                source.start(0)
+                return
+              } catch {
+                // fallback
+              }
+            }
+            if (audioElementForFallback) {
+              playWithAudioElement(blob, audioElementForFallback)
+            } else {
+              tryFallback()
+            }
+          })
+          .catch(tryFallback)
+      }
+      // Streaming first: the element plays as soon as the first ranges arrive.
+      const playStreaming = (audioEl: HTMLAudioElement) => {
+        let settled = false
+        const detach = () => {
+          audioEl.removeEventListener('ended', onEnded)
+          audioEl.removeEventListener('error', onStreamFailed)
+        }
+        const onEnded = () => {
+          if (settled) return
+          settled = true
+          detach()
+          onNarrationEnd?.()
+        }
+        const onStreamFailed = () => {
+          if (settled) return
+          settled = true
+          detach()
+          playFromBlob()
+        }
+        audioEl.src = getLoreAudioStreamUrl(gid)
+        audioEl.preload = 'auto'
+        audioEl.addEventListener('ended', onEnded)
+        audioEl.addEventListener('error', onStreamFailed)
+        audioEl.play().catch(onStreamFailed)
+      }
+      if (audioElementForFallback) {
+        playStreaming(audioElementForFallback)
+      } else {
+        playFromBlob()
+      }
     },
     []
   )
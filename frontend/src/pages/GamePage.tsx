@@ -355,6 +355,7 @@ export default function GamePage() {
       {doorVideoPlaying && gameStarted && (
         <DoorVideoOverlay
           roomImageUrl={room?.room_image_url}
+          doorVideoUrl={room?.media_urls?.door_video}
           videoRef={doorVideoRef}
           onEnded={handleDoorVideoEnded}
           onError={handleDoorVideoError}
@@ -363,6 +364,7 @@ export default function GamePage() {
       {showScienceLabRoom && (
         <ScienceLabRoom
           panoramaRef={scienceLabPanoramaRef}
+          imageUrl={room?.media_urls?.science_lab_image}
           onImageLoad={() => setScienceLabImageLoaded(true)}
         />
       )}